@@ -27,6 +27,12 @@ class ApiService(object):
 
   """Wrapper for ApiService."""
 
+  # Toolkit modules and locators resolved for a service, shared by all of its
+  # instances. Keyed by (import chain, SOAP toolkit, API version, service name).
+  # Threads racing to resolve the same service store equivalent entries, so no
+  # locking is needed.
+  __registry = {}
+
   def __init__(self, headers, config, op_config, url, import_chain, lock,
                logger):
     """Inits ApiService.
@@ -42,16 +48,43 @@ class ApiService(object):
       lock: thread.lock Thread lock
       logger: Logger Instance of Logger
     """
-    ToolkitSanityCheck = None
-    API_VERSIONS = []
     self._config = config
     self._op_config = op_config
+    self.__headers = headers
+    self.__entity_cache = op_config.get('entity_cache')
+    key = (import_chain, config['soap_lib'], op_config['version'],
+           self.__class__.__name__)
+    entry = ApiService.__registry.get(key)
+    if entry is None:
+      entry = self.__Resolve(config, op_config, import_chain)
+      ApiService.__registry[key] = entry
+    (self._sanity_check, self._web_services, self._loc,
+     self._message_handler) = entry
+
+  def __Resolve(self, config, op_config, import_chain):
+    """Import toolkit modules and create a locator for this service.
+
+    Args:
+      config: dict Dictionary object with populated configuration values.
+      op_config: dict Dictionary object with additional configuration values for
+                 this operation.
+      import_chain: str Import chain of the wrapper for web service.
+
+    Returns:
+      tuple Toolkit's SanityCheck module, web services module, service locator
+            and MessageHandler module. Values that don't apply to the SOAP
+            toolkit in use are None.
+    """
+    ToolkitSanityCheck = None
+    API_VERSIONS = []
+    web_services = None
+    loc = None
+    message_handler = None
     if config['soap_lib'] == SOAPPY:
       from adspygoogle.common.soappy import MessageHandler
       exec ('from %s.soappy import SanityCheck as ToolkitSanityCheck'
             % import_chain)
-      self._web_services = None
-      self._message_handler = MessageHandler
+      message_handler = MessageHandler
     elif config['soap_lib'] == ZSI:
       exec 'from %s import API_VERSIONS' % import_chain
       exec 'from %s.zsi import SanityCheck as ToolkitSanityCheck' % import_chain
@@ -73,6 +106,50 @@ class ApiService(object):
       else:
         msg = 'Invalid API version, not one of %s.' % str(list(API_VERSIONS))
         raise ValidationError(msg)
-      self._web_services = web_services
-      self._loc = eval('web_services.%sLocator()' % self.__class__.__name__)
-    self._sanity_check = ToolkitSanityCheck
+      loc = eval('web_services.%sLocator()' % self.__class__.__name__)
+    return (ToolkitSanityCheck, web_services, loc, message_handler)
+
+  def _GetEntityCacheKey(self, entity_type, entity_id):
+    """Return key under which a given entity is cached.
+
+    Args:
+      entity_type: str Type of the entity, e.g. 'LineItem'.
+      entity_id: str ID of the entity.
+
+    Returns:
+      tuple Key of the entity, (network, version, type, id). None, if entity
+            cache is not in use.
+    """
+    if self.__entity_cache is None: return None
+    return (self.__headers.get('networkCode'), self._op_config['version'],
+            entity_type, str(entity_id))
+
+  def _GetCachedEntity(self, key):
+    """Return cached response of a call that fetched a single entity.
+
+    Args:
+      key: tuple Key of the entity, as returned by _GetEntityCacheKey().
+
+    Returns:
+      tuple Cached response, None if entity is not cached, and generation of
+            the cache to pass to _CacheEntity() once the entity is fetched.
+    """
+    if key is None: return (None, None)
+    generation = self.__entity_cache.GetGeneration()
+    return (self.__entity_cache.Get(key), generation)
+
+  def _CacheEntity(self, key, response, generation):
+    """Cache response of a call that fetched a single entity.
+
+    Only successful responses are cached, errors and raw responses aren't.
+    Neither are responses to calls that overlapped with a change of entities,
+    which may predate the change.
+
+    Args:
+      key: tuple Key of the entity, as returned by _GetEntityCacheKey().
+      response: tuple Response from the API method.
+      generation: int Generation of the cache, as returned by
+                  _GetCachedEntity().
+    """
+    if key is None or not isinstance(response, tuple) or not response: return
+    self.__entity_cache.Set(key, response, generation)
@@ -0,0 +1,274 @@
+#!/usr/bin/python
+#
+# Copyright 2011 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""File backed cache of authentication tokens, shared between processes."""
+
+__author__ = 'api.sgrinberg@gmail.com (Stan Grinberg)'
+
+import os
+import pickle
+import threading
+import time
+try:
+  import fcntl
+except ImportError:
+  # Not available on Windows, where the cache is only guarded within process.
+  fcntl = None
+
+from adspygoogle.common.AuthToken import AuthToken
+from adspygoogle.common.Errors import AuthTokenError
+
+
+class AuthTokenCache(object):
+
+  """Implements AuthTokenCache.
+
+  Keeps authentication tokens in a pickle shared by all processes on the host,
+  keyed by account's login email and the service the token is for. Access to
+  the pickle is serialized with an exclusive lock on a companion lock file, so
+  when a token is missing or has expired, only the first process logs in and
+  the rest pick up its token from the pickle.
+
+  Refresh is lazy: a request for a token that is within the refresh period of
+  expiring starts a background thread to fetch a new one, while the current
+  token keeps being handed out. Nothing refreshes a token that isn't asked
+  for, so a request that comes in only after the token has expired (e.g.,
+  after a process was idle) waits for a login.
+  """
+
+  # Number of seconds to wait before retrying a failed background refresh.
+  RETRY_DELAY = 60
+
+  def __init__(self, path, expire, refresh=None):
+    """Inits AuthTokenCache.
+
+    Args:
+      path: str Absolute path to the pickle with cached tokens.
+      expire: int Number of seconds a token is valid for.
+      [optional]
+      refresh: int Number of seconds before expiration when token is refreshed
+               in background. Defaults to a tenth of the expiration time.
+    """
+    if refresh is None: refresh = expire / 10
+    self.__path = path
+    self.__expire = expire
+    self.__refresh = refresh
+    self.__tokens = {}
+    self.__next_refresh = {}
+    # Guards fetching of tokens that have expired.
+    self.__lock = threading.Lock()
+    # Guards scheduling of background refreshes, which must never wait for a
+    # login to finish.
+    self.__refresh_lock = threading.Lock()
+
+  def __LockFile(self):
+    """Acquire lock shared with other processes using the cache.
+
+    Returns:
+      file Open lock file, to be passed to __UnlockFile(). None, if lock file
+           can't be opened.
+    """
+    try:
+      fh = open('%s.lock' % self.__path, 'a')
+    except IOError:
+      return None
+    if fcntl is not None:
+      try:
+        fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+      except IOError:
+        # File system doesn't support locking, carry on without it.
+        pass
+    return fh
+
+  def __UnlockFile(self, fh):
+    """Release lock shared with other processes using the cache.
+
+    Args:
+      fh: file Open lock file, as returned by __LockFile().
+    """
+    if fh is None: return
+    try:
+      if fcntl is not None:
+        try:
+          fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+        except IOError:
+          pass
+    finally:
+      fh.close()
+
+  def __Load(self):
+    """Load cached tokens from the pickle.
+
+    Returns:
+      dict Cached tokens, (token, epoch) keyed by (email, service). Missing or
+           unreadable pickle yields no tokens.
+    """
+    try:
+      fh = open(self.__path, 'rb')
+      try:
+        tokens = pickle.load(fh)
+      finally:
+        fh.close()
+    except Exception:
+      return {}
+    if not isinstance(tokens, dict): return {}
+    return tokens
+
+  def __Save(self, tokens):
+    """Save cached tokens into the pickle.
+
+    The pickle is written to a temporary file first and then renamed, so that
+    it is never seen half written. Only the owner can read it.
+
+    Args:
+      tokens: dict Cached tokens, see __Load().
+    """
+    tmp_path = '%s.%s.tmp' % (self.__path, os.getpid())
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0600)
+    fh = os.fdopen(fd, 'wb')
+    try:
+      pickle.dump(tokens, fh, pickle.HIGHEST_PROTOCOL)
+    finally:
+      fh.close()
+    if os.name == 'nt' and os.path.exists(self.__path):
+      # Rename doesn't replace existing file on Windows.
+      os.remove(self.__path)
+    os.rename(tmp_path, self.__path)
+
+  def __IsFresh(self, entry, now):
+    """Return whether a cached token is outside of its refresh period.
+
+    Args:
+      entry: tuple Cached token, (token, epoch).
+      now: float Current time.
+
+    Returns:
+      bool True if token doesn't need to be refreshed yet, False otherwise.
+    """
+    return now - entry[1] < self.__expire - self.__refresh
+
+  def __IsExpired(self, entry, now):
+    """Return whether a cached token has expired.
+
+    Args:
+      entry: tuple Cached token, (token, epoch).
+      now: float Current time.
+
+    Returns:
+      bool True if token has expired, False otherwise.
+    """
+    return now - entry[1] >= self.__expire
+
+  def __Update(self, key, password, lib_sig, proxy, refresh):
+    """Make sure the pickle holds a usable token for a given account.
+
+    Another process may have fetched the token already, in which case its
+    token is used. Otherwise, a new token is fetched and saved.
+
+    Args:
+      key: tuple Account's login email and the service, (email, service).
+      password: str Account's login password.
+      lib_sig: str Signature of the client library.
+      proxy: str HTTP proxy to use.
+      refresh: bool Whether token in its refresh period has to be replaced,
+               rather than only an expired one.
+
+    Returns:
+      tuple Usable token, (token, epoch).
+    """
+    fh = self.__LockFile()
+    try:
+      tokens = self.__Load()
+      entry = tokens.get(key)
+      now = time.time()
+      if (entry is None or self.__IsExpired(entry, now) or
+          (refresh and not self.__IsFresh(entry, now))):
+        token = AuthToken(key[0], password, key[1], lib_sig,
+                          proxy).GetAuthToken()
+        entry = (token, time.time())
+        tokens[key] = entry
+        try:
+          self.__Save(tokens)
+        except (IOError, OSError):
+          # Token is still good for this process.
+          pass
+    finally:
+      self.__UnlockFile(fh)
+    self.__tokens[key] = entry
+    return entry
+
+  def __RefreshInBackground(self, key, password, lib_sig, proxy):
+    """Refresh token for a given account, ignoring failures.
+
+    Args:
+      key: tuple Account's login email and the service, (email, service).
+      password: str Account's login password.
+      lib_sig: str Signature of the client library.
+      proxy: str HTTP proxy to use.
+    """
+    try:
+      self.__Update(key, password, lib_sig, proxy, True)
+    except AuthTokenError:
+      # Current token is still valid. Refresh is retried after RETRY_DELAY,
+      # and errors surface once the token has expired.
+      pass
+
+  def GetAuthToken(self, email, password, service, lib_sig, proxy):
+    """Return authentication token for Google Account.
+
+    If an error occurs while fetching a new token, AuthTokenError is raised.
+
+    Args:
+      email: str Google Account's login email.
+      password: str Google Account's password.
+      service: str Name of the Google service for which to authorize access.
+      lib_sig: str Signature of the client library.
+      proxy: str HTTP proxy to use.
+
+    Returns:
+      tuple Authentication token and the time it was fetched at,
+            (token, epoch).
+    """
+    key = (email, service)
+    now = time.time()
+    entry = self.__tokens.get(key)
+    if entry is not None and self.__IsFresh(entry, now):
+      return entry
+
+    if entry is None or self.__IsExpired(entry, now):
+      self.__lock.acquire()
+      try:
+        # Some other thread may have fetched the token while we were waiting.
+        entry = self.__tokens.get(key)
+        if entry is None or self.__IsExpired(entry, time.time()):
+          entry = self.__Update(key, password, lib_sig, proxy, False)
+      finally:
+        self.__lock.release()
+      return entry
+
+    # Token is still valid, but due for a refresh. Start one, unless it is
+    # already running or has recently failed.
+    self.__refresh_lock.acquire()
+    try:
+      if now < self.__next_refresh.get(key, 0): return entry
+      self.__next_refresh[key] = now + self.__class__.RETRY_DELAY
+    finally:
+      self.__refresh_lock.release()
+    thread = threading.Thread(target=self.__RefreshInBackground,
+                              args=(key, password, lib_sig, proxy))
+    thread.setDaemon(True)
+    thread.start()
+    return entry
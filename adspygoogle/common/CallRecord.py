@@ -0,0 +1,122 @@
+#!/usr/bin/python
+#
+# Copyright 2011 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Handler class for recording a single HTTP request and its response."""
+
+__author__ = 'api.sgrinberg@gmail.com (Stan Grinberg)'
+
+import time
+
+
+class CallRecord(object):
+
+  """Implements CallRecord.
+
+  Filled in by a connection handler while it talks to the server, so that HTTP
+  headers and SOAP messages don't have to be traced to sys.stdout and parsed
+  back out of it.
+
+  Attributes:
+    method: str HTTP method of the request, None if request was never started.
+    url: str URL of the request.
+    headers_out: list Outgoing HTTP header lines.
+    body_out: str Outgoing body, before compression.
+    bytes_out: int Number of body bytes sent over the wire.
+    status: int HTTP status code, None if no response was received.
+    reason: str HTTP reason phrase.
+    headers_in: list Incoming HTTP header lines.
+    body_in: str Incoming body, after decompression.
+    bytes_in: int Number of body bytes received over the wire.
+    request_time: float Time the request was started.
+    response_time: float Time the response headers were received.
+    stop_time: float Time the response body was read.
+  """
+
+  def __init__(self):
+    """Inits CallRecord."""
+    self.method = None
+    self.url = None
+    self.headers_out = []
+    self.body_out = ''
+    self.bytes_out = 0
+    self.status = None
+    self.reason = None
+    self.headers_in = []
+    self.body_in = ''
+    self.bytes_in = 0
+    self.request_time = None
+    self.response_time = None
+    self.stop_time = None
+
+  def StartRequest(self, method, url):
+    """Record start of the request.
+
+    Args:
+      method: str HTTP method.
+      url: str URL being requested.
+    """
+    self.method = method
+    self.url = url
+    self.request_time = time.time()
+
+  def AddHeaderOut(self, header, value):
+    """Record outgoing HTTP header.
+
+    Args:
+      header: str Name of the header.
+      value: str Value of the header.
+    """
+    self.headers_out.append('%s: %s' % (header, value))
+
+  def AddBodyOut(self, data, size=None):
+    """Record outgoing body.
+
+    Args:
+      data: str Body as it was passed to the connection.
+      [optional]
+      size: int Number of bytes sent over the wire, if different from the
+            length of data (e.g., compressed).
+    """
+    if size is None: size = len(data)
+    self.body_out += data
+    self.bytes_out += size
+
+  def StartResponse(self, status, reason, headers):
+    """Record start of the response.
+
+    Args:
+      status: int HTTP status code.
+      reason: str HTTP reason phrase.
+      headers: list Incoming HTTP header lines.
+    """
+    self.status = status
+    self.reason = reason
+    self.headers_in = [header.rstrip('\r\n') for header in headers]
+    self.response_time = time.time()
+
+  def AddBodyIn(self, data, size=None):
+    """Record incoming body.
+
+    Args:
+      data: str Body as it was returned to the caller.
+      [optional]
+      size: int Number of bytes received over the wire, if different from the
+            length of data (e.g., compressed).
+    """
+    if size is None: size = len(data)
+    self.body_in += data
+    self.bytes_in += size
+    self.stop_time = time.time()
@@ -125,9 +125,14 @@ class Client(object):
         'raw_response': 'n',
         'strict': 'y',
         'auth_token_epoch': 0,
+        'auth_token_cache': 'n',
         'auth_type': '',
         'pretty_xml': 'y',
         'compress': 'y',
+        'keep_alive': 'y',
+        'keep_alive_pool_size': 10,
+        'keep_alive_timeout': 60,
+        'fast_decoder': 'n',
         'data_injects': (),
         'force_data_inject': 'n',
         'access': '',
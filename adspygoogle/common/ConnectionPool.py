@@ -0,0 +1,182 @@
+#!/usr/bin/python
+#
+# Copyright 2011 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Pool of persistent HTTP/1.1 connections."""
+
+__author__ = 'api.sgrinberg@gmail.com (Stan Grinberg)'
+
+import select
+import socket
+import threading
+import time
+
+
+class ConnectionPool(object):
+
+  """Implements ConnectionPool.
+
+  Keeps idle keep-alive sockets per host, so that consecutive requests to the
+  same host reuse an already established TCP (and SSL) session instead of
+  doing a new handshake each time. A socket is checked out for the duration of
+  a single request and returned once its response has been fully read.
+  """
+
+  def __init__(self, max_size=10, idle_timeout=60):
+    """Inits ConnectionPool.
+
+    Args:
+      [optional]
+      max_size: int Maximum number of idle sockets to keep per host. Sockets
+                returned to a full pool are closed.
+      idle_timeout: int Number of seconds after which an idle socket is
+                    considered expired and is evicted from the pool.
+    """
+    self.__max_size = max_size
+    self.__idle_timeout = idle_timeout
+    self.__pool = {}
+    self.__lock = threading.Lock()
+
+  def __IsStale(self, sock):
+    """Return True if the server has closed a given idle socket.
+
+    An idle keep-alive socket should never have anything to read. If it
+    becomes readable, the server either closed the connection or sent data we
+    are not expecting. In both cases the socket can't be reused.
+
+    Args:
+      sock: socket Idle socket to check.
+
+    Returns:
+      bool True if socket is stale, False otherwise.
+    """
+    try:
+      readable = select.select([sock], [], [], 0)[0]
+    except (select.error, socket.error, ValueError):
+      return True
+    return bool(readable)
+
+  def __Close(self, sock):
+    """Close a given socket, ignoring any errors.
+
+    Args:
+      sock: socket Socket to close.
+    """
+    try:
+      sock.close()
+    except socket.error:
+      pass
+
+  def SetLimits(self, max_size, idle_timeout):
+    """Change limits of the pool, see __init__().
+
+    Sockets that are already idle are held to the new limits as they are
+    handed out or new ones come in.
+
+    Args:
+      max_size: int Maximum number of idle sockets to keep per host.
+      idle_timeout: int Number of seconds after which an idle socket is
+                    considered expired.
+    """
+    self.__lock.acquire()
+    try:
+      self.__max_size = max_size
+      self.__idle_timeout = idle_timeout
+    finally:
+      self.__lock.release()
+
+  def Acquire(self, key):
+    """Check out an idle socket for a given host.
+
+    Expired and stale sockets that are found along the way are closed and
+    evicted from the pool.
+
+    Args:
+      key: tuple Identifier of the host, e.g. (scheme, host, port).
+
+    Returns:
+      socket Idle socket that is ready to be reused, or None if a new
+             connection has to be established.
+    """
+    while True:
+      self.__lock.acquire()
+      try:
+        idle = self.__pool.get(key)
+        if not idle: return None
+        sock, timestamp = idle.pop()
+      finally:
+        self.__lock.release()
+
+      if (time.time() - timestamp > self.__idle_timeout or
+          self.__IsStale(sock)):
+        self.__Close(sock)
+        continue
+      return sock
+
+  def Release(self, key, sock):
+    """Return a socket into the pool once its response has been fully read.
+
+    Args:
+      key: tuple Identifier of the host, e.g. (scheme, host, port).
+      sock: socket Socket to return.
+    """
+    evicted = []
+    now = time.time()
+    self.__lock.acquire()
+    try:
+      idle = self.__pool.setdefault(key, [])
+      # Evict expired sockets, oldest ones are at the front of the list.
+      while idle and now - idle[0][1] > self.__idle_timeout:
+        evicted.append(idle.pop(0)[0])
+      if len(idle) < self.__max_size:
+        idle.append((sock, now))
+      else:
+        evicted.append(sock)
+    finally:
+      self.__lock.release()
+
+    for item in evicted:
+      self.__Close(item)
+
+  def Clear(self):
+    """Close all idle sockets and empty the pool."""
+    self.__lock.acquire()
+    try:
+      pool = self.__pool
+      self.__pool = {}
+    finally:
+      self.__lock.release()
+
+    for idle in pool.values():
+      for sock, timestamp in idle:
+        self.__Close(sock)
+
+  def GetIdleCount(self, key=None):
+    """Return number of idle sockets in the pool.
+
+    Args:
+      [optional]
+      key: tuple Identifier of the host. If not set, all hosts are counted.
+
+    Returns:
+      int Number of idle sockets.
+    """
+    self.__lock.acquire()
+    try:
+      if key is not None:
+        return len(self.__pool.get(key, []))
+      return sum([len(idle) for idle in self.__pool.values()])
+    finally:
+      self.__lock.release()
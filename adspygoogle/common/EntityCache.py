@@ -0,0 +1,210 @@
+#!/usr/bin/python
+#
+# Copyright 2011 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Size bounded cache of API entities, with expiration of entries."""
+
+__author__ = 'api.sgrinberg@gmail.com (Stan Grinberg)'
+
+import copy
+import threading
+import time
+
+
+class EntityCache(object):
+
+  """Implements EntityCache.
+
+  Keeps responses of API calls that fetch a single entity, so that repeated
+  requests for the same entity don't each make a round trip to the server.
+  Entries expire a given number of seconds after they were stored. When the
+  cache is full, the least recently used entry is evicted.
+
+  Values are copied on the way in and on the way out, so that callers can't
+  modify the cached data.
+
+  Every invalidation moves the cache to a new generation. A caller that fills
+  the cache after a miss passes the generation it saw before fetching the
+  value, and the value is dropped if an invalidation came in meanwhile, since
+  it may have been fetched before the change that caused it.
+  """
+
+  # Positions of the fields of a node in the recency list.
+  __PREV = 0
+  __NEXT = 1
+  __KEY = 2
+  __VALUE = 3
+  __EXPIRES = 4
+
+  def __init__(self, max_size=1000, ttl=300):
+    """Inits EntityCache.
+
+    Args:
+      [optional]
+      max_size: int Maximum number of entries to keep.
+      ttl: int Number of seconds an entry is valid for.
+    """
+    if max_size < 1: max_size = 1
+    self.__max_size = max_size
+    self.__ttl = ttl
+    self.__lock = threading.Lock()
+    self.__entries = {}
+    # Circular doubly linked list of nodes, from the least to the most
+    # recently used one, with the root node as a sentinel.
+    self.__root = []
+    self.__root[:] = [self.__root, self.__root, None, None, None]
+    self.__hits = 0
+    self.__misses = 0
+    self.__evictions = 0
+    self.__generation = 0
+
+  def __Unlink(self, node):
+    """Remove a node from the recency list.
+
+    Args:
+      node: list Node to remove.
+    """
+    node[self.__PREV][self.__NEXT] = node[self.__NEXT]
+    node[self.__NEXT][self.__PREV] = node[self.__PREV]
+
+  def __Append(self, node):
+    """Add a node as the most recently used one.
+
+    Args:
+      node: list Node to add.
+    """
+    last = self.__root[self.__PREV]
+    node[self.__PREV] = last
+    node[self.__NEXT] = self.__root
+    last[self.__NEXT] = node
+    self.__root[self.__PREV] = node
+
+  def __Remove(self, node):
+    """Remove an entry from the cache.
+
+    Args:
+      node: list Node of the entry.
+    """
+    self.__Unlink(node)
+    del self.__entries[node[self.__KEY]]
+
+  def Get(self, key):
+    """Return value cached for a given key.
+
+    Args:
+      key: tuple Key of the entry.
+
+    Returns:
+      obj Copy of the cached value, None if there is no valid entry.
+    """
+    self.__lock.acquire()
+    try:
+      node = self.__entries.get(key)
+      if node is not None and node[self.__EXPIRES] <= time.time():
+        self.__Remove(node)
+        node = None
+      if node is None:
+        self.__misses += 1
+        return None
+      self.__hits += 1
+      self.__Unlink(node)
+      self.__Append(node)
+      value = node[self.__VALUE]
+    finally:
+      self.__lock.release()
+    return copy.deepcopy(value)
+
+  def GetGeneration(self):
+    """Return current generation of the cache.
+
+    Returns:
+      int Generation, which changes with every invalidation.
+    """
+    return self.__generation
+
+  def Set(self, key, value, generation=None):
+    """Cache value for a given key.
+
+    Args:
+      key: tuple Key of the entry.
+      value: obj Value to cache.
+      [optional]
+      generation: int Generation of the cache, as returned by GetGeneration()
+                  before the value was fetched. If the cache was invalidated
+                  since, the value is not cached.
+    """
+    value = copy.deepcopy(value)
+    self.__lock.acquire()
+    try:
+      if generation is not None and generation != self.__generation: return
+      node = self.__entries.get(key)
+      if node is not None:
+        self.__Remove(node)
+      elif len(self.__entries) >= self.__max_size:
+        self.__Remove(self.__root[self.__NEXT])
+        self.__evictions += 1
+      node = [None, None, key, value, time.time() + self.__ttl]
+      self.__Append(node)
+      self.__entries[key] = node
+    finally:
+      self.__lock.release()
+
+  def Invalidate(self, key):
+    """Drop entry for a given key, if any.
+
+    Args:
+      key: tuple Key of the entry.
+    """
+    self.__lock.acquire()
+    try:
+      self.__generation += 1
+      node = self.__entries.get(key)
+      if node is not None: self.__Remove(node)
+    finally:
+      self.__lock.release()
+
+  def InvalidateMatching(self, matches):
+    """Drop all entries whose keys match a given function.
+
+    Args:
+      matches: function Function that accepts a key and returns True if its
+               entry should be dropped.
+    """
+    self.__lock.acquire()
+    try:
+      self.__generation += 1
+      for key in self.__entries.keys():
+        if matches(key): self.__Remove(self.__entries[key])
+    finally:
+      self.__lock.release()
+
+  def GetStats(self):
+    """Return counters of the cache.
+
+    Returns:
+      dict Counters, number of lookups that found a valid entry ('hits') and
+           that did not ('misses'), number of entries evicted to make room
+           ('evictions'), and number of entries in the cache ('size').
+    """
+    self.__lock.acquire()
+    try:
+      return {
+          'hits': self.__hits,
+          'misses': self.__misses,
+          'evictions': self.__evictions,
+          'size': len(self.__entries)
+      }
+    finally:
+      self.__lock.release()
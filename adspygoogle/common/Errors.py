@@ -140,3 +140,15 @@ class AuthTokenError(Error):
   """
 
   pass
+
+
+class TransportError(Error):
+
+  """Implements TransportError.
+
+  Responsible for handling errors in getting a request to the server and its
+  response back (e.g., dropped connection, 502 page from a proxy), as opposed
+  to errors reported by the API itself.
+  """
+
+  pass
@@ -21,6 +21,7 @@ __author__ = 'api.arogal@gmail.com (Adam Rogal)'
 import logging
 import os
 import sys
+import threading
 
 
 class Logger(object):
@@ -62,6 +63,7 @@ class Logger(object):
     self.__lib_sig = lib_sig
     self.__log_path = log_path
     self.__log_table = {}
+    self.__lock = threading.Lock()
 
   def __CreateLog(self, log_name, log_level=NOTSET, log_handler=FILE,
                   stream=sys.stderr):
@@ -139,9 +141,16 @@ class Logger(object):
     """
     logger = logging.getLogger(log_name)
 
-    # Instantiate handlers for logger with default values if none exists.
+    # Instantiate handlers for logger with default values if none exists. The
+    # check is guarded, so that concurrent callers don't add same handlers
+    # twice.
     if not logger.handlers:
-      self.__CreateLog(log_name, log_level, log_handler)
+      self.__lock.acquire()
+      try:
+        if not logger.handlers:
+          self.__CreateLog(log_name, log_level, log_handler)
+      finally:
+        self.__lock.release()
 
     if log_level == Logger.NOTSET:
       logger.log(logger.getEffectiveLevel(), message)
@@ -0,0 +1,103 @@
+#!/usr/bin/python
+#
+# Copyright 2011 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Token bucket for limiting the rate of API requests."""
+
+__author__ = 'api.sgrinberg@gmail.com (Stan Grinberg)'
+
+import threading
+import time
+
+
+class RateLimiter(object):
+
+  """Implements RateLimiter.
+
+  Hands out tokens at a steady rate, with up to a burst of them available at
+  once. Each API request takes a token before it is sent, waiting for one if
+  the bucket is empty, so that requests stay under the quota instead of being
+  rejected by the server. A single limiter is safe to share between threads.
+  """
+
+  def __init__(self, rate, burst=None):
+    """Inits RateLimiter.
+
+    Args:
+      rate: float Number of tokens added per second.
+      [optional]
+      burst: int Maximum number of tokens in the bucket. Defaults to one
+             second worth of tokens, but at least one.
+    """
+    if burst is None or burst < 1: burst = max(1, rate)
+    self.__rate = float(rate)
+    self.__burst = float(burst)
+    self.__tokens = self.__burst
+    self.__stamp = time.time()
+    self.__lock = threading.Lock()
+    self.__calls = 0
+    self.__delayed_calls = 0
+    self.__wait_time = 0.0
+    self.__max_wait_time = 0.0
+
+  def Acquire(self):
+    """Take a token, waiting until one is available.
+
+    A token is reserved right away, even if the bucket is empty, and the caller
+    then sleeps until the time the token would have been added. Waiting callers
+    are thus served in the order they arrived, and the lock is never held while
+    sleeping.
+
+    Returns:
+      float Number of seconds the caller waited.
+    """
+    self.__lock.acquire()
+    try:
+      now = time.time()
+      self.__tokens = min(self.__burst,
+                          self.__tokens + (now - self.__stamp) * self.__rate)
+      self.__stamp = now
+      self.__tokens -= 1
+      wait = 0.0
+      if self.__tokens < 0:
+        wait = -self.__tokens / self.__rate
+        self.__delayed_calls += 1
+        self.__wait_time += wait
+        self.__max_wait_time = max(self.__max_wait_time, wait)
+      self.__calls += 1
+    finally:
+      self.__lock.release()
+
+    if wait > 0: time.sleep(wait)
+    return wait
+
+  def GetStats(self):
+    """Return counters of the limiter.
+
+    Returns:
+      dict Counters, number of calls that took a token ('calls'), number of
+           those that had to wait ('delayed_calls'), total and longest number
+           of seconds waited ('wait_time', 'max_wait_time').
+    """
+    self.__lock.acquire()
+    try:
+      return {
+          'calls': self.__calls,
+          'delayed_calls': self.__delayed_calls,
+          'wait_time': self.__wait_time,
+          'max_wait_time': self.__max_wait_time
+      }
+    finally:
+      self.__lock.release()
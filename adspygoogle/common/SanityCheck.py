@@ -148,3 +148,77 @@ def ValidateOneLevelList(lst):
   ValidateTypes(((lst, list),))
   for item in lst:
     if item != 'None': ValidateTypes(((item, (str, unicode)),))
+
+
+def __RaiseTypeError(var, var_types):
+  """Raise error for a variable of the wrong type.
+
+  Args:
+    var: obj Variable that failed the check.
+    var_types: tuple Types the variable was expected to be of.
+  """
+  msg = ('The \'%s\' is of type %s, expecting one of %s.'
+         % (var, type(var), var_types))
+  raise ValidationError(msg)
+
+
+def CompileObjectValidator(fields=None, skip_none=True, check_others=True):
+  """Compile validator for an object (dict) with given complex fields.
+
+  The returned validator performs the same checks and raises the same errors
+  as a hand-written loop over the object's keys with ValidateTypes() calls,
+  but is set up only once and does no per-field tuple building.
+
+  Args:
+    [optional]
+    fields: dict Validators for fields that are not strings, keyed by field
+            name. Each one is called with the field's value, followed by any
+            extra arguments the object's validator was called with.
+    skip_none: bool Whether to skip fields set to 'None'.
+    check_others: bool Whether fields not in fields have to be strings.
+
+  Returns:
+    function Validator, accepting the object to validate and optional extra
+             arguments to pass on to validators of the fields.
+  """
+  if fields is None: fields = {}
+  dict_types = (dict,)
+  str_types = (str, unicode)
+
+  def Validate(obj, *args):
+    if not isinstance(obj, dict_types): __RaiseTypeError(obj, dict_types)
+    for key in obj:
+      value = obj[key]
+      if skip_none and value == 'None': continue
+      validator = fields.get(key)
+      if validator is not None:
+        validator(value, *args)
+      elif check_others and not isinstance(value, str_types):
+        __RaiseTypeError(value, str_types)
+  return Validate
+
+
+def CompileListValidator(item_validator=None):
+  """Compile validator for a list with items of a given kind.
+
+  Args:
+    [optional]
+    item_validator: function Validator for each item. If not set, items have
+                    to be strings.
+
+  Returns:
+    function Validator, accepting the list to validate and optional extra
+             arguments to pass on to the validator of the items.
+  """
+  list_types = (list,)
+  str_types = (str, unicode)
+
+  def Validate(lst, *args):
+    if not isinstance(lst, list_types): __RaiseTypeError(lst, list_types)
+    if item_validator is None:
+      for item in lst:
+        if not isinstance(item, str_types): __RaiseTypeError(item, str_types)
+    else:
+      for item in lst:
+        item_validator(item, *args)
+  return Validate
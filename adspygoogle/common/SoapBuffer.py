@@ -129,6 +129,12 @@ class SoapBuffer(Buffer):
 
     self._buffer = ''
     self.__dump = {}
+    # Whether buffer has been parsed into dump dict since it was last written
+    # to. Parsed XML objects are cached as well, so that each message is parsed
+    # at most once, no matter how many values are looked up.
+    self.__is_parsed = False
+    self.__xml_in = None
+    self.__xml_out = None
     self.__xml_parser = xml_parser
     # Pick a default XML parser, if none was set.
     if not self.__xml_parser:
@@ -159,6 +165,7 @@ class SoapBuffer(Buffer):
       str_in: str String to append to a buffer.
     """
     super(SoapBuffer, self).write(str_in)
+    self.__Invalidate()
 
   def flush(self):
     super(SoapBuffer, self).flush()
@@ -171,6 +178,13 @@ class SoapBuffer(Buffer):
     """
     return super(SoapBuffer, self).GetBufferAsStr()
 
+  def __Invalidate(self):
+    """Drop parsed data, so that it is rebuilt from the buffer on next use."""
+    self.__dump = {}
+    self.__is_parsed = False
+    self.__xml_in = None
+    self.__xml_out = None
+
   def IsHandshakeComplete(self):
     """Return state of the handshake.
 
@@ -263,8 +277,62 @@ class SoapBuffer(Buffer):
                                        self.__PrettyPrintXml('\n'.join(doc), 1))
             self.__dump[tag] = (xml_part + '\n' + '*' * 72)
             break
+    self.__is_parsed = True
     return self.__dump
 
+  def __FormatXml(self, data):
+    """Prepare XML message for a dump.
+
+    Args:
+      data: str XML message.
+
+    Returns:
+      str XML message with XML declaration, prettified if requested.
+    """
+    if not data.startswith('<?xml'):
+      data = '<?xml version="1.0" encoding="UTF-8"?>\n%s' % data.lstrip('\n')
+    if self.__pretty_xml:
+      data = self.__PrettyPrintXml(data, 1)
+    return data
+
+  def SetCallRecord(self, record):
+    """Load HTTP headers and SOAP data from a given call record.
+
+    Replaces the content of the buffer. Unlike data written into the buffer,
+    the record doesn't have to be parsed.
+
+    Args:
+      record: CallRecord Record of the API request and its response.
+    """
+    dump = {}
+    if record.method is not None:
+      headers = (['%s %s' % (record.method, record.url)] + record.headers_out +
+                 ['XML-parser: %s' % self.__xml_parser_sig])
+      dump['dumpHeadersOut'] = ('%s Outgoing HTTP headers %s\n%s\n%s'
+                                % ('*' * 3, '*' * 46, '\n'.join(headers),
+                                   '*' * 72))
+    if record.body_out:
+      dump['dumpSoapOut'] = ('%s Outgoing SOAP %s\n%s\n%s'
+                             % ('*' * 3, '*' * 54,
+                                self.__FormatXml(record.body_out), '*' * 72))
+    if record.status is not None:
+      headers = ['%s %s' % (record.status, record.reason)] + record.headers_in
+      dump['dumpHeadersIn'] = ('%s Incoming HTTP headers %s\n%s\n%s'
+                               % ('*' * 3, '*' * 46, '\n'.join(headers),
+                                  '*' * 72))
+      dump['dumpSoapIn'] = ('%s Incoming SOAP %s\n%s\n%s'
+                            % ('*' * 3, '*' * 54,
+                               self.__FormatXml(record.body_in), '*' * 72))
+
+    self.__Invalidate()
+    self._buffer = '\n'.join([dump[tag] for tag in ('dumpHeadersOut',
+                                                     'dumpSoapOut',
+                                                     'dumpHeadersIn',
+                                                     'dumpSoapIn')
+                              if tag in dump])
+    self.__dump = dump
+    self.__is_parsed = True
+
   def __GetDumpValue(self, dump_type):
     """Return dump value given its type.
 
@@ -274,15 +342,9 @@ class SoapBuffer(Buffer):
     Returns:
       str Value of the dump.
     """
-    dump_value = None
-    try:
-      if dump_type in self.__dump:
-        dump_value = self.__dump[dump_type]
-      else:
-        dump_value = self.__GetBufferAsDict()[dump_type]
-    except KeyError:
-      dump_value = ''
-    return dump_value
+    if dump_type not in self.__dump and not self.__is_parsed:
+      self.__GetBufferAsDict()
+    return self.__dump.get(dump_type, '')
 
   def GetHeadersOut(self):
     """Return outgoing headers dump.
@@ -335,9 +397,14 @@ class SoapBuffer(Buffer):
   def _GetXmlOut(self):
     """Remove banners from outgoing SOAP XML and contstruct XML object.
 
+    The XML object is cached, thus should not be modified by the caller.
+
     Returns:
       Document/Element object generated from string, representing XML message.
     """
+    if self.__xml_out is not None:
+      return self.__xml_out
+
     # Remove banners.
     xml_dump = self.GetSoapOut().lstrip('\n').rstrip('\n')
     xml_parts = xml_dump.split('\n')
@@ -365,14 +432,20 @@ class SoapBuffer(Buffer):
     except (ExpatError, SyntaxError), e:
       msg = 'Unable to parse SOAP buffer for outgoing messages. %s' % e
       raise MalformedBufferError(msg)
+    self.__xml_out = xml_obj
     return xml_obj
 
   def _GetXmlIn(self):
     """Remove banners from incoming SOAP XML and construct XML object.
 
+    The XML object is cached, thus should not be modified by the caller.
+
     Returns:
       Document/Element object generated from string, representing XML message.
     """
+    if self.__xml_in is not None:
+      return self.__xml_in
+
     # Remove banners.
     xml_dump = self.GetSoapIn().lstrip('\n').rstrip('\n')
     xml_parts = xml_dump.split('\n')
@@ -386,6 +459,7 @@ class SoapBuffer(Buffer):
     except (ExpatError, SyntaxError), e:
       msg = 'Unable to parse SOAP buffer for incoming messages. %s' % e
       raise MalformedBufferError(msg)
+    self.__xml_in = xml_obj
     return xml_obj
 
   def __RemoveElemAttr(self, elem):
@@ -623,6 +697,7 @@ class SoapBuffer(Buffer):
             '%s Outgoing SOAP %s\n'
             '<?xml version="1.0" encoding="UTF-8"?>\n%s\n'
             '%s' % ('*' * 3, '*' * 54, req, '*' * 72))
+        self.__xml_out = None
 
       # Do we have a SOAP XML response?
       if res:
@@ -632,6 +707,7 @@ class SoapBuffer(Buffer):
             '%s Incoming SOAP %s\n'
             '<?xml version="1.0" encoding="UTF-8"?>\n%s\n'
             '%s' % ('*' * 3, '*' * 54, res.lstrip('\n'), '*' * 72))
+        self.__xml_in = None
     except Exception:
       msg = 'Invalid input, expecting SOAP XML request, response, or both.'
       raise InvalidInputError(msg)
@@ -0,0 +1,93 @@
+#!/usr/bin/python
+#
+# Copyright 2011 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Handler class for dispatching sys.stdout into per thread buffers."""
+
+__author__ = 'api.sgrinberg@gmail.com (Stan Grinberg)'
+
+import threading
+
+
+class StdoutDispatcher(object):
+
+  """Implements StdoutDispatcher.
+
+  Stands in for sys.stdout. Data written by a thread that has a buffer
+  attached is appended to that buffer, everything else goes to the original
+  stream. This allows SOAP toolkits, which dump their traffic via print, to be
+  used from several threads at once, without one thread capturing another
+  thread's SOAP messages.
+  """
+
+  def __init__(self, stream):
+    """Inits StdoutDispatcher.
+
+    Args:
+      stream: file Original stream to write to when no buffer is attached.
+    """
+    self.__stream = stream
+    self.__local = threading.local()
+
+  def GetStream(self):
+    """Return original stream.
+
+    Returns:
+      file Original stream.
+    """
+    return self.__stream
+
+  def Attach(self, buf):
+    """Attach a buffer to the current thread.
+
+    Args:
+      buf: Buffer Buffer to write current thread's data into.
+    """
+    self.__local.buf = buf
+
+  def Detach(self):
+    """Detach buffer from the current thread."""
+    self.__local.buf = None
+
+  def write(self, str_in):
+    """Write given string into current thread's buffer or original stream.
+
+    Args:
+      str_in: str String to write.
+    """
+    buf = getattr(self.__local, 'buf', None)
+    if buf is None:
+      self.__stream.write(str_in)
+    else:
+      buf.write(str_in)
+
+  def flush(self):
+    """Flush current thread's buffer or original stream."""
+    buf = getattr(self.__local, 'buf', None)
+    if buf is None:
+      self.__stream.flush()
+    else:
+      buf.flush()
+
+  def __getattr__(self, name):
+    """Delegate everything else to the original stream.
+
+    Args:
+      name: str Name of the attribute to look up.
+
+    Returns:
+      object Attribute of the original stream.
+    """
+    return getattr(self.__stream, name)
@@ -0,0 +1,92 @@
+#!/usr/bin/python
+#
+# Copyright 2011 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Bounded pool of worker threads."""
+
+__author__ = 'api.sgrinberg@gmail.com (Stan Grinberg)'
+
+import Queue
+import threading
+
+from adspygoogle.common import DEFAULT_MAX_WORKERS
+
+
+class ThreadPool(object):
+
+  """Implements ThreadPool.
+
+  Runs a function over a list of items on a bounded number of worker threads.
+  Since API calls spend most of their time waiting on the network, running
+  several of them at once cuts down the total wall-clock time of a job.
+  """
+
+  def __init__(self, max_workers=DEFAULT_MAX_WORKERS):
+    """Inits ThreadPool.
+
+    Args:
+      [optional]
+      max_workers: int Maximum number of worker threads to run at once.
+    """
+    if max_workers < 1: max_workers = 1
+    self.__max_workers = max_workers
+
+  def __Work(self, func, queue, results):
+    """Process items from the queue until it is empty.
+
+    Args:
+      func: function Function to call for each item.
+      queue: Queue.Queue Queue of (index, item) tuples.
+      results: list List to store results in.
+    """
+    while True:
+      try:
+        index, item = queue.get_nowait()
+      except Queue.Empty:
+        return
+      try:
+        results[index] = func(item)
+      except Exception, e:
+        results[index] = e
+
+  def Map(self, func, items):
+    """Call a given function for each item, using worker threads.
+
+    Args:
+      func: function Function that accepts a single item.
+      items: list Items to process.
+
+    Returns:
+      list Results in the same order as the items. If a call raised an
+           exception, the exception instance is stored in place of its result.
+    """
+    results = [None] * len(items)
+    if not items: return results
+
+    queue = Queue.Queue()
+    for index in xrange(len(items)):
+      queue.put((index, items[index]))
+
+    # No need to start more threads than there are items.
+    workers = []
+    for index in xrange(min(self.__max_workers, len(items))):
+      worker = threading.Thread(target=self.__Work,
+                                args=(func, queue, results))
+      worker.setDaemon(True)
+      workers.append(worker)
+      worker.start()
+    for worker in workers:
+      worker.join()
+    return results
@@ -22,8 +22,10 @@ import codecs
 import csv
 import datetime
 import htmlentitydefs
+import random
 import re
 import sys
+import threading
 import traceback
 import urllib
 from urlparse import urlparse
@@ -31,8 +33,15 @@ from urlparse import urlunparse
 
 from adspygoogle.common import SanityCheck
 from adspygoogle.common.AuthToken import AuthToken
+from adspygoogle.common.AuthTokenCache import AuthTokenCache
 from adspygoogle.common.Buffer import Buffer
 from adspygoogle.common.Errors import Error
+from adspygoogle.common.StdoutDispatcher import StdoutDispatcher
+
+
+__STDOUT_LOCK = threading.Lock()
+__AUTH_TOKEN_CACHES = {}
+__AUTH_TOKEN_CACHES_LOCK = threading.Lock()
 
 
 def ReadFile(f_path):
@@ -317,6 +326,38 @@ def GetAuthToken(email, password, service, lib_sig, proxy):
   return AuthToken(email, password, service, lib_sig, proxy).GetAuthToken()
 
 
+def GetCachedAuthToken(email, password, service, lib_sig, proxy, path,
+                       expire):
+  """Return an authentication token for Google Account, shared via a file.
+
+  Token is fetched only if no other process on the host has fetched it yet.
+  A token requested close to expiring is refreshed in background, see
+  AuthTokenCache. If an error occurs, AuthTokenError is raised.
+
+  Args:
+    email: str Google Account's login email.
+    password: str Google Account's password.
+    service: str Name of the Google service for which to authorize access.
+    lib_sig: str Signature of the client library.
+    proxy: str HTTP proxy to use.
+    path: str Absolute path to the pickle with cached tokens.
+    expire: int Number of seconds a token is valid for.
+
+  Returns:
+    tuple Authentication token for Google Account and the time it was fetched
+          at, (token, epoch).
+  """
+  cache = __AUTH_TOKEN_CACHES.get(path)
+  if cache is None:
+    __AUTH_TOKEN_CACHES_LOCK.acquire()
+    try:
+      cache = __AUTH_TOKEN_CACHES.setdefault(path,
+                                             AuthTokenCache(path, expire))
+    finally:
+      __AUTH_TOKEN_CACHES_LOCK.release()
+  return cache.GetAuthToken(email, password, service, lib_sig, proxy)
+
+
 def GetCurrentFuncName():
   """Return current function/method name.
 
@@ -392,22 +433,49 @@ def LastStackTrace():
   Returns:
     str Last stack traceback.
   """
-  # Temporarily redirect traceback from STDOUT into a buffer.
+  # Write traceback into a local buffer rather than through sys.stdout, which
+  # may be shared with other threads.
   trace_buf = Buffer()
-  old_stdout = sys.stdout
-  sys.stdout = trace_buf
-
   try:
-    traceback.print_exc(file=sys.stdout)
+    traceback.print_exc(file=trace_buf)
   except AttributeError:
     # No exception for traceback exist.
-    print ''
-
-  # Restore STDOUT.
-  sys.stdout = old_stdout
+    pass
   return trace_buf.GetBufferAsStr().strip()
 
 
+def CaptureStdout(buf):
+  """Redirect data written to sys.stdout by the current thread into a buffer.
+
+  Other threads keep writing into the original sys.stdout, unless they capture
+  it as well. Capture is released via ReleaseStdout().
+
+  Args:
+    buf: Buffer Buffer to write current thread's data into.
+
+  Returns:
+    StdoutDispatcher Dispatcher that the buffer was attached to.
+  """
+  __STDOUT_LOCK.acquire()
+  try:
+    if not isinstance(sys.stdout, StdoutDispatcher):
+      sys.stdout = StdoutDispatcher(sys.stdout)
+    dispatcher = sys.stdout
+  finally:
+    __STDOUT_LOCK.release()
+  dispatcher.Attach(buf)
+  return dispatcher
+
+
+def ReleaseStdout(dispatcher):
+  """Stop redirecting data written to sys.stdout by the current thread.
+
+  Args:
+    dispatcher: StdoutDispatcher Dispatcher returned by CaptureStdout().
+  """
+  dispatcher.Detach()
+
+
 def HtmlUnescape(text):
   """Removes HTML or XML character references and entities from a text string.
 
@@ -520,3 +588,25 @@ def GetDictFromMap(entries):
   for entry in entries:
     dct[entry['key']] = entry['value']
   return dct
+
+
+def GetBackoffDelay(attempt, initial_delay, max_delay, factor=2, jitter=0.5):
+  """Return number of seconds to wait before the next attempt.
+
+  The delay grows exponentially with each attempt, up to a maximum. A random
+  part of the delay is shaved off, so that many clients waiting on the same
+  thing don't all wake up at once.
+
+  Args:
+    attempt: int Number of attempts made so far, starting at 0.
+    initial_delay: float Delay before the first retry.
+    max_delay: float Upper bound for the delay.
+    [optional]
+    factor: float Factor by which the delay grows with each attempt.
+    jitter: float Fraction of the delay that is randomized, between 0 and 1.
+
+  Returns:
+    float Number of seconds to wait.
+  """
+  delay = min(max_delay, initial_delay * factor ** min(attempt, 64))
+  return delay * (1 - jitter * random.random())
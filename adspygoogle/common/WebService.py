@@ -19,15 +19,17 @@
 __author__ = 'api.sgrinberg@gmail.com (Stan Grinberg)'
 
 import httplib
-import sys
+import socket
 import time
 
 from adspygoogle.common import SOAPPY
 from adspygoogle.common import ZSI
 from adspygoogle.common import Utils
+from adspygoogle.common.CallRecord import CallRecord
 from adspygoogle.common.Logger import Logger
 from adspygoogle.common.Errors import AuthTokenError
 from adspygoogle.common.Errors import Error
+from adspygoogle.common.Errors import TransportError
 from adspygoogle.common.Errors import ValidationError
 
 
@@ -50,7 +52,7 @@ class WebService(object):
       op_config: dict Dictionary object with additional configuration values
                  for this operation.
       url: str URL of the web service to call.
-      lock: thread.lock Thread lock.
+      lock: thread.lock Thread lock guarding shared authentication state.
       logger: Logger Instance of Logger.
     """
     self._lib_sig = lib_sig
@@ -100,32 +102,34 @@ class WebService(object):
     #   target: Target/destination represented by this handler (i.e. FILE,
     #           CONSOLE, etc.). Initially, it should be set to Logger.NONE.
     #   name: Name of the log file to use.
-    #   data: Data to write.
+    #   data: Data to write, or a function that returns it. The data is only
+    #         built for handlers that will write it.
     for handler in log_handlers:
+      handler['target'] = Logger.NONE
+      if (handler['tag'] and
+          Utils.BoolTypeConvert(self._config[handler['tag']])):
+        handler['target'] = Logger.FILE
+      # If debugging is On, raise handler's target two levels,
+      #   NONE -> CONSOLE
+      #   FILE -> FILE_AND_CONSOLE.
+      if Utils.BoolTypeConvert(self._config['debug']):
+        handler['target'] += 2
+      if handler['target'] == Logger.NONE: continue
+
+      if callable(handler['data']):
+        handler['data'] = handler['data']()
       if handler['tag'] == 'xml_log':
-        handler['target'] = Logger.NONE
         handler['data'] += str(
             'StartTime: %s\n%s\n%s\n%s\n%s\nEndTime: %s'
             % (start_time, buf.GetHeadersOut(), buf.GetSoapOut(),
                buf.GetHeadersIn(), buf.GetSoapIn(), stop_time))
       elif handler['tag'] == 'request_log':
-        handler['target'] = Logger.NONE
         handler['data'] += ' isFault=%s' % is_fault
       elif handler['tag'] == '':
-        handler['target'] = Logger.NONE
         handler['data'] += 'DEBUG: %s' % error_msg
-    for handler in log_handlers:
-      if (handler['tag'] and
-          Utils.BoolTypeConvert(self._config[handler['tag']])):
-        handler['target'] = Logger.FILE
-      # If debugging is On, raise handler's target two levels,
-      #   NONE -> CONSOLE
-      #   FILE -> FILE_AND_CONSOLE.
-      if Utils.BoolTypeConvert(self._config['debug']):
-        handler['target'] += 2
 
-      if (handler['target'] != Logger.NONE and handler['data'] and
-          handler['data'] != 'None' and handler['data'] != 'DEBUG: '):
+      if (handler['data'] and handler['data'] != 'None' and
+          handler['data'] != 'DEBUG: '):
         self._logger.Log(handler['name'], handler['data'],
                          log_level=Logger.DEBUG, log_handler=handler['target'])
 
@@ -146,8 +150,6 @@ class WebService(object):
         else:
           msg = ('Unable to parse incoming SOAP XML. Please, file '
                  'a bug at %s/issues/list.' % lib_url)
-      # Release thread lock.
-      if self._lock.locked(): self._lock.release()
       if not fault and msg: return msg
       return fault
     return None
@@ -175,10 +177,17 @@ class WebService(object):
       tuple/str Response from the API method. If 'raw_response' flag enabled a
                 string is returned, tuple otherwise.
     """
-    # Temporarily redirect HTTP headers and SOAP from STDOUT into a buffer.
+    # ZSI's connection handler records HTTP headers and SOAP directly. SOAPpy
+    # dumps them to STDOUT, which is temporarily redirected into a buffer. Only
+    # data written by the current thread is redirected, so that concurrent
+    # calls from other threads each capture their own SOAP messages.
+    record = None
+    dispatcher = None
     if not Utils.BoolTypeConvert(self._config['raw_debug']):
-      old_stdout = sys.stdout
-      sys.stdout = buf
+      if config['soap_lib'] == ZSI:
+        record = CallRecord()
+      else:
+        dispatcher = Utils.CaptureStdout(buf)
 
     response = ()
     error = {}
@@ -201,11 +210,16 @@ class WebService(object):
       elif config['soap_lib'] == ZSI:
         from adspygoogle.common.zsi import MessageHandler
         service = MessageHandler.GetServiceConnection(
-            headers, config, self._op_config, self._url, service_name, loc)
+            headers, config, self._op_config, self._url, service_name, loc,
+            record)
         request = MessageHandler.SetRequestParams(request, params, is_jaxb_api)
 
-        response = MessageHandler.UnpackResponseAsTuple(
-            eval('service.%s(request)' % method_name))
+        if Utils.BoolTypeConvert(config['fast_decoder']):
+          response = MessageHandler.CallAndDecodeResponse(
+              service, method_name, request)
+        else:
+          response = MessageHandler.UnpackResponseAsTuple(
+              eval('service.%s(request)' % method_name))
 
         # The response should always be tuple. If it's not, there must be
         # something wrong with MessageHandler.UnpackResponseAsTuple().
@@ -225,8 +239,10 @@ class WebService(object):
       error['data'] = e
 
     # Restore STDOUT.
-    if not Utils.BoolTypeConvert(self._config['raw_debug']):
-      sys.stdout = old_stdout
+    if dispatcher is not None:
+      Utils.ReleaseStdout(dispatcher)
+    if record is not None:
+      buf.SetCallRecord(record)
 
     # When debugging mode is ON, fetch last traceback.
     if Utils.BoolTypeConvert(self._config['debug']):
@@ -259,6 +275,14 @@ class WebService(object):
         raise ValidationError(error['data'])
       if 'raw_data' in error:
         msg = '%s [RAW DATA: %s]' % (msg, error['raw_data'])
+      # Tell apart errors of the connection and of servers in the way, which
+      # are worth retrying, from local ones.
+      if (html_error or
+          isinstance(error['data'], (socket.error, httplib.HTTPException,
+                                     IOError)) or
+          (record is not None and record.status is not None and
+           record.status >= 500)):
+        return TransportError(msg)
       return Error(msg)
 
     if Utils.BoolTypeConvert(self._config['raw_response']):
@@ -34,3 +34,6 @@ ETREE = '2'
 
 # Maximum number of supported target namespaces in a single service.
 MAX_TARGET_NAMESPACE = 3
+
+# Default number of worker threads to use for concurrent API requests.
+DEFAULT_MAX_WORKERS = 5
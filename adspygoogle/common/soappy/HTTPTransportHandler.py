@@ -57,7 +57,7 @@ class HTTPTransportHandler(Client.HTTPTransport):
       r = httplib.HTTP(real_addr)
 
     # Intercept outgoing XML message and inject data.
-    for old, new in HTTPTransportHandler.data_injects:
+    for old, new in self.data_injects:
       data = data.replace(old, new)
 
     r.putrequest('POST', real_path)
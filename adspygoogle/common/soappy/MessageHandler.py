@@ -18,7 +18,6 @@
 
 __author__ = 'api.sgrinberg@gmail.com (Stan Grinberg)'
 
-import re
 import types
 
 from adspygoogle.common import Utils
@@ -59,13 +58,15 @@ def GetServiceConnection(headers, config, url, http_proxy, is_jaxb_api):
   if is_jaxb_api or Utils.BoolTypeConvert(config['wsse']):
     headers = SOAPpy.Types.headerType({config['ns_target'][1]: full_headers})
     headers._setAttr('xmlns', config['ns_target'][0])
-    HTTPTransportHandler.data_injects = config['data_injects']
     service = SOAPpy.SOAPProxy(url, http_proxy=http_proxy, header=headers,
                                transport=HTTPTransportHandler)
+    # Set data injects on the transport instance, not the class, as they are
+    # specific to this API call.
+    service.transport.data_injects = config['data_injects']
   elif Utils.BoolTypeConvert(config['force_data_inject']):
-    HTTPTransportHandler.data_injects = config['data_injects']
     service = SOAPpy.SOAPProxy(url, http_proxy=http_proxy, header=headers,
                                transport=HTTPTransportHandler)
+    service.transport.data_injects = config['data_injects']
   else:
     headers = SOAPpy.Types.headerType(full_headers)
     service = SOAPpy.SOAPProxy(url, http_proxy=http_proxy, header=headers)
@@ -85,7 +86,112 @@ def GetServiceConnection(headers, config, url, http_proxy, is_jaxb_api):
   return service
 
 
-# TODO(api.sgrinberg): Document logic in this method.
+# Compiled object key order maps, keyed by id() of the original map. The
+# original map is kept alongside its compiled version, so that its id() can't be
+# reused by another object.
+__COMPILED_KEY_MAPS = {}
+
+
+def __CompileKeyMap(key_map):
+  """Compile object key order map into a form that is faster to look up.
+
+  Each entry of the map is turned into a tuple of its type, a dictionary that
+  maps each field to its position in the order, and whether the object has a
+  native type field.
+
+  Args:
+    key_map: dict Object key order map.
+
+  Returns:
+    dict Compiled object key order map.
+  """
+  compiled = {}
+  for key in key_map:
+    entries = []
+    for entry in key_map[key]:
+      ranks = {}
+      for index in xrange(len(entry['order'])):
+        ranks.setdefault(entry['order'][index], index)
+      entries.append((entry['type'], ranks, 'native_type' in entry))
+    compiled[key] = entries
+  return compiled
+
+
+def __GetCompiledKeyMap(key_map):
+  """Return compiled version of a given object key order map.
+
+  The map is compiled on first use and cached afterwards. Thus, it should not be
+  modified once it was used.
+
+  Args:
+    key_map: dict Object key order map.
+
+  Returns:
+    dict Compiled object key order map.
+  """
+  item = __COMPILED_KEY_MAPS.get(id(key_map))
+  if item is None or item[0] is not key_map:
+    item = (key_map, __CompileKeyMap(key_map))
+    __COMPILED_KEY_MAPS[id(key_map)] = item
+  return item[1]
+
+
+def __IsTypeKey(key):
+  """Return True if a given key holds the type of an object.
+
+  Args:
+    key: str Key to check.
+
+  Returns:
+    bool True if key holds the type of an object, False otherwise.
+  """
+  return (key == 'xsi_type' or key == 'type' or key.find('.Type') > -1 or
+          key.find('_Type') > -1)
+
+
+def __GetFieldOrder(obj, key, key_map, xsi_type, has_native_type):
+  """Return type and field order of a given Python dictionary.
+
+  Args:
+    obj: dict Python dictionary to look up.
+    key: str Key that maps to this Python dictionary.
+    key_map: dict Compiled object key order map.
+    xsi_type: str Type of the object, as found in the dictionary.
+    has_native_type: bool Whether object has a 'type' field of its own.
+
+  Returns:
+    tuple Type of the object to set on the element, and a dictionary that maps
+          each field to its position. The dictionary is empty, if the order of
+          fields is not known.
+  """
+  if key not in key_map: return ('', {})
+
+  tmp_xsi_type, ranks, tmp_entry = ('', {}, None)
+  entries = key_map[key]
+  if 'xsi_type' not in obj and 'type' not in obj:
+    if not has_native_type:
+      for entry_type, entry_ranks, native_type in entries:
+        if not entry_type:
+          tmp_xsi_type = ''
+          ranks = entry_ranks
+  else:
+    for entry in entries:
+      if entry[0] and xsi_type == entry[0]:
+        tmp_xsi_type, ranks = entry[:2]
+        break
+      elif not entry[0]:
+        tmp_entry = entry
+  if tmp_entry is not None:
+    if tmp_entry[0] is None:
+      tmp_xsi_type = xsi_type
+    else:
+      tmp_xsi_type = tmp_entry[0]
+    ranks = tmp_entry[1]
+  elif len(entries) == 1:
+    tmp_xsi_type, ranks = entries[0][:2]
+  return (tmp_xsi_type, ranks)
+
+
 def PackDictAsXml(obj, key='', key_map=[], order=[], wrap_list=False):
   """Pack a Python dictionary object into an XML string.
 
@@ -93,12 +199,16 @@ def PackDictAsXml(obj, key='', key_map=[], order=[], wrap_list=False):
   "dct" is key and "{'ids': ['12345', '67890']}" is obj, the output will be
   "<dct><ids>12345</ids><ids>67890</ids></dct>".
 
+  Fields of objects found in the key map are written in the order given by the
+  map. Fields that follow a field the map doesn't know about are left in
+  their original order.
+
   Args:
     obj: dict Python dictionary to pack.
     [optional]
     key: str Key that maps to this Python dictionary.
     key_map: dict Object key order map.
-    order: list Order of sub keys for this Python dictionary.
+    order: list Not used, kept for backwards compatibility.
     wrap_list: bool If True, wraps list into an extra layer (e.g.,
                "'ids': ['12345']"  becomes "<ids><ids>12345</ids></ids>"). If
                False, "'ids': ['12345']" becomes "<ids>12345</ids>".
@@ -106,99 +216,61 @@ def PackDictAsXml(obj, key='', key_map=[], order=[], wrap_list=False):
   Returns:
     str XML snippet.
   """
-  buf = xsi_type = ''
-  has_native_type = False
-  tmp_xsi_type, local_order, tmp_key_type_obj = ('', [], {})
+  return __PackAsXml(obj, key, __GetCompiledKeyMap(key_map), wrap_list)
+
+
+def __PackAsXml(obj, key, key_map, wrap_list):
+  """Pack (recursively) a Python object into an XML string.
+
+  Args:
+    obj: object Python object to pack.
+    key: str Key that maps to this Python object.
+    key_map: dict Compiled object key order map.
+    wrap_list: bool Whether to wrap lists into an extra layer.
+
+  Returns:
+    str XML snippet.
+  """
   if isinstance(obj, dict):
+    xsi_type = ''
+    has_native_type = False
     # Determine if the object is typed.
     for item in obj:
-      if (item == 'xsi_type' or item == 'type' or item.find('.Type') > -1 or
-          item.find('_Type') > -1):
+      if __IsTypeKey(item):
         xsi_type = obj[item]
         if key not in key_map: continue
-        for key_map_item in key_map[key]:
-          if key_map_item['type'] != xsi_type and 'native_type' in key_map_item:
-            xsi_type = key_map_item['type']
+        for entry_type, entry_ranks, native_type in key_map[key]:
+          if entry_type != xsi_type and native_type:
+            xsi_type = entry_type
             has_native_type = True
     if key == 'operations' and xsi_type.find('Operation') < 0: xsi_type = ''
-    # Step through each key/value pair in the dictionary and pack it.
+
+    sub_keys = []
     for sub_key in obj:
-      if (not has_native_type and
-          (sub_key == 'xsi_type' or sub_key == 'type' or
-           sub_key.find('.Type') > -1 or sub_key.find('_Type') > -1) and
+      if (not has_native_type and __IsTypeKey(sub_key) and
           not (sub_key == 'type' and 'xsi_type' in obj)):
         continue
-      tmp_xsi_type, local_order, tmp_key_type_obj = ('', [], {})
-      if key in key_map:
-        if 'xsi_type' not in obj and 'type' not in obj:
-          if not has_native_type:
-            for key_type_obj in key_map[key]:
-              if not key_type_obj['type']:
-                tmp_xsi_type = ''
-                local_order = key_type_obj['order']
-        else:
-          for key_type_obj in key_map[key]:
-            if key_type_obj['type'] and xsi_type == key_type_obj['type']:
-              tmp_xsi_type = key_type_obj['type']
-              local_order = key_type_obj['order']
-              break
-            elif not key_type_obj['type']:
-              tmp_key_type_obj = key_type_obj
-        if tmp_key_type_obj:
-          if tmp_key_type_obj['type'] is None:
-            tmp_xsi_type = xsi_type
-          else:
-            tmp_xsi_type = tmp_key_type_obj['type']
-          local_order = tmp_key_type_obj['order']
-        else:
-          if len(key_map[key]) == 1:
-            tmp_xsi_type = key_map[key][0]['type']
-            local_order = key_map[key][0]['order']
+      sub_keys.append(sub_key)
+
+    tmp_xsi_type, ranks = ('', {})
+    if sub_keys:
+      tmp_xsi_type, ranks = __GetFieldOrder(obj, key, key_map, xsi_type,
+                                            has_native_type)
+
+    # Pack each field. Fields are put in order, up to the first field that is
+    # not part of the order.
+    ordered = []
+    unordered = []
+    for sub_key in sub_keys:
+      data = __PackAsXml(obj[sub_key], sub_key, key_map, wrap_list)
+      if not data: continue
+      if not unordered and sub_key in ranks:
+        ordered.append((ranks[sub_key], len(ordered), data))
       else:
-        local_order = ()
-      buf += PackDictAsXml(obj[sub_key], sub_key, key_map, local_order,
-                           wrap_list)
-      if local_order and buf:
-        pre_tags = re.split('(<.*?>)', buf)[1:-1]
-        if not pre_tags: return '<%s/>' % key
-        tag_name = pre_tags[0][1:-1]
-        post_tags = []
-        tag_buf = ''
-        counter = 0
-        for pre_tag in pre_tags:
-          if not pre_tag: continue
-          tag = ''
-          if pre_tag[0] == '<' and pre_tag[-1] == '>':
-            tag = re.findall('<(?:/|)(\w+).*(?:/|)>', pre_tag)
-            if tag: tag = tag[0]
-          if counter == 0: tag_name = tag
-          tag_buf += pre_tag
-          if tag and tag_name == tag:
-            counter += 1
-            if counter == 2 or pre_tag[-2] == '/':
-              post_tags.append(tag_buf)
-              tag_buf = ''
-              counter = 0
-        xml_elems = post_tags
-        if (len(xml_elems) > 1 and len(local_order) > 1 and
-            xml_elems[0][1:] != xml_elems[-1][1:-1]):
-          tmp_buf = ''
-          pre_tags = []
-          for pre_tag in xml_elems:
-            tags = re.findall('<(?:/|)(\w+).*(?:/|)>', pre_tag)
-            if tags: pre_tags.append(tags[0])
-          sub_local_order = []
-          for tag_name in local_order:
-            if tag_name in pre_tags: sub_local_order.append(tag_name)
-          for tag_name in sub_local_order:
-            for xml_elem in xml_elems:
-              if xml_elem[0] != '<': xml_elem = '<%s' % xml_elem
-              if xml_elem[-1] != '>': xml_elem = '%s>' % xml_elem
-              if (xml_elem.find(tag_name, 1, len(tag_name) + 1) > -1 and
-                  (xml_elem[len(tag_name) + 1] == ' ' or
-                   xml_elem[len(tag_name) + 1] == '>')):
-                tmp_buf += xml_elem
-          if tmp_buf and len(tmp_buf) >= len(buf): buf = tmp_buf
+        unordered.append(data)
+    ordered.sort()
+    buf = ''.join([data for rank, index, data in ordered] + unordered)
+
     if xsi_type and len(obj.keys()) == 1:
       data = '<%s xsi3:type="%s"/>' % (key, xsi_type)
     elif xsi_type:
@@ -210,8 +282,7 @@ def PackDictAsXml(obj, key='', key_map=[], order=[], wrap_list=False):
       else:
         data = buf
   elif isinstance(obj, list):
-    for item in obj:
-      buf += PackDictAsXml(item, key, key_map, order, wrap_list)
+    buf = ''.join([__PackAsXml(item, key, key_map, wrap_list) for item in obj])
     if wrap_list:
       data = '<%s>%s</%s>' % (key, buf, key)
     else:
@@ -23,6 +23,7 @@ import gzip
 import httplib
 
 from adspygoogle.common import Utils
+from adspygoogle.common.ConnectionPool import ConnectionPool
 
 
 class HttpConnectionHandler(httplib.HTTPConnection):
@@ -33,7 +34,13 @@ class HttpConnectionHandler(httplib.HTTPConnection):
   implementation. Provides support for HTTP proxy connection. Provides support
   for sending and recieving compressed data.
 
-  Overwrites httplib's putrequest().
+  When keep-alive is enabled, sockets are checked out of and returned into a
+  shared pool of persistent connections, see ConnectionPool.
+
+  If a CallRecord is given, outgoing and incoming HTTP headers and bodies are
+  recorded into it as they pass through the connection.
+
+  Overwrites httplib's connect(), close(), putrequest(), and _send_output().
   """
 
   # Connection states from httplib.py.
@@ -46,8 +53,10 @@ class HttpConnectionHandler(httplib.HTTPConnection):
   http_proxy = ''
   debug =  False
   compress = False
+  keep_alive = False
+  pool = ConnectionPool()
 
-  def __init__(self, host, port=None, strict=None):
+  def __init__(self, host, port=None, strict=None, record=None):
     """Inits HttpConnectionHandler with host and port.
 
     Args:
@@ -56,20 +65,65 @@ class HttpConnectionHandler(httplib.HTTPConnection):
       port: int Proxy's HTTP port number.
       strict: bool if True, causes BadStatusLine to be raised if the status
               line can't be parsed as a valid HTTP/1.0 or 1.1 status line.
+      record: CallRecord Record to fill in with request and response data.
     """
     self.__host = host
     self.__port = port
     self.__http_proxy = HttpConnectionHandler.http_proxy or host
     httplib.HTTPConnection.__init__(self, host=self.__http_proxy,
                                     port=self.__port, strict=strict)
+    self.__response = None
+    self.__record = record
+    self.__sending_headers = False
     if HttpConnectionHandler.debug: self.set_debuglevel(1)
 
+  def __GetPoolKey(self):
+    """Return key under which connection's socket is kept in the pool.
+
+    Returns:
+      tuple Scheme, host, and port of the connection.
+    """
+    return ('http', self.host, self.port)
+
+  def connect(self):
+    """Connect to the host and port specified in __init__.
+
+    If keep-alive is enabled, reuse an idle socket from the pool, if any.
+    """
+    if HttpConnectionHandler.keep_alive:
+      sock = HttpConnectionHandler.pool.Acquire(self.__GetPoolKey())
+      if sock is not None:
+        self.sock = sock
+        return
+    httplib.HTTPConnection.connect(self)
+
+  def close(self):
+    """Close the connection to the host.
+
+    If keep-alive is enabled and the response was fully read, the socket is
+    returned into the pool instead of being closed. Called by getresponse()
+    once the body of a persistent response has been read.
+    """
+    response = self.__response
+    self.__response = None
+    if (HttpConnectionHandler.keep_alive and self.sock is not None and
+        response is not None and not response.will_close and
+        response.isclosed()):
+      HttpConnectionHandler.pool.Release(self.__GetPoolKey(), self.sock)
+      self.sock = None
+      return
+    httplib.HTTPConnection.close(self)
+
   def send(self, data):
     """Send data to the server.
 
     Args:
       data: str Data to send to the server.
     """
+    # Header strings are sent through here as well, only record the body.
+    record = None
+    if not self.__sending_headers: record = self.__record
+
     # If compression is enabled, compress request prior to sending it, unless
     # data is a header string.
     if (not HttpConnectionHandler.compress or
@@ -77,6 +131,7 @@ class HttpConnectionHandler(httplib.HTTPConnection):
          data.find('Content-Type:') > -1 and data.find('SOAPAction:') > -1 and
          data.find('User-Agent:') > -1)):
       httplib.HTTPConnection.send(self, data)
+      if record is not None: record.AddBodyOut(data)
     else:
       if self.sock is None:
         if self.auto_open:
@@ -89,6 +144,7 @@ class HttpConnectionHandler(httplib.HTTPConnection):
       zdata = gzip.GzipFile(mode='wb', fileobj=stream, compresslevel=1)
       zdata.write(data)
       zdata.close()
+      if record is not None: record.AddBodyOut(data, len(stream.getvalue()))
       data = stream.getvalue()
 
       # Set re calculated content's length and encoding type.
@@ -118,10 +174,19 @@ class HttpConnectionHandler(httplib.HTTPConnection):
       uri = '%s://%s%s' % (scheme, netloc, path)
     else:
       uri = url
+    if self.__record is not None: self.__record.StartRequest(method, uri)
     httplib.HTTPConnection.putrequest(self, method=method, url=uri,
                                       skip_host=skip_host,
                                       skip_accept_encoding=skip_accept_encoding)
 
+  def _send_output(self, *args):
+    """Send the buffered request headers to the server."""
+    self.__sending_headers = True
+    try:
+      httplib.HTTPConnection._send_output(self, *args)
+    finally:
+      self.__sending_headers = False
+
   def putheader(self, header, value):
     """Send a request header line to the server.
 
@@ -136,6 +201,7 @@ class HttpConnectionHandler(httplib.HTTPConnection):
     if HttpConnectionHandler.compress and header == 'Content-Length': return
     str_in = '%s: %s' % (header, value)
     self._output(str_in)
+    if self.__record is not None: self.__record.AddHeaderOut(header, value)
 
   def endheaders(self):
     """Indicate that the last header line has been sent to the server."""
@@ -161,14 +227,42 @@ class HttpConnectionHandler(httplib.HTTPConnection):
     response.begin()
     assert response.will_close != HttpConnectionHandler._UNKNOWN
     self.__state = HttpConnectionHandler._CS_IDLE
+    self.__response = response
 
     if response.will_close:
       # This effectively passes the connection to the response.
       self.close()
 
+    record = self.__record
+    if record is not None:
+      record.StartResponse(response.status, response.reason,
+                           response.msg.headers)
+
     # If response was compressed, uncompress it prior to returning.
     if response.getheader('content-encoding') == 'gzip':
       stream = StringIO.StringIO(response.read())
       data = gzip.GzipFile(fileobj=stream).read()
+      if record is not None: record.AddBodyIn(data, stream.len)
       response.read = lambda: data
+    elif record is not None:
+      read = response.read
+
+      def Read(*args):
+        data = read(*args)
+        record.AddBodyIn(data)
+        return data
+      response.read = Read
+
+    # ZSI drops the connection without closing it, so the socket is returned
+    # into the pool, or closed, as soon as the body has been read in full.
+    if not response.will_close:
+      read_body = response.read
+
+      def ReadAndRelease(*args):
+        data = read_body(*args)
+        if response.isclosed(): self.close()
+        return data
+      response.read = ReadAndRelease
+      # Compressed body has been read in full already.
+      if response.isclosed(): self.close()
     return response
@@ -22,6 +22,8 @@ import StringIO
 import gzip
 import httplib
 
+from adspygoogle.common.ConnectionPool import ConnectionPool
+
 
 class HttpsConnectionHandler(httplib.HTTPSConnection):
 
@@ -30,8 +32,14 @@ class HttpsConnectionHandler(httplib.HTTPSConnection):
   Responsible for creating custom HTTPS connection object to intercept ZSI's
   implementation. Provides support for sending and recieving compressed data.
 
-  Overwrites httplib's send(), putrequest(), putheader(), endheaders(), and
-  getresponse().
+  When keep-alive is enabled, sockets are checked out of and returned into a
+  shared pool of persistent connections, see ConnectionPool.
+
+  If a CallRecord is given, outgoing and incoming HTTP headers and bodies are
+  recorded into it as they pass through the connection.
+
+  Overwrites httplib's connect(), close(), send(), putrequest(), putheader(),
+  endheaders(), _send_output(), and getresponse().
   """
 
   # Connection states from httplib.py.
@@ -43,8 +51,10 @@ class HttpsConnectionHandler(httplib.HTTPSConnection):
 
   debug =  False
   compress = False
+  keep_alive = False
+  pool = ConnectionPool()
 
-  def __init__(self, host, port=None, strict=None):
+  def __init__(self, host, port=None, strict=None, record=None):
     """Inits HttpsConnectionHandler with host and port.
 
     Args:
@@ -53,19 +63,64 @@ class HttpsConnectionHandler(httplib.HTTPSConnection):
       port: int HTTPS port number.
       strict: bool if True, causes BadStatusLine to be raised if the status
               line can't be parsed as a valid HTTP/1.0 or 1.1 status line.
+      record: CallRecord Record to fill in with request and response data.
     """
     self.__host = host
     self.__port = port
     httplib.HTTPSConnection.__init__(self, host=self.__host, port=self.__port,
                                      strict=strict)
+    self.__response = None
+    self.__record = record
+    self.__sending_headers = False
     if HttpsConnectionHandler.debug: self.set_debuglevel(1)
 
+  def __GetPoolKey(self):
+    """Return key under which connection's socket is kept in the pool.
+
+    Returns:
+      tuple Scheme, host, and port of the connection.
+    """
+    return ('https', self.host, self.port)
+
+  def connect(self):
+    """Connect to the host and port specified in __init__.
+
+    If keep-alive is enabled, reuse an idle socket from the pool, if any.
+    """
+    if HttpsConnectionHandler.keep_alive:
+      sock = HttpsConnectionHandler.pool.Acquire(self.__GetPoolKey())
+      if sock is not None:
+        self.sock = sock
+        return
+    httplib.HTTPSConnection.connect(self)
+
+  def close(self):
+    """Close the connection to the host.
+
+    If keep-alive is enabled and the response was fully read, the socket is
+    returned into the pool instead of being closed. Called by getresponse()
+    once the body of a persistent response has been read.
+    """
+    response = self.__response
+    self.__response = None
+    if (HttpsConnectionHandler.keep_alive and self.sock is not None and
+        response is not None and not response.will_close and
+        response.isclosed()):
+      HttpsConnectionHandler.pool.Release(self.__GetPoolKey(), self.sock)
+      self.sock = None
+      return
+    httplib.HTTPSConnection.close(self)
+
   def send(self, data):
     """Send data to the server.
 
     Args:
       data: str Data to send to the server.
     """
+    # Header strings are sent through here as well, only record the body.
+    record = None
+    if not self.__sending_headers: record = self.__record
+
     # If compression is enabled, compress request prior to sending it, unless
     # data is a header string.
     if (not HttpsConnectionHandler.compress or
@@ -73,6 +128,7 @@ class HttpsConnectionHandler(httplib.HTTPSConnection):
          data.find('Content-Type:') > -1 and data.find('SOAPAction:') > -1 and
          data.find('User-Agent:') > -1)):
       httplib.HTTPSConnection.send(self, data)
+      if record is not None: record.AddBodyOut(data)
     else:
       if self.sock is None:
         if self.auto_open:
@@ -84,6 +140,7 @@ class HttpsConnectionHandler(httplib.HTTPSConnection):
       zdata = gzip.GzipFile(mode='wb', fileobj=stream, compresslevel=1)
       zdata.write(data)
       zdata.close()
+      if record is not None: record.AddBodyOut(data, len(stream.getvalue()))
       data = stream.getvalue()
 
       # Set re calculated content's length and encoding type.
@@ -106,10 +163,19 @@ class HttpsConnectionHandler(httplib.HTTPSConnection):
                             'Accept-Encoding:' header.
     """
     if HttpsConnectionHandler.compress: skip_accept_encoding = True
+    if self.__record is not None: self.__record.StartRequest(method, url)
     httplib.HTTPConnection.putrequest(self, method=method, url=url,
                                       skip_host=skip_host,
                                       skip_accept_encoding=skip_accept_encoding)
 
+  def _send_output(self, *args):
+    """Send the buffered request headers to the server."""
+    self.__sending_headers = True
+    try:
+      httplib.HTTPSConnection._send_output(self, *args)
+    finally:
+      self.__sending_headers = False
+
   def putheader(self, header, value):
     """Send a request header line to the server.
 
@@ -124,6 +190,7 @@ class HttpsConnectionHandler(httplib.HTTPSConnection):
     if HttpsConnectionHandler.compress and header == 'Content-Length': return
     str_in = '%s: %s' % (header, value)
     self._output(str_in)
+    if self.__record is not None: self.__record.AddHeaderOut(header, value)
 
   def endheaders(self):
     """Indicate that the last header line has been sent to the server."""
@@ -149,14 +216,42 @@ class HttpsConnectionHandler(httplib.HTTPSConnection):
     response.begin()
     assert response.will_close != HttpsConnectionHandler._UNKNOWN
     self.__state = HttpsConnectionHandler._CS_IDLE
+    self.__response = response
 
     if response.will_close:
       # This effectively passes the connection to the response.
       self.close()
 
+    record = self.__record
+    if record is not None:
+      record.StartResponse(response.status, response.reason,
+                           response.msg.headers)
+
     # If response was compressed, uncompress it prior to returning.
     if response.getheader('content-encoding') == 'gzip':
       stream = StringIO.StringIO(response.read())
       data = gzip.GzipFile(fileobj=stream).read()
+      if record is not None: record.AddBodyIn(data, stream.len)
       response.read = lambda: data
+    elif record is not None:
+      read = response.read
+
+      def Read(*args):
+        data = read(*args)
+        record.AddBodyIn(data)
+        return data
+      response.read = Read
+
+    # ZSI drops the connection without closing it, so the socket is returned
+    # into the pool, or closed, as soon as the body has been read in full.
+    if not response.will_close:
+      read_body = response.read
+
+      def ReadAndRelease(*args):
+        data = read_body(*args)
+        if response.isclosed(): self.close()
+        return data
+      response.read = ReadAndRelease
+      # Compressed body has been read in full already.
+      if response.isclosed(): self.close()
     return response
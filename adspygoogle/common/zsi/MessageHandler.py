@@ -50,7 +50,8 @@ else:
     raise ValidationError(msg)
 
 
-def GetServiceConnection(headers, config, op_config, url, service_name, loc):
+def GetServiceConnection(headers, config, op_config, url, service_name, loc,
+                         record=None):
   """Get SOAP service connection.
 
   Args:
@@ -61,12 +62,20 @@ def GetServiceConnection(headers, config, op_config, url, service_name, loc):
     url: str URL of the web service to call.
     service_name: str API service name.
     loc: Service locator.
+    [optional]
+    record: CallRecord Record to fill in with request and response data. If not
+            set, SOAP messages are traced to sys.stdout.
 
   Returns:
     instance of SoapBindingSOAP interface with set headers.
   """
-  kw = {'tracefile': sys.stdout}
+  kw = {}
   use_conn_handler = False
+  if record is None:
+    kw['tracefile'] = sys.stdout
+  else:
+    kw['transdict'] = {'record': record}
+    use_conn_handler = True
   if Utils.BoolTypeConvert(config['raw_debug']):
     HttpConnectionHandler.debug = True
     HttpsConnectionHandler.debug = True
@@ -75,6 +84,14 @@ def GetServiceConnection(headers, config, op_config, url, service_name, loc):
     HttpConnectionHandler.compress = True
     HttpsConnectionHandler.compress = True
     use_conn_handler = True
+  if Utils.BoolTypeConvert(config['keep_alive']):
+    HttpConnectionHandler.keep_alive = True
+    HttpsConnectionHandler.keep_alive = True
+    # Idle sockets should expire before the server drops them on its own.
+    for handler in (HttpConnectionHandler, HttpsConnectionHandler):
+      handler.pool.SetLimits(int(config['keep_alive_pool_size']),
+                             float(config['keep_alive_timeout']))
+    use_conn_handler = True
   if use_conn_handler and op_config['http_proxy']:
     HttpConnectionHandler.http_proxy = op_config['http_proxy']
     kw['transport'] = HttpConnectionHandler
@@ -95,6 +112,26 @@ def GetServiceConnection(headers, config, op_config, url, service_name, loc):
   return port_type
 
 
+def CallAndDecodeResponse(service, method_name, request):
+  """Make an API call and decode its response without building ZSI holders.
+
+  Args:
+    service: instance of SoapBindingSOAP interface with set headers.
+    method_name: str API method name.
+    request: instance Holder of the SOAP request.
+
+  Returns:
+    tuple Response from the API method, same as UnpackResponseAsTuple() returns
+          for the holder ZSI would build.
+  """
+  from adspygoogle.common.zsi.ResponseDecoder import ResponseDecoder
+  # Response holder lives in the same generated module as the service.
+  web_services = sys.modules[service.__class__.__module__]
+  typecode = getattr(web_services, '%sResponse' % method_name).typecode
+  service.binding.Send(None, None, request, soapaction='')
+  return ResponseDecoder(typecode).Decode(service.binding.ReceiveRaw())
+
+
 def SetRequestParams(request, params, is_jaxb_api):
   """Set SOAP request parameters.
 
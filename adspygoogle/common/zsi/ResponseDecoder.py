@@ -0,0 +1,288 @@
+#!/usr/bin/python
+#
+# Copyright 2011 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Decoder for turning SOAP responses straight into Python objects."""
+
+__author__ = 'api.sgrinberg@gmail.com (Stan Grinberg)'
+
+import base64
+import xml.parsers.expat
+
+from adspygoogle.common.Errors import Error
+from adspygoogle.common.Errors import MissingPackageError
+from adspygoogle.common.zsi import MIN_ZSI_VERSION
+try:
+  import ZSI
+except ImportError:
+  msg = 'ZSI v%s or newer is required.' % MIN_ZSI_VERSION
+  raise MissingPackageError(msg)
+
+
+class ResponseDecoder(object):
+
+  """Implements ResponseDecoder.
+
+  Parses SOAP response envelope with expat and builds dicts, lists and strings
+  as the elements stream by, guided by the ZSI typecode of the response
+  element. The result has the same shape as MessageHandler.UnpackResponseAsTuple
+  would return for the holder ZSI parses the response into, but neither the DOM
+  of the response nor the holders are ever built.
+  """
+
+  # Decoding info of complex typecodes, keyed by id() of the typecode. Info is
+  # built once per typecode and never changes, so threads racing to build it
+  # for the same typecode end up storing equal values.
+  __type_info = {}
+
+  # Elements of a SOAP fault that are kept, everything else is skipped.
+  __FAULT_INFO = ({'faultcode': ('faultcode', False, None, False),
+                   'faultstring': ('faultstring', False, None, False)},
+                  (), None)
+
+  # Kinds of elements on the stack.
+  __COMPLEX = 0
+  __SIMPLE = 1
+  __SKIP = 2
+
+  def __init__(self, typecode):
+    """Inits ResponseDecoder.
+
+    Args:
+      typecode: ZSI.TCcompound.ComplexType Typecode of the response element.
+    """
+    self.__typecode = typecode
+
+  def __GetTypeInfo(self, typecode):
+    """Return decoding info for a given complex typecode.
+
+    Args:
+      typecode: ZSI.TCcompound.ComplexType Complex typecode.
+
+    Returns:
+      tuple Decoding info, (fields, defaults, typecode), where fields maps
+            element names to (key, is_list, typecode of complex element or
+            None, is_binary) and defaults is a tuple of (key, is_list) for the
+            values the typecode's holder is initialized with.
+    """
+    info = self.__class__.__type_info.get(id(typecode))
+    if info is not None: return info
+
+    fields = {}
+    for what in typecode.ofwhat:
+      if what.pname in fields: continue
+      is_list = what.maxOccurs == 'unbounded' or what.maxOccurs > 1
+      child = None
+      if isinstance(what, ZSI.TCcompound.ComplexType): child = what
+      # Simple types are strings, except for base64 encoded binary data.
+      is_binary = isinstance(what, ZSI.TC.Base64String)
+      fields[what.pname] = (what.aname.strip('_'), is_list, child, is_binary)
+
+    # Holder of a derived type is the one of its base type, so only values set
+    # by the holder's constructor are defaults. The rest are only present in
+    # the result if they are present in the response.
+    defaults = []
+    if typecode.pyclass is not None:
+      holder = typecode.pyclass()
+      for key in holder.__dict__:
+        defaults.append((key.strip('_'), isinstance(holder.__dict__[key],
+                                                    list)))
+
+    # Keeping typecode in the info guarantees that its id() is not reused.
+    info = (fields, tuple(defaults), typecode)
+    self.__class__.__type_info[id(typecode)] = info
+    return info
+
+  def __GetSubstituteInfo(self, typecode, type_name):
+    """Return decoding info for a type substituted via xsi:type.
+
+    Args:
+      typecode: ZSI.TCcompound.ComplexType Complex typecode of the element.
+      type_name: str Name of the type from xsi:type, without its prefix.
+
+    Returns:
+      tuple Decoding info, see __GetTypeInfo().
+    """
+    declared = getattr(typecode, 'type', None)
+    if not isinstance(declared, tuple) or declared[1] == type_name:
+      return self.__GetTypeInfo(typecode)
+
+    # Substitutes are cached along with regular typecodes, keyed by the id() of
+    # declared typecode and substitute type name.
+    key = (id(typecode), type_name)
+    info = self.__class__.__type_info.get(key)
+    if info is not None: return info
+
+    from ZSI.schema import GTD
+    klass = GTD(declared[0], type_name, lazy=False)
+    if klass is None:
+      raise Error('No registered xsi:type=(%s, %s), substitute for %s.'
+                  % (declared[0], type_name, declared[1]))
+    # Constructor of a derived type sets up its base classes, thus has to be
+    # called before checking whether it is a valid substitute.
+    substitute = klass((typecode.nspname, typecode.pname))
+    if not isinstance(substitute, typecode.__class__):
+      raise Error('Substitute type (%s, %s) is not derived from %s.'
+                  % (declared[0], type_name, declared[1]))
+
+    info = self.__GetTypeInfo(substitute)
+    self.__class__.__type_info[key] = info
+    return info
+
+  def __StartElement(self, name, attrs):
+    """Handle start of an element.
+
+    Args:
+      name: str Qualified name of the element.
+      attrs: dict Attributes of the element.
+    """
+    name = name[name.find(':') + 1:]
+    stack = self.__stack
+    if not stack:
+      if not self.__in_body:
+        # Envelope, header and anything in it are of no interest.
+        self.__in_body = name == 'Body'
+        return
+      if name == 'Fault':
+        self.__is_fault = True
+        info = self.__class__.__FAULT_INFO
+      else:
+        info = self.__GetTypeInfo(self.__typecode)
+      stack.append([self.__COMPLEX, info, {}, None, False, False])
+      return
+
+    parent = stack[-1]
+    field = None
+    if parent[0] == self.__COMPLEX:
+      field = parent[1][0].get(name)
+    # Unknown elements are skipped, so is repeated element that is expected
+    # only once, ZSI keeps the first one of those.
+    if field is None or (not field[1] and field[0] in parent[2]):
+      stack.append([self.__SKIP, None, None, None, False, False])
+      return
+
+    key, is_list, typecode, is_binary = field
+    is_nil = False
+    type_name = None
+    for attr in attrs:
+      pos = attr.find(':')
+      if pos < 0: continue
+      if attr[pos + 1:] == 'nil':
+        is_nil = attrs[attr] in ('true', '1')
+      elif attr[pos + 1:] == 'type':
+        type_name = attrs[attr][attrs[attr].find(':') + 1:]
+
+    if typecode is None:
+      stack.append([self.__SIMPLE, is_binary, [], key, is_list, is_nil])
+    else:
+      if type_name:
+        info = self.__GetSubstituteInfo(typecode, type_name)
+      else:
+        info = self.__GetTypeInfo(typecode)
+      stack.append([self.__COMPLEX, info, {}, key, is_list, is_nil])
+
+  def __EndElement(self, name):
+    """Handle end of an element.
+
+    Args:
+      name: str Qualified name of the element.
+    """
+    stack = self.__stack
+    if not stack:
+      self.__in_body = False
+      return
+
+    kind, info, data, key, is_list, is_nil = stack.pop()
+    if kind == self.__SKIP: return
+    if is_nil:
+      value = ''
+    elif kind == self.__SIMPLE:
+      value = ''.join(data)
+      if info:
+        value = base64.b64decode(value)
+      else:
+        value = value.strip()
+    else:
+      value = {}
+      for default_key, default_is_list in info[1]:
+        if default_is_list:
+          value[default_key] = []
+        else:
+          value[default_key] = ''
+      value.update(data)
+      # Mirror MessageHandler.UnpackResponseAsTuple(), which returns a tuple
+      # for an empty holder and unwraps holders of a return value.
+      if not value:
+        value = (value,)
+      elif len(value) == 1:
+        only_key = value.keys()[0]
+        if only_key.find('Return') >= 0 or only_key.find('rval') >= 0:
+          value = (value[only_key],)
+
+    if stack:
+      if is_list:
+        stack[-1][2].setdefault(key, []).append(value)
+      else:
+        stack[-1][2][key] = value
+    else:
+      self.__result = value
+
+  def __CharacterData(self, data):
+    """Handle character data.
+
+    Args:
+      data: str Character data.
+    """
+    stack = self.__stack
+    if stack and stack[-1][0] == self.__SIMPLE:
+      stack[-1][2].append(data)
+
+  def Decode(self, data):
+    """Decode SOAP response.
+
+    Args:
+      data: str SOAP XML response.
+
+    Returns:
+      tuple/dict Decoded response, same as
+                 MessageHandler.UnpackResponseAsTuple() returns.
+
+    Raises:
+      Error: if response is a SOAP fault or has no response element.
+    """
+    self.__stack = []
+    self.__in_body = False
+    self.__is_fault = False
+    self.__result = None
+
+    parser = xml.parsers.expat.ParserCreate()
+    # Have strings in UTF-8, the way ZSI returns them.
+    parser.returns_unicode = False
+    parser.buffer_text = True
+    parser.StartElementHandler = self.__StartElement
+    parser.EndElementHandler = self.__EndElement
+    parser.CharacterDataHandler = self.__CharacterData
+    parser.Parse(data, True)
+
+    result = self.__result
+    self.__result = None
+    if self.__is_fault:
+      # Fault with no elements decodes into a tuple, like any empty holder.
+      fault_string = ''
+      if isinstance(result, dict): fault_string = result.get('faultstring')
+      raise Error(fault_string or 'Unknown SOAP fault.')
+    if result is None:
+      raise Error('Response element is missing from the SOAP response.')
+    return result
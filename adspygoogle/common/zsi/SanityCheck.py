@@ -22,6 +22,36 @@ from adspygoogle.common import MAX_TARGET_NAMESPACE
 from adspygoogle.common.Errors import ValidationError
 
 
+# Index of type definitions of web services modules, keyed by module name. Each
+# index maps type names to their *_Def classes.
+__TYPE_INDEX = {}
+
+
+def __GetTypeIndex(web_services):
+  """Return index of type definitions for a given web services module.
+
+  The index is built on first request and reused afterwards.
+
+  Args:
+    web_services: Module for web service.
+
+  Returns:
+    dict Type definitions, keyed by type name.
+  """
+  index = __TYPE_INDEX.get(web_services.__name__)
+  if index is None:
+    index = {}
+    for ns_index in xrange(MAX_TARGET_NAMESPACE):
+      name_space = getattr(web_services, 'ns%s' % ns_index, None)
+      if name_space is None: continue
+      for key in dir(name_space):
+        # Definition from the lowest namespace wins, as it always did.
+        if key.endswith('_Def') and key[:-4] not in index:
+          index[key[:-4]] = getattr(name_space, key)
+    __TYPE_INDEX[web_services.__name__] = index
+  return index
+
+
 def GetPyClass(name, web_services):
   """Return Python class for a given class name.
 
@@ -32,18 +62,15 @@ def GetPyClass(name, web_services):
   Returns:
     Python class.
   """
-  for index in xrange(MAX_TARGET_NAMESPACE):
-    try:
-      pyclass = eval('web_services.ns%s.%s_Def(\'%s\').pyclass' % (index, name,
-                                                                   name))
-      break
-    except AttributeError:
-      if index == MAX_TARGET_NAMESPACE - 1:
-        version = web_services.__dict__['__name__'].split('.')[2]
-        msg = ('Given API version, %s, is not compatible with \'%s\' class.' %
-               (version, name))
-        raise ValidationError(msg)
-  return pyclass
+  # Callers fill in attributes of the returned class itself, so a new class has
+  # to be handed out on every call. Only its definition is looked up once.
+  type_def = __GetTypeIndex(web_services).get(name)
+  if type_def is None:
+    version = web_services.__dict__['__name__'].split('.')[2]
+    msg = ('Given API version, %s, is not compatible with \'%s\' class.' %
+           (version, name))
+    raise ValidationError(msg)
+  return type_def(name).pyclass
 
 
 def IsPyClass(obj):
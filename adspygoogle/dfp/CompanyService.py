@@ -112,17 +112,23 @@ class CompanyService(ApiService):
     """
     SanityCheck.ValidateTypes(((company_id, (str, unicode)),))
 
+    cache_key = self._GetEntityCacheKey('Company', company_id)
+    (response, generation) = self._GetCachedEntity(cache_key)
+    if response is not None: return response
+
     method_name = 'getCompany'
     if self._config['soap_lib'] == SOAPPY:
       from adspygoogle.dfp.soappy import OBJ_KEY_ORDER_MAP
       company_id = self._message_handler.PackDictAsXml(
           company_id, 'companyId', OBJ_KEY_ORDER_MAP)
-      return self.__service.CallMethod(method_name, (company_id))
+      response = self.__service.CallMethod(method_name, (company_id))
     elif self._config['soap_lib'] == ZSI:
       request = eval('self._web_services.%sRequest()' % method_name)
-      return self.__service.CallMethod(method_name,
-                                       (({'companyId': company_id},)),
-                                       'Company', self._loc, request)
+      response = self.__service.CallMethod(method_name,
+                                           (({'companyId': company_id},)),
+                                           'Company', self._loc, request)
+    self._CacheEntity(cache_key, response, generation)
+    return response
 
   def GetCompaniesByStatement(self, filter_statement):
     """Return the companies that match the given filter.
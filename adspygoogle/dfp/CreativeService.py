@@ -115,17 +115,23 @@ class CreativeService(ApiService):
     """
     SanityCheck.ValidateTypes(((creative_id, (str, unicode)),))
 
+    cache_key = self._GetEntityCacheKey('Creative', creative_id)
+    (response, generation) = self._GetCachedEntity(cache_key)
+    if response is not None: return response
+
     method_name = 'getCreative'
     if self._config['soap_lib'] == SOAPPY:
       from adspygoogle.dfp.soappy import OBJ_KEY_ORDER_MAP
       creative_id = self._message_handler.PackDictAsXml(
           creative_id, 'creativeId', OBJ_KEY_ORDER_MAP)
-      return self.__service.CallMethod(method_name, (creative_id))
+      response = self.__service.CallMethod(method_name, (creative_id))
     elif self._config['soap_lib'] == ZSI:
       request = eval('self._web_services.%sRequest()' % method_name)
-      return self.__service.CallMethod(method_name,
-                                       (({'creativeId': creative_id},)),
-                                       'Creative', self._loc, request)
+      response = self.__service.CallMethod(method_name,
+                                           (({'creativeId': creative_id},)),
+                                           'Creative', self._loc, request)
+    self._CacheEntity(cache_key, response, generation)
+    return response
 
   def GetCreativesByStatement(self, filter_statement):
     """Return a page of creatives that satisfy the given statement.
@@ -23,12 +23,18 @@ import re
 import thread
 import time
 
+from adspygoogle.common import DEFAULT_MAX_WORKERS
 from adspygoogle.common import SanityCheck
 from adspygoogle.common import Utils
 from adspygoogle.common.Client import Client
+from adspygoogle.common.EntityCache import EntityCache
 from adspygoogle.common.Errors import AuthTokenError
 from adspygoogle.common.Errors import ValidationError
 from adspygoogle.common.Logger import Logger
+from adspygoogle.common.RateLimiter import RateLimiter
+from adspygoogle.common.ThreadPool import ThreadPool
+from adspygoogle.dfp import AUTH_TOKEN_CACHE_NAME
+from adspygoogle.dfp import AUTH_TOKEN_EXPIRE
 from adspygoogle.dfp import AUTH_TOKEN_SERVICE
 from adspygoogle.dfp import LIB_SHORT_NAME
 from adspygoogle.dfp import LIB_SIG
@@ -93,14 +99,33 @@ class DfpClient(Client):
           'strict': 'y',
           'pretty_xml': 'y',
           'compress': 'y',
+          'keep_alive': 'y',
+          'keep_alive_pool_size': 10,
+          'keep_alive_timeout': 60,
+          'fast_decoder': 'n',
+          'auth_token_cache': 'n',
+          'max_retries': 0,
+          'retry_initial_delay': 1,
+          'retry_max_delay': 30,
+          'rate_limit': 0,
+          'rate_limit_burst': 0,
+          'rate_limit_per_service': 'n',
+          'entity_cache_size': 0,
+          'entity_cache_ttl': 300,
           'access': ''
         }
         path = '/path/to/home'
     """
     super(DfpClient, self).__init__(headers, config, path)
 
+    # Guards authentication data that is shared by all services of this
+    # client. API requests themselves are not serialized, so services may be
+    # used from multiple threads at once.
     self.__lock = thread.allocate_lock()
     self.__loc = None
+    self.__services = {}
+    self.__rate_limiters = {}
+    self.__entity_cache = None
 
     if path is not None:
       # Update absolute path for a given instance of DfpClient, based on
@@ -149,14 +174,24 @@ class DfpClient(Client):
     try:
       if headers and 'authToken' in headers and headers['authToken']:
         self._headers['authToken'] = headers['authToken']
+        self._config['auth_token_epoch'] = time.time()
       elif 'email' in self._headers and 'password' in self._headers:
-        self._headers['authToken'] = Utils.GetAuthToken(
-            self._headers['email'], self._headers['password'],
-            AUTH_TOKEN_SERVICE, LIB_SIG, self._config['proxy'])
+        if Utils.BoolTypeConvert(self._config['auth_token_cache']):
+          # Token may have been fetched by another process, keep its epoch.
+          self._headers['authToken'], self._config['auth_token_epoch'] = (
+              Utils.GetCachedAuthToken(
+                  self._headers['email'], self._headers['password'],
+                  AUTH_TOKEN_SERVICE, LIB_SIG, self._config['proxy'],
+                  os.path.join(self._config['home'], AUTH_TOKEN_CACHE_NAME),
+                  AUTH_TOKEN_EXPIRE))
+        else:
+          self._headers['authToken'] = Utils.GetAuthToken(
+              self._headers['email'], self._headers['password'],
+              AUTH_TOKEN_SERVICE, LIB_SIG, self._config['proxy'])
+          self._config['auth_token_epoch'] = time.time()
       else:
         msg = 'Authentication data, email or/and password, is missing.'
         raise ValidationError(msg)
-      self._config['auth_token_epoch'] = time.time()
     except AuthTokenError:
       # We would end up here if non-valid Google Account's credentials were
       # specified.
@@ -216,13 +251,134 @@ class DfpClient(Client):
     config = super(DfpClient, self)._SetMissingDefaultConfigValues(config)
     default_config = {
         'home': DfpClient.home,
-        'log_home': os.path.join(DfpClient.home, 'logs')
+        'log_home': os.path.join(DfpClient.home, 'logs'),
+        'max_retries': 0,
+        'retry_initial_delay': 1,
+        'retry_max_delay': 30,
+        'rate_limit': 0,
+        'rate_limit_burst': 0,
+        'rate_limit_per_service': 'n',
+        'entity_cache_size': 0,
+        'entity_cache_ttl': 300
     }
     for key in default_config:
       if key not in config:
         config[key] = default_config[key]
     return config
 
+  def __GetService(self, service_class, server, version, http_proxy):
+    """Return instance of a given service, creating it on first request.
+
+    Instances are cached per service, server, version, HTTP proxy and SOAP
+    toolkit in use, so that repeated requests for the same service get the same
+    warm instance.
+
+    Args:
+      service_class: class Class of the service.
+      server: str API server to access for this API call.
+      version: str API version to use.
+      http_proxy: str HTTP proxy to use.
+
+    Returns:
+      ApiService Instance of the service.
+    """
+    if version is None:
+      version = MIN_API_VERSION
+    key = (service_class.__name__, server, version, http_proxy,
+           self._config['soap_lib'])
+    service = self.__services.get(key)
+    if service is None:
+      if Utils.BoolTypeConvert(self._config['strict']):
+        DfpSanityCheck.ValidateServer(server, version)
+
+      # Load additional configuration data.
+      op_config = {
+        'server': server,
+        'version': version,
+        'http_proxy': http_proxy,
+        'rate_limiter': self.__GetRateLimiter(service_class.__name__),
+        'entity_cache': self.__GetEntityCache()
+      }
+      service = service_class(self._headers, self._config, op_config,
+                              self.__lock, self.__logger)
+      # Another thread may have created the same service in the meantime, in
+      # which case its instance is the one to share.
+      service = self.__services.setdefault(key, service)
+    return service
+
+  def __GetRateLimiter(self, service_name):
+    """Return rate limiter for requests of a given service.
+
+    Limiters are scoped per network and, if 'rate_limit_per_service' is set,
+    per service. All instances of services within the same scope share one
+    limiter.
+
+    Args:
+      service_name: str Name of the service.
+
+    Returns:
+      RateLimiter Rate limiter to use, None if rate is not limited.
+    """
+    rate = float(self._config['rate_limit'])
+    if rate <= 0: return None
+    key = self._headers.get('networkCode')
+    if Utils.BoolTypeConvert(self._config['rate_limit_per_service']):
+      key = (key, service_name)
+    self.__lock.acquire()
+    try:
+      limiter = self.__rate_limiters.get(key)
+      if limiter is None:
+        limiter = RateLimiter(rate, int(self._config['rate_limit_burst']))
+        self.__rate_limiters[key] = limiter
+    finally:
+      self.__lock.release()
+    return limiter
+
+  def GetRateLimiterStats(self):
+    """Return counters of the rate limiters in use.
+
+    Returns:
+      dict Counters of each rate limiter, see RateLimiter.GetStats(), keyed by
+           network code or, if limited per service, by (network code, service
+           name).
+    """
+    self.__lock.acquire()
+    try:
+      limiters = self.__rate_limiters.copy()
+    finally:
+      self.__lock.release()
+    stats = {}
+    for key in limiters:
+      stats[key] = limiters[key].GetStats()
+    return stats
+
+  def __GetEntityCache(self):
+    """Return cache of entities fetched by ID, shared by all services.
+
+    Returns:
+      EntityCache Entity cache to use, None if caching is disabled.
+    """
+    max_size = int(self._config['entity_cache_size'])
+    if max_size <= 0: return None
+    self.__lock.acquire()
+    try:
+      if self.__entity_cache is None:
+        self.__entity_cache = EntityCache(
+            max_size, int(self._config['entity_cache_ttl']))
+    finally:
+      self.__lock.release()
+    return self.__entity_cache
+
+  def GetEntityCacheStats(self):
+    """Return counters of the entity cache.
+
+    Returns:
+      dict Counters of the cache, see EntityCache.GetStats(). None, if caching
+           is disabled.
+    """
+    if self.__entity_cache is None: return None
+    return self.__entity_cache.GetStats()
+
   def CallRawMethod(self, soap_message, url, server, http_proxy):
     """Call API method directly, using raw SOAP message.
 
@@ -250,6 +406,67 @@ class DfpClient(Client):
                             self.__logger)
     return service.CallRawMethod(soap_message)
 
+  def ExecuteBatch(self, work_items, server='https://sandbox.google.com',
+                   version=None, http_proxy=None,
+                   max_workers=DEFAULT_MAX_WORKERS):
+    """Execute a batch of API calls concurrently.
+
+    Work items are run on a bounded pool of threads, each work item being a
+    tuple of the service name, the method name, and a tuple of arguments for
+    that method. A single instance of each service is shared by all work items
+    that use it.
+
+    Args:
+      work_items: list Work items to execute.
+      [optional]
+      server: str API server to access for this API call. Possible values
+              are: 'https://www.google.com' for live site and
+              'https://sandbox.google.com' for sandbox. The default behavior is
+              to access sandbox site.
+      version: str API version to use.
+      http_proxy: str HTTP proxy to use.
+      max_workers: int Maximum number of API calls to run at once.
+
+      Ex:
+        work_items = [
+          ('LineItem', 'GetLineItem', ('12345',)),
+          ('Order', 'GetOrdersByStatement', ({'query': 'LIMIT 500'},))
+        ]
+
+    Returns:
+      list Responses from the API methods, in the same order as work items.
+           If a work item failed, the raised exception is returned in place of
+           its response.
+    """
+    SanityCheck.ValidateTypes(((work_items, list),))
+    services = {}
+    calls = []
+    for work_item in work_items:
+      SanityCheck.ValidateTypes(((work_item, tuple),))
+      if len(work_item) != 3:
+        msg = ('Work item \'%s\' is not of the form (service, method, args).'
+               % str(work_item))
+        raise ValidationError(msg)
+      service_name, method_name, args = work_item
+      if not isinstance(args, (tuple, list)): args = (args,)
+      if service_name not in services:
+        if not hasattr(self, 'Get%sService' % service_name):
+          msg = 'Service \'%s\' is not supported.' % service_name
+          raise ValidationError(msg)
+        services[service_name] = getattr(self, 'Get%sService' % service_name)(
+            server, version, http_proxy)
+      if not hasattr(services[service_name], method_name):
+        msg = ('Method \'%s\' is not supported by \'%sService\'.'
+               % (method_name, service_name))
+        raise ValidationError(msg)
+      calls.append((getattr(services[service_name], method_name), args))
+
+    def Call(call):
+      method, args = call
+      return method(*args)
+
+    return ThreadPool(max_workers).Map(Call, calls)
+
   def GetCompanyService(self, server='https://sandbox.google.com', version=None,
                         http_proxy=None):
     """Call API method in CompanyService.
@@ -264,21 +481,9 @@ class DfpClient(Client):
       http_proxy: str HTTP proxy to use.
 
     Returns:
-      CompanyService New instance of CompanyService object.
+      CompanyService Shared instance of CompanyService object.
     """
-    if version is None:
-      version = MIN_API_VERSION
-    if Utils.BoolTypeConvert(self._config['strict']):
-      DfpSanityCheck.ValidateServer(server, version)
-
-    # Load additional configuration data.
-    op_config = {
-      'server': server,
-      'version': version,
-      'http_proxy': http_proxy
-    }
-    return CompanyService(self._headers, self._config, op_config, self.__lock,
-                          self.__logger)
+    return self.__GetService(CompanyService, server, version, http_proxy)
 
   def GetCreativeService(self, server='https://sandbox.google.com',
                          version=None, http_proxy=None):
@@ -294,23 +499,9 @@ class DfpClient(Client):
       http_proxy: str HTTP proxy to use.
 
     Returns:
-      CreativeService New instance of CreativeService object.
+      CreativeService Shared instance of CreativeService object.
     """
-    headers = self._headers
-
-    if version is None:
-      version = MIN_API_VERSION
-    if Utils.BoolTypeConvert(self._config['strict']):
-      DfpSanityCheck.ValidateServer(server, version)
-
-    # Load additional configuration data.
-    op_config = {
-      'server': server,
-      'version': version,
-      'http_proxy': http_proxy
-    }
-    return CreativeService(headers, self._config, op_config, self.__lock,
-                           self.__logger)
+    return self.__GetService(CreativeService, server, version, http_proxy)
 
   def GetCustomTargetingService(self, server='https://sandbox.google.com',
                                 version=None, http_proxy=None):
@@ -326,23 +517,10 @@ class DfpClient(Client):
       http_proxy: str HTTP proxy to use.
 
     Returns:
-      CustomTargetingService New instance of CustomTargetingService object.
+      CustomTargetingService Shared instance of CustomTargetingService object.
     """
-    headers = self._headers
-
-    if version is None:
-      version = MIN_API_VERSION
-    if Utils.BoolTypeConvert(self._config['strict']):
-      DfpSanityCheck.ValidateServer(server, version)
-
-    # Load additional configuration data.
-    op_config = {
-      'server': server,
-      'version': version,
-      'http_proxy': http_proxy
-    }
-    return CustomTargetingService(headers, self._config, op_config, self.__lock,
-                                  self.__logger)
+    return self.__GetService(CustomTargetingService, server,
+                             version, http_proxy)
 
   def GetForecastService(self, server='https://sandbox.google.com',
                          version=None, http_proxy=None):
@@ -358,23 +536,9 @@ class DfpClient(Client):
       http_proxy: str HTTP proxy to use.
 
     Returns:
-      ForecastService New instance of ForecastService object.
+      ForecastService Shared instance of ForecastService object.
     """
-    headers = self._headers
-
-    if version is None:
-      version = MIN_API_VERSION
-    if Utils.BoolTypeConvert(self._config['strict']):
-      DfpSanityCheck.ValidateServer(server, version)
-
-    # Load additional configuration data.
-    op_config = {
-      'server': server,
-      'version': version,
-      'http_proxy': http_proxy
-    }
-    return ForecastService(headers, self._config, op_config, self.__lock,
-                           self.__logger)
+    return self.__GetService(ForecastService, server, version, http_proxy)
 
   def GetInventoryService(self, server='https://sandbox.google.com',
                           version=None, http_proxy=None):
@@ -390,23 +554,9 @@ class DfpClient(Client):
       http_proxy: str HTTP proxy to use.
 
     Returns:
-      InventoryService New instance of InventoryService object.
+      InventoryService Shared instance of InventoryService object.
     """
-    headers = self._headers
-
-    if version is None:
-      version = MIN_API_VERSION
-    if Utils.BoolTypeConvert(self._config['strict']):
-      DfpSanityCheck.ValidateServer(server, version)
-
-    # Load additional configuration data.
-    op_config = {
-      'server': server,
-      'version': version,
-      'http_proxy': http_proxy
-    }
-    return InventoryService(headers, self._config, op_config, self.__lock,
-                            self.__logger)
+    return self.__GetService(InventoryService, server, version, http_proxy)
 
   def GetLineItemCreativeAssociationService(self,
                                             server='https://sandbox.google.com',
@@ -423,24 +573,11 @@ class DfpClient(Client):
       http_proxy: str HTTP proxy to use.
 
     Returns:
-      LineItemCreativeAssociationService New instance of
+      LineItemCreativeAssociationService Shared instance of
           LineItemCreativeAssociationService object.
     """
-    headers = self._headers
-
-    if version is None:
-      version = MIN_API_VERSION
-    if Utils.BoolTypeConvert(self._config['strict']):
-      DfpSanityCheck.ValidateServer(server, version)
-
-    # Load additional configuration data.
-    op_config = {
-      'server': server,
-      'version': version,
-      'http_proxy': http_proxy
-    }
-    return LineItemCreativeAssociationService(headers, self._config, op_config,
-                                              self.__lock, self.__logger)
+    return self.__GetService(LineItemCreativeAssociationService, server,
+                             version, http_proxy)
 
   def GetLineItemService(self, server='https://sandbox.google.com',
                          version=None, http_proxy=None):
@@ -456,23 +593,9 @@ class DfpClient(Client):
       http_proxy: str HTTP proxy to use.
 
     Returns:
-      LineItemService New instance of LineItemService object.
+      LineItemService Shared instance of LineItemService object.
     """
-    headers = self._headers
-
-    if version is None:
-      version = MIN_API_VERSION
-    if Utils.BoolTypeConvert(self._config['strict']):
-      DfpSanityCheck.ValidateServer(server, version)
-
-    # Load additional configuration data.
-    op_config = {
-      'server': server,
-      'version': version,
-      'http_proxy': http_proxy
-    }
-    return LineItemService(headers, self._config, op_config, self.__lock,
-                           self.__logger)
+    return self.__GetService(LineItemService, server, version, http_proxy)
 
   def GetNetworkService(self, server='https://sandbox.google.com', version=None,
                         http_proxy=None):
@@ -488,23 +611,9 @@ class DfpClient(Client):
       http_proxy: str HTTP proxy to use.
 
     Returns:
-      NetworkService New instance of NetworkService object.
+      NetworkService Shared instance of NetworkService object.
     """
-    headers = self._headers
-
-    if version is None:
-      version = MIN_API_VERSION
-    if Utils.BoolTypeConvert(self._config['strict']):
-      DfpSanityCheck.ValidateServer(server, version)
-
-    # Load additional configuration data.
-    op_config = {
-      'server': server,
-      'version': version,
-      'http_proxy': http_proxy
-    }
-    return NetworkService(headers, self._config, op_config, self.__lock,
-                          self.__logger)
+    return self.__GetService(NetworkService, server, version, http_proxy)
 
   def GetOrderService(self, server='https://sandbox.google.com', version=None,
                       http_proxy=None):
@@ -520,23 +629,9 @@ class DfpClient(Client):
       http_proxy: str HTTP proxy to use.
 
     Returns:
-      OrderService New instance of OrderService object.
+      OrderService Shared instance of OrderService object.
     """
-    headers = self._headers
-
-    if version is None:
-      version = MIN_API_VERSION
-    if Utils.BoolTypeConvert(self._config['strict']):
-      DfpSanityCheck.ValidateServer(server, version)
-
-    # Load additional configuration data.
-    op_config = {
-      'server': server,
-      'version': version,
-      'http_proxy': http_proxy
-    }
-    return OrderService(headers, self._config, op_config, self.__lock,
-                        self.__logger)
+    return self.__GetService(OrderService, server, version, http_proxy)
 
   def GetPlacementService(self, server='https://sandbox.google.com',
                           version=None, http_proxy=None):
@@ -552,23 +647,9 @@ class DfpClient(Client):
       http_proxy: str HTTP proxy to use.
 
     Returns:
-      PlacementService New instance of PlacementService object.
+      PlacementService Shared instance of PlacementService object.
     """
-    headers = self._headers
-
-    if version is None:
-      version = MIN_API_VERSION
-    if Utils.BoolTypeConvert(self._config['strict']):
-      DfpSanityCheck.ValidateServer(server, version)
-
-    # Load additional configuration data.
-    op_config = {
-      'server': server,
-      'version': version,
-      'http_proxy': http_proxy
-    }
-    return PlacementService(headers, self._config, op_config, self.__lock,
-                            self.__logger)
+    return self.__GetService(PlacementService, server, version, http_proxy)
 
   def GetPublisherQueryLanguageService(self,
                                        server='https://sandbox.google.com',
@@ -585,24 +666,11 @@ class DfpClient(Client):
       http_proxy: str HTTP proxy to use.
 
     Returns:
-      PublisherQueryLanguageService New instance of
+      PublisherQueryLanguageService Shared instance of
                                     PublisherQueryLanguageService object.
     """
-    headers = self._headers
-
-    if version is None:
-      version = MIN_API_VERSION
-    if Utils.BoolTypeConvert(self._config['strict']):
-      DfpSanityCheck.ValidateServer(server, version)
-
-    # Load additional configuration data.
-    op_config = {
-      'server': server,
-      'version': version,
-      'http_proxy': http_proxy
-    }
-    return PublisherQueryLanguageService(headers, self._config, op_config,
-                                         self.__lock, self.__logger)
+    return self.__GetService(PublisherQueryLanguageService, server,
+                             version, http_proxy)
 
   def GetReportService(self, server='https://sandbox.google.com',
                        version=None, http_proxy=None):
@@ -618,23 +686,9 @@ class DfpClient(Client):
       http_proxy: str HTTP proxy to use.
 
     Returns:
-      ReportService New instance of ReportService object.
+      ReportService Shared instance of ReportService object.
     """
-    headers = self._headers
-
-    if version is None:
-      version = MIN_API_VERSION
-    if Utils.BoolTypeConvert(self._config['strict']):
-      DfpSanityCheck.ValidateServer(server, version)
-
-    # Load additional configuration data.
-    op_config = {
-      'server': server,
-      'version': version,
-      'http_proxy': http_proxy
-    }
-    return ReportService(headers, self._config, op_config, self.__lock,
-                         self.__logger)
+    return self.__GetService(ReportService, server, version, http_proxy)
 
   def GetUserService(self, server='https://sandbox.google.com', version=None,
                      http_proxy=None):
@@ -650,20 +704,6 @@ class DfpClient(Client):
       http_proxy: str HTTP proxy to use.
 
     Returns:
-      UserService New instance of UserService object.
+      UserService Shared instance of UserService object.
     """
-    headers = self._headers
-
-    if version is None:
-      version = MIN_API_VERSION
-    if Utils.BoolTypeConvert(self._config['strict']):
-      DfpSanityCheck.ValidateServer(server, version)
-
-    # Load additional configuration data.
-    op_config = {
-      'server': server,
-      'version': version,
-      'http_proxy': http_proxy
-    }
-    return UserService(headers, self._config, op_config, self.__lock,
-                       self.__logger)
+    return self.__GetService(UserService, server, version, http_proxy)
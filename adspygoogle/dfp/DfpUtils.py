@@ -19,11 +19,19 @@
 __author__ = 'api.sgrinberg@gmail.com (Stan Grinberg)'
 
 import os
+import threading
 
+from adspygoogle.common import DEFAULT_MAX_WORKERS
+from adspygoogle.common import SanityCheck
 from adspygoogle.common import Utils
+from adspygoogle.common.Errors import Error
 from adspygoogle.common.Errors import ValidationError
+from adspygoogle.common.ThreadPool import ThreadPool
+from adspygoogle.dfp import BATCH_MAX_BYTES
+from adspygoogle.dfp import BATCH_MAX_ENTITIES
 from adspygoogle.dfp import LIB_HOME
 from adspygoogle.dfp import MIN_API_VERSION
+from adspygoogle.dfp.ResultSet import ResultSet
 
 
 def GetCurrencies():
@@ -46,9 +54,75 @@ def GetTimezones():
                                                'timezones.csv'))
 
 
+def __GetStatementMethod(client, service_name, server, version, http_proxy):
+  """Get the Get*ByStatement method of a given service.
+
+  Args:
+    client: Client an instance of Client.
+    service_name: str name of the service to use.
+    server: str API server to access for this API call.
+    version: str API version to use.
+    http_proxy: str HTTP proxy to use.
+
+  Returns:
+    function Bound Get*ByStatement method of the service.
+  """
+  service = eval('client.Get%sService(server, version, http_proxy)'
+                 % service_name)
+  if service_name == 'Inventory':
+    service_name = 'AdUnit'
+  if service_name[-1] == 'y':
+    method_name = service_name[:-1] + 'ies'
+  else:
+    method_name = service_name + 's'
+  method_name = 'Get%sByStatement' % method_name
+  return getattr(service, method_name)
+
+
+def __ValidatePagingArgs(query, page_size):
+  """Validate filter query and page size used for paging through entities.
+
+  Args:
+    query: str a statement filter to apply, if any.
+    page_size: int size of the page to use.
+
+  Returns:
+    int Page size to use.
+  """
+  if page_size <= 0 or page_size > 500:
+    page_size = 500
+
+  if (query and
+      (query.upper().find('LIMIT') > -1 or query.upper().find('OFFSET') > -1)):
+    raise ValidationError('The filter query contains an option that is '
+                          'incompatible with this method.')
+  return page_size
+
+
+def __GetPage(method, query, page_size, offset):
+  """Get a single page of entities.
+
+  Transient failures are retried by the service itself, as set by the
+  'max_retries' config value.
+
+  Args:
+    method: function Bound Get*ByStatement method of a service.
+    query: str a statement filter to apply.
+    page_size: int size of the page to use.
+    offset: int offset of the page.
+
+  Returns:
+    dict Page of entities.
+  """
+  filter_statement = {'query': '%s LIMIT %s OFFSET %s' % (query, page_size,
+                                                          offset)}
+  return method(filter_statement)[0]
+
+
 def GetAllEntitiesByStatement(client, service_name, query='', page_size=500,
                               server='https://sandbox.google.com',
-                              version=MIN_API_VERSION, http_proxy=None):
+                              version=MIN_API_VERSION, http_proxy=None,
+                              max_workers=1):
   """Get all existing entities by statement.
 
   All existing entities are retrived for a given statement and page size. The
@@ -56,6 +130,12 @@ def GetAllEntitiesByStatement(client, service_name, query='', page_size=500,
   be used to fetch companies, creatives, ad units, line items, etc. The results,
   even if they span multiple pages, are grouped into a single list of entities.
 
+  If more than one worker is requested, the first page is fetched on its own
+  to learn the total number of entities, then the remaining pages are fetched
+  concurrently and merged in order. If the first page doesn't tell the total,
+  the remaining pages are fetched one after another. Since pages are fetched
+  by offset, the query should have a stable order (e.g., ORDER BY id).
+
   Args:
     client: Client an instance of Client.
     service_name: str name of the service to use.
@@ -69,38 +149,407 @@ def GetAllEntitiesByStatement(client, service_name, query='', page_size=500,
               to access sandbox site.
     version: str API version to use.
     http_proxy: str HTTP proxy to use.
+    max_workers: int number of pages to fetch at once. The default is to fetch
+                 pages one after another. Failed pages are retried by the
+                 service only if 'max_retries' config value is set, which it
+                 isn't by default, so a single failed page fails the call.
 
   Returns:
     list a list of existing entities.
   """
-  service = eval('client.Get%sService(server, version, http_proxy)'
-                 % service_name)
-  if service_name == 'Inventory':
-    service_name = 'AdUnit'
-  if service_name[-1] == 'y':
-    method_name = service_name[:-1] + 'ies'
-  else:
-    method_name = service_name + 's'
-  method_name = 'Get%sByStatement' % method_name
+  method = __GetStatementMethod(client, service_name, server, version,
+                                http_proxy)
+  page_size = __ValidatePagingArgs(query, page_size)
 
-  if page_size <= 0 or page_size > 500:
-    page_size = 500
+  if max_workers > 1:
+    return __GetAllEntitiesConcurrently(method, query, page_size, max_workers)
 
-  if (query and
-      (query.upper().find('LIMIT') > -1 or query.upper().find('OFFSET') > -1)):
-    raise ValidationError('The filter query contains an option that is '
-                          'incompatible with this method.')
-
-  offset = 0
   all_entities = []
+  for entities in __IterPages(method, query, page_size):
+    all_entities.extend(entities)
+  return all_entities
+
+
+def IterEntitiesByStatement(client, service_name, query='', page_size=500,
+                            server='https://sandbox.google.com',
+                            version=MIN_API_VERSION, http_proxy=None,
+                            by_page=False, prefetch=False):
+  """Iterate over all existing entities by statement.
+
+  Works like GetAllEntitiesByStatement(), except that entities are yielded as
+  each page arrives, instead of being collected into a single list. Only one
+  page is held in memory at a time (two, if prefetching), so very large result
+  sets can be processed with flat memory.
+
+  Args:
+    client: Client an instance of Client.
+    service_name: str name of the service to use.
+    [optional]
+    query: str a statement filter to apply, if any. The default is empty string.
+    page_size: int size of the page to use. If page size is less than 0 or
+               greater than 500, defaults to 500.
+    server: str API server to access for this API call. Possible values
+              are: 'https://www.google.com' for live site and
+              'https://sandbox.google.com' for sandbox. The default behavior is
+              to access sandbox site.
+    version: str API version to use.
+    http_proxy: str HTTP proxy to use.
+    by_page: bool whether to yield whole pages (lists of entities) instead of
+             single entities.
+    prefetch: bool whether to fetch the next page in the background, while the
+              caller is processing the current one.
+
+  Returns:
+    generator Entities, or lists of entities if by_page is set.
+  """
+  method = __GetStatementMethod(client, service_name, server, version,
+                                http_proxy)
+  page_size = __ValidatePagingArgs(query, page_size)
+
+  pages = __IterPages(method, query, page_size, prefetch)
+  if by_page:
+    return pages
+  return __IterEntities(pages)
+
+
+def __IterEntities(pages):
+  """Flatten pages of entities.
+
+  Args:
+    pages: generator Lists of entities.
+
+  Returns:
+    generator Entities.
+  """
+  for entities in pages:
+    for entity in entities:
+      yield entity
+
+
+def __FetchPage(method, query, page_size, offset, holder):
+  """Fetch a single page of entities into a given holder.
+
+  Args:
+    method: function Bound Get*ByStatement method of a service.
+    query: str a statement filter to apply.
+    page_size: int size of the page to use.
+    offset: int offset of the page.
+    holder: list List to append the page's entities, or the error, to.
+  """
+  try:
+    holder.append(__GetPage(method, query, page_size, offset)['results'])
+  except Exception, e:
+    holder.append(e)
+
+
+def __IterPages(method, query, page_size, prefetch=False, offset=0):
+  """Iterate over pages of entities.
+
+  Args:
+    method: function Bound Get*ByStatement method of a service.
+    query: str a statement filter to apply.
+    page_size: int size of the page to use.
+    [optional]
+    prefetch: bool whether to fetch the next page in the background.
+    offset: int offset of the first page.
+
+  Returns:
+    generator Lists of entities.
+  """
+  fetcher = None
   while True:
-    filter_statement = {'query': '%s LIMIT %s OFFSET %s' % (query, page_size,
-                                                            offset)}
-    entities = eval('service.%s(filter_statement)[0][\'results\']'
-                    % method_name)
+    if fetcher is None:
+      entities = __GetPage(method, query, page_size, offset)['results']
+    else:
+      fetcher.join()
+      entities = holder[0]
+      if isinstance(entities, Exception): raise entities
 
-    if not entities: break
-    all_entities.extend(entities)
-    if len(entities) < page_size: break
+    if not entities: return
     offset += page_size
+    fetcher = None
+    if prefetch and len(entities) >= page_size:
+      holder = []
+      fetcher = threading.Thread(target=__FetchPage,
+                                 args=(method, query, page_size, offset,
+                                       holder))
+      fetcher.setDaemon(True)
+      fetcher.start()
+    yield entities
+    if len(entities) < page_size: return
+
+
+def __GetAllEntitiesConcurrently(method, query, page_size, max_workers):
+  """Get all existing entities by statement, fetching pages concurrently.
+
+  Args:
+    method: function Bound Get*ByStatement method of a service.
+    query: str a statement filter to apply.
+    page_size: int size of the page to use.
+    max_workers: int number of pages to fetch at once.
+
+  Returns:
+    list a list of existing entities.
+  """
+  page = __GetPage(method, query, page_size, 0)
+  all_entities = []
+  if not page['results']: return all_entities
+  all_entities.extend(page['results'])
+
+  total = page.get('totalResultSetSize')
+  if not total or int(total) < len(page['results']):
+    # Without a usable total, remaining pages can't be told up front, so they
+    # are fetched one after another until an empty one comes back.
+    for entities in __IterPages(method, query, page_size, offset=page_size):
+      all_entities.extend(entities)
+    return all_entities
+  offsets = range(page_size, int(total), page_size)
+
+  def GetPage(offset):
+    return __GetPage(method, query, page_size, offset)
+
+  for page in ThreadPool(max_workers).Map(GetPage, offsets):
+    if isinstance(page, Exception): raise page
+    if page['results']: all_entities.extend(page['results'])
   return all_entities
+
+
+def IterSelectByStatement(client, query='', page_size=500,
+                          server='https://sandbox.google.com',
+                          version=MIN_API_VERSION, http_proxy=None,
+                          max_workers=1):
+  """Iterate over all rows of a PQL select statement, a page at a time.
+
+  Pages are selected by appending LIMIT and OFFSET to the statement, until a
+  page comes back short. If more than one worker is requested, that many
+  pages are fetched at once, so at most that many pages are held in memory.
+  Since pages are fetched by offset, the query should have a stable order
+  (e.g., ORDER BY Id).
+
+  Args:
+    client: Client an instance of Client.
+    [optional]
+    query: str a PQL select statement, e.g. 'SELECT * FROM City WHERE
+           targetable = true ORDER BY Id'.
+    page_size: int size of the page to use. If page size is less than 0 or
+               greater than 500, defaults to 500.
+    server: str API server to access for this API call. Possible values
+              are: 'https://www.google.com' for live site and
+              'https://sandbox.google.com' for sandbox. The default behavior is
+              to access sandbox site.
+    version: str API version to use.
+    http_proxy: str HTTP proxy to use.
+    max_workers: int number of pages to fetch at once. The default is to fetch
+                 pages one after another.
+
+  Returns:
+    generator ResultSet instances, one per non-empty page.
+  """
+  method = client.GetPublisherQueryLanguageService(server, version,
+                                                   http_proxy).Select
+  page_size = __ValidatePagingArgs(query, page_size)
+  return __IterResultSets(method, query, page_size, max_workers)
+
+
+def __IterResultSets(method, query, page_size, max_workers):
+  """Iterate over pages of rows of a PQL select statement.
+
+  Args:
+    method: function Bound Select method of the service.
+    query: str a PQL select statement.
+    page_size: int size of the page to use.
+    max_workers: int number of pages to fetch at once.
+
+  Returns:
+    generator ResultSet instances, one per non-empty page.
+  """
+  def GetPage(offset):
+    return __GetPage(method, query, page_size, offset)
+
+  pool = ThreadPool(max(max_workers, 1))
+  offset = 0
+  while True:
+    offsets = range(offset, offset + page_size * max(max_workers, 1),
+                    page_size)
+    if len(offsets) == 1:
+      pages = [GetPage(offset)]
+    else:
+      pages = pool.Map(GetPage, offsets)
+    for page in pages:
+      if isinstance(page, Exception): raise page
+      result_set = ResultSet(page)
+      if len(result_set): yield result_set
+      if len(result_set) < page_size: return
+    offset = offsets[-1] + page_size
+
+
+def SelectAllByStatement(client, query='', sink=None, page_size=500,
+                         server='https://sandbox.google.com',
+                         version=MIN_API_VERSION, http_proxy=None,
+                         max_workers=1):
+  """Select all rows of a PQL select statement, streaming them into a sink.
+
+  Works like IterSelectByStatement(), except that pages are handed to a sink
+  as they arrive. Unless the sink is a ResultSet, only the pages currently
+  being fetched are held in memory.
+
+  Args:
+    client: Client an instance of Client.
+    [optional]
+    query: str a PQL select statement.
+    sink: ResultSet/file/function Where to put the rows. A ResultSet is
+          extended with all rows. A file gets the rows written as CSV, with
+          the column labels first. A function is called with each page, as
+          a ResultSet. The default is to collect all rows into a new
+          ResultSet.
+    page_size: int size of the page to use. If page size is less than 0 or
+               greater than 500, defaults to 500.
+    server: str API server to access for this API call. Possible values
+              are: 'https://www.google.com' for live site and
+              'https://sandbox.google.com' for sandbox. The default behavior is
+              to access sandbox site.
+    version: str API version to use.
+    http_proxy: str HTTP proxy to use.
+    max_workers: int number of pages to fetch at once.
+
+  Returns:
+    ResultSet/int The result set that was extended, if sink is a ResultSet or
+                  is not set. Otherwise, number of rows selected.
+  """
+  if sink is None: sink = ResultSet()
+  count = 0
+  for result_set in IterSelectByStatement(client, query, page_size, server,
+                                          version, http_proxy, max_workers):
+    if isinstance(sink, ResultSet):
+      sink.Extend(result_set)
+    elif hasattr(sink, 'write'):
+      result_set.WriteCsv(sink, count == 0)
+    else:
+      sink(result_set)
+    count += len(result_set)
+  if isinstance(sink, ResultSet): return sink
+  return count
+
+
+def __GetXmlSize(obj, name):
+  """Estimate number of bytes a given object takes up in SOAP XML.
+
+  Args:
+    obj: dict/list/str Object to estimate the size of.
+    name: str Name of the element holding the object.
+
+  Returns:
+    int Estimated number of bytes.
+  """
+  if isinstance(obj, dict):
+    size = 0
+    for key in obj:
+      size += __GetXmlSize(obj[key], key)
+  elif isinstance(obj, (list, tuple)):
+    size = 0
+    for item in obj:
+      size += __GetXmlSize(item, name)
+    # List items are elements of their own, there is no element for the list.
+    return size
+  elif isinstance(obj, unicode):
+    size = len(obj.encode('utf-8'))
+  else:
+    size = len(str(obj))
+  # Opening and closing tags, <name></name>.
+  return size + 2 * len(name) + 5
+
+
+def __SplitIntoBatches(entities, max_entities, max_bytes):
+  """Split entities into batches bounded by count and estimated size.
+
+  An entity that is larger than max_bytes on its own ends up in a batch by
+  itself.
+
+  Args:
+    entities: list Entities to split.
+    max_entities: int Maximum number of entities in a batch.
+    max_bytes: int Maximum estimated number of bytes of a batch.
+
+  Returns:
+    list Batches, lists of entities, in order.
+  """
+  batches = []
+  batch = []
+  batch_bytes = 0
+  for entity in entities:
+    size = __GetXmlSize(entity, 'entities')
+    if batch and (len(batch) >= max_entities or
+                  batch_bytes + size > max_bytes):
+      batches.append(batch)
+      batch = []
+      batch_bytes = 0
+    batch.append(entity)
+    batch_bytes += size
+  if batch: batches.append(batch)
+  return batches
+
+
+def MutateEntitiesInBatches(client, service_name, method_name, entities,
+                            max_entities=BATCH_MAX_ENTITIES,
+                            max_bytes=BATCH_MAX_BYTES,
+                            server='https://sandbox.google.com',
+                            version=MIN_API_VERSION, http_proxy=None,
+                            max_workers=DEFAULT_MAX_WORKERS):
+  """Create or update entities in batches, submitted concurrently.
+
+  Entities are split into batches, each of which is sent in a request of its
+  own, via a bulk method such as CreateLineItems or UpdateOrders. The batches
+  are bounded both by the number of entities and by the estimated size of
+  their SOAP XML, so that any number of entities can be passed in one call.
+  Failed batches are not retried, since the server may have applied them.
+
+  Args:
+    client: Client an instance of Client.
+    service_name: str name of the service to use, e.g. 'LineItem'.
+    method_name: str name of the bulk method to call, e.g. 'CreateLineItems'.
+    entities: list entities to pass to the method.
+    [optional]
+    max_entities: int maximum number of entities in a single request.
+    max_bytes: int maximum estimated number of bytes of entities in a single
+               request.
+    server: str API server to access for this API call. Possible values
+              are: 'https://www.google.com' for live site and
+              'https://sandbox.google.com' for sandbox. The default behavior is
+              to access sandbox site.
+    version: str API version to use.
+    http_proxy: str HTTP proxy to use.
+    max_workers: int number of requests to send at once.
+
+  Returns:
+    list results, one for each entity and in the same order. A result is the
+         entity returned by the API or, if the batch of the entity failed, the
+         exception that was raised for the batch.
+  """
+  SanityCheck.ValidateTypes(((entities, list),))
+  if not hasattr(client, 'Get%sService' % service_name):
+    msg = 'Service \'%s\' is not supported.' % service_name
+    raise ValidationError(msg)
+  service = getattr(client, 'Get%sService' % service_name)(server, version,
+                                                           http_proxy)
+  if not hasattr(service, method_name):
+    msg = ('Method \'%s\' is not supported by \'%sService\'.'
+           % (method_name, service_name))
+    raise ValidationError(msg)
+  method = getattr(service, method_name)
+
+  if max_entities < 1: max_entities = 1
+  batches = __SplitIntoBatches(entities, max_entities, max_bytes)
+  responses = ThreadPool(max_workers).Map(method, batches)
+
+  results = []
+  for index in xrange(len(batches)):
+    response = responses[index]
+    if (not isinstance(response, Exception) and
+        len(response) != len(batches[index])):
+      response = Error('Expected %s entities in response to %s, got %s.'
+                       % (len(batches[index]), method_name, len(response)))
+    if isinstance(response, Exception):
+      results.extend([response] * len(batches[index]))
+    else:
+      results.extend(response)
+  return results
@@ -18,13 +18,16 @@
 
 __author__ = 'api.sgrinberg@gmail.com (Stan Grinberg)'
 
+import os
 import time
 
 from adspygoogle.common import SOAPPY
 from adspygoogle.common import Utils
 from adspygoogle.common.Errors import Error
+from adspygoogle.common.Errors import TransportError
 from adspygoogle.common.WebService import WebService
 from adspygoogle.dfp import DfpSanityCheck
+from adspygoogle.dfp import AUTH_TOKEN_CACHE_NAME
 from adspygoogle.dfp import AUTH_TOKEN_EXPIRE
 from adspygoogle.dfp import AUTH_TOKEN_SERVICE
 from adspygoogle.dfp import LIB_SIG
@@ -32,6 +35,7 @@ from adspygoogle.dfp import LIB_URL
 from adspygoogle.dfp.DfpErrors import ERRORS
 from adspygoogle.dfp.DfpErrors import DfpApiError
 from adspygoogle.dfp.DfpErrors import DfpError
+from adspygoogle.dfp.DfpErrors import DfpGoogleInternalError
 from adspygoogle.dfp.DfpSoapBuffer import DfpSoapBuffer
 
 
@@ -42,6 +46,13 @@ class DfpWebService(WebService):
   Responsible for sending and recieving SOAP XML requests.
   """
 
+  # Types of cached entities that perform action calls change, besides the
+  # type of the service they are made to. Approving, pausing or resuming an
+  # order also changes status of its line items.
+  __ACTION_ENTITY_TYPES = {
+      'performOrderAction': ('LineItem',)
+  }
+
   def __init__(self, headers, config, op_config, url, lock, logger=None):
     """Inits DfpWebService.
 
@@ -52,7 +63,7 @@ class DfpWebService(WebService):
       op_config: dict Dictionary object with additional configuration values for
                  this operation.
       url: str URL of the web service to call.
-      lock: thread.lock Thread lock.
+      lock: thread.lock Thread lock guarding shared authentication state.
       logger: Logger Instance of Logger
     """
     self.__config = config
@@ -71,6 +82,16 @@ class DfpWebService(WebService):
       error: dict Error, if any.
     """
     try:
+      # Service name is looked up in the caller stack, thus has to be fetched
+      # here rather than when the log data is built.
+      service_name = buf.GetServiceName()
+
+      def GetRequestInfo():
+        return str('host=%s service=%s method=%s responseTime=%s requestId=%s'
+                   % (Utils.GetNetLocFromUrl(self._url), service_name,
+                      buf.GetCallName(), buf.GetCallResponseTime(),
+                      buf.GetCallRequestId()))
+
       # Set up log handlers.
       handlers = [
           {
@@ -81,11 +102,7 @@ class DfpWebService(WebService):
           {
               'tag': 'request_log',
               'name': 'request_info',
-              'data': str('host=%s service=%s method=%s responseTime=%s '
-                          'requestId=%s'
-                          % (Utils.GetNetLocFromUrl(self._url),
-                             buf.GetServiceName(), buf.GetCallName(),
-                             buf.GetCallResponseTime(), buf.GetCallRequestId()))
+              'data': GetRequestInfo
           },
           {
               'tag': '',
@@ -118,6 +135,86 @@ class DfpWebService(WebService):
       if error: e = error
       raise Error(e)
 
+  def __IsRetryable(self, method_name, error):
+    """Return whether a failed API call is safe and worth retrying.
+
+    Args:
+      method_name: str Name of the API method that failed.
+      error: obj Error raised for the API call, or its response.
+
+    Returns:
+      bool True if the call can be repeated, False otherwise.
+    """
+    # Quota errors are raised before the request is applied, so the call can
+    # be repeated, whatever it does.
+    if isinstance(error, DfpApiError):
+      for detail in error.errors or []:
+        if getattr(detail, 'type', None) == 'QuotaError': return True
+    # Internal and server-busy API errors go away on their own, so do
+    # transport errors and 5xx pages. But the server may have applied the call
+    # before failing, thus only calls that don't change anything, like get*()
+    # calls and polling of report jobs, are repeated.
+    if not (method_name.startswith('get') or method_name == 'select'):
+      return False
+    return isinstance(error, (DfpGoogleInternalError, TransportError))
+
+  def __GetEntityIds(self, params):
+    """Return IDs of entities passed to an update call.
+
+    Args:
+      params: list List of parameters sent to the API method.
+
+    Returns:
+      list IDs of the entities. None, if some entity can't be told by its ID,
+           which is also the case for parameters packed as XML.
+    """
+    if not isinstance(params, tuple) or len(params) != 1: return None
+    if not isinstance(params[0], dict) or len(params[0]) != 1: return None
+    entities = params[0].values()[0]
+    if not isinstance(entities, list): entities = [entities]
+    entity_ids = []
+    for entity in entities:
+      if not isinstance(entity, dict) or not entity.get('id'): return None
+      entity_ids.append(str(entity['id']))
+    return entity_ids
+
+  def __InvalidateEntities(self, method_name, params):
+    """Drop cached entities that a given API call may have changed.
+
+    Update calls drop the entities they were given, in all API versions, or
+    every entity of the type if some of them can't be told by ID. Perform
+    action calls drop every entity of the type, and of the types the action
+    changes along with it, since only the server knows which entities the
+    action applied to. Create calls don't drop anything, a new entity can't
+    be in the cache yet.
+
+    Args:
+      method_name: str API method name.
+      params: list List of parameters sent to the API method.
+    """
+    entity_cache = self.__op_config.get('entity_cache')
+    if entity_cache is None: return
+    if method_name.startswith('update'):
+      entity_ids = self.__GetEntityIds(params)
+    elif method_name.startswith('perform'):
+      entity_ids = None
+    else:
+      return
+    entity_type = self._url.split('/')[-1][:-len('Service')]
+    if entity_type == 'Inventory': entity_type = 'AdUnit'
+    other_types = self.__ACTION_ENTITY_TYPES.get(method_name, ())
+    network = self._headers.get('networkCode')
+
+    # Keys are (network, version, type, id), see
+    # ApiService._GetEntityCacheKey().
+    def Matches(key):
+      if key[0] != network: return False
+      if key[2] in other_types: return True
+      return (key[2] == entity_type and
+              (entity_ids is None or key[3] in entity_ids))
+
+    entity_cache.InvalidateMatching(Matches)
+
   def CallMethod(self, method_name, params, service_name=None, loc=None,
                  request=None):
     """Make an API call to specified method.
@@ -134,54 +231,74 @@ class DfpWebService(WebService):
       tuple/str Response from the API method. If 'raw_response' flag enabled a
                 string is returned, tuple otherwise.
     """
-    # Acquire thread lock.
+    # Load/set authentication token. If authentication token has expired,
+    # regenerate it. The thread lock only guards authentication data shared by
+    # all services of a client, the API request itself is made without it.
     self._lock.acquire()
-
     try:
-      headers = self._headers
-      config = self._config
-      config['data_injects'] = ()
-      error = {}
-
-      # Load/set authentication token. If authentication token has expired,
-      # regenerate it.
       now = time.time()
-      if ((('authToken' not in headers and
-            'auth_token_epoch' not in config) or
-           int(now - config['auth_token_epoch']) >= AUTH_TOKEN_EXPIRE)):
-        headers['authToken'] = Utils.GetAuthToken(
-            headers['email'], headers['password'], AUTH_TOKEN_SERVICE,
-            LIB_SIG, config['proxy'])
-        config['auth_token_epoch'] = time.time()
-        self._headers = headers
-        self._config = config
-
-      headers = Utils.UnLoadDictKeys(Utils.CleanUpDict(headers),
-                                     ['email', 'password'])
-      name_space = '/'.join(['https://www.google.com/apis/ads/publisher',
-                             self._op_config['version']])
-      config['ns_target'] = (name_space, 'RequestHeader')
-
-      # Load new authentication headers, starting with version v201103.
-      data_injects = []
-      if self.__op_config['version'] > 'v201101':
-        new_headers = {}
-        for key in headers:
-          if key == 'authToken' and headers[key]:
-            if config['soap_lib'] == SOAPPY:
-              data_injects.append(
-                  ('<authentication>',
-                   '<authentication xsi3:type="ClientLogin">'))
-              config['data_injects'] = tuple(data_injects)
-            else:
-              config['auth_type'] = 'ClientLogin'
-            new_headers['authentication'] = {'token': headers['authToken']}
-          elif key == 'oAuthToken' and headers[key]:
-            # TODO(api.sgrinberg): Add support for OAuth.
-            pass
+      if (Utils.BoolTypeConvert(self._config['auth_token_cache']) and
+          'email' in self._headers and 'password' in self._headers):
+        # Cache hands out its current token and, once the token is close to
+        # expiring, starts a refresh in background. This only waits for a
+        # login if the token is missing or has expired.
+        self._headers['authToken'], self._config['auth_token_epoch'] = (
+            Utils.GetCachedAuthToken(
+                self._headers['email'], self._headers['password'],
+                AUTH_TOKEN_SERVICE, LIB_SIG, self._config['proxy'],
+                os.path.join(self._config['home'], AUTH_TOKEN_CACHE_NAME),
+                AUTH_TOKEN_EXPIRE))
+      elif ((('authToken' not in self._headers and
+              'auth_token_epoch' not in self._config) or
+             int(now - self._config['auth_token_epoch']) >=
+             AUTH_TOKEN_EXPIRE)):
+        self._headers['authToken'] = Utils.GetAuthToken(
+            self._headers['email'], self._headers['password'],
+            AUTH_TOKEN_SERVICE, LIB_SIG, self._config['proxy'])
+        self._config['auth_token_epoch'] = time.time()
+      headers = self._headers.copy()
+    finally:
+      self._lock.release()
+
+    # Values below are specific to this API call. Set them on a copy of the
+    # configuration, so that they don't leak into calls made by other threads.
+    config = self._config.copy()
+    config['data_injects'] = ()
+
+    headers = Utils.UnLoadDictKeys(Utils.CleanUpDict(headers),
+                                   ['email', 'password'])
+    name_space = '/'.join(['https://www.google.com/apis/ads/publisher',
+                           self._op_config['version']])
+    config['ns_target'] = (name_space, 'RequestHeader')
+
+    # Load new authentication headers, starting with version v201103.
+    data_injects = []
+    if self.__op_config['version'] > 'v201101':
+      new_headers = {}
+      for key in headers:
+        if key == 'authToken' and headers[key]:
+          if config['soap_lib'] == SOAPPY:
+            data_injects.append(
+                ('<authentication>',
+                 '<authentication xsi3:type="ClientLogin">'))
+            config['data_injects'] = tuple(data_injects)
           else:
-            new_headers[key] = headers[key]
-        headers = new_headers
+            config['auth_type'] = 'ClientLogin'
+          new_headers['authentication'] = {'token': headers['authToken']}
+        elif key == 'oAuthToken' and headers[key]:
+          # TODO(api.sgrinberg): Add support for OAuth.
+          pass
+        else:
+          new_headers[key] = headers[key]
+      headers = new_headers
+
+    # Transient failures are retried, each attempt being logged on its own.
+    max_retries = int(self._config['max_retries'])
+    attempt = 0
+    rate_limiter = self._op_config.get('rate_limiter')
+    while True:
+      # Every attempt is a request of its own, thus counts against the rate.
+      if rate_limiter is not None: rate_limiter.Acquire()
 
       buf = DfpSoapBuffer(
           xml_parser=self._config['xml_parser'],
@@ -205,18 +322,31 @@ class DfpWebService(WebService):
                         'frequencyCaps', 'creativeSizes')))
         response = tuple(holder)
 
+      error = {}
       if isinstance(response, dict) or isinstance(response, Error):
         error = response
 
-      if not Utils.BoolTypeConvert(self.__config['raw_debug']):
+      if Utils.BoolTypeConvert(self.__config['raw_debug']): break
+      try:
         self.__ManageSoap(buf, start_time, stop_time, error)
-    finally:
-      # Release thread lock.
-      if self._lock.locked():
-        self._lock.release()
-
-    if Utils.BoolTypeConvert(self._config['raw_response']):
-      return response
+      except Error, e:
+        if attempt >= max_retries or not self.__IsRetryable(method_name, e):
+          self.__InvalidateEntities(method_name, params)
+          raise
+      else:
+        # Errors that occur before SOAP layer is reached are returned, rather
+        # than raised.
+        if (attempt >= max_retries or
+            not self.__IsRetryable(method_name, response)):
+          break
+      time.sleep(Utils.GetBackoffDelay(
+          attempt, float(self._config['retry_initial_delay']),
+          float(self._config['retry_max_delay'])))
+      attempt += 1
+
+    # Entities are dropped whether or not the call succeeded, since the server
+    # may have applied it anyway.
+    self.__InvalidateEntities(method_name, params)
     return response
 
   def CallRawMethod(self, soap_message):
@@ -228,21 +358,13 @@ class DfpWebService(WebService):
     Returns:
       tuple Response from the API method.
     """
-    # Acquire thread lock.
-    self._lock.acquire()
-
-    try:
-      buf = DfpSoapBuffer(
-          xml_parser=self._config['xml_parser'],
-          pretty_xml=Utils.BoolTypeConvert(self._config['pretty_xml']))
+    buf = DfpSoapBuffer(
+        xml_parser=self._config['xml_parser'],
+        pretty_xml=Utils.BoolTypeConvert(self._config['pretty_xml']))
 
-      super(DfpWebService, self).CallRawMethod(
-          buf, Utils.GetNetLocFromUrl(self._op_config['server']), soap_message)
+    super(DfpWebService, self).CallRawMethod(
+        buf, Utils.GetNetLocFromUrl(self._op_config['server']), soap_message)
 
-      self.__ManageSoap(buf, self._start_time, self._stop_time,
-                        {'data': buf.GetBufferAsStr()})
-    finally:
-      # Release thread lock.
-      if self._lock.locked():
-        self._lock.release()
+    self.__ManageSoap(buf, self._start_time, self._stop_time,
+                      {'data': buf.GetBufferAsStr()})
     return (self._response,)
@@ -0,0 +1,379 @@
+#!/usr/bin/python
+#
+# Copyright 2011 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Local SQLite mirror of DFP entities, kept up to date incrementally."""
+
+__author__ = 'api.sgrinberg@gmail.com (Stan Grinberg)'
+
+import os
+import pickle
+import time
+try:
+  import sqlite3
+except ImportError:
+  try:
+    # Python 2.4 ships without sqlite3, but pysqlite provides the same API.
+    from pysqlite2 import dbapi2 as sqlite3
+  except ImportError:
+    sqlite3 = None
+
+from adspygoogle.common.Errors import MissingPackageError
+from adspygoogle.common.Errors import ValidationError
+from adspygoogle.dfp import DfpUtils
+from adspygoogle.dfp import MIN_API_VERSION
+from adspygoogle.dfp import MIRROR_NAME
+from adspygoogle.dfp.PqlEvaluator import PqlEvaluator
+
+
+class EntityMirror(object):
+
+  """Implements EntityMirror.
+
+  Keeps copies of DFP entities in a local SQLite database, one per network, so
+  that dashboards and lookups can be served without making API requests. Each
+  entity type has its own table, holding the pickled entity next to indexed
+  columns for the fields it is usually looked up by.
+
+  The first sync of a type loads all of its entities. Later syncs only fetch
+  entities at or above the high-water mark stored for the type, and upsert
+  them a page per transaction together with the new mark. API versions
+  supported by this library can't filter entities by time of last change, so
+  the mark is the highest ID seen, which picks up new entities. Changes to
+  entities that are already mirrored are picked up by a full sync, which also
+  drops entities that the API no longer returns.
+
+  Types keyed by more than one field, like line item creative associations,
+  have no mark that new entities are bound to land above (a new association
+  may belong to an older line item), so they are always synced in full.
+
+  A mirror must only be used from the thread that created it.
+  """
+
+  # Tables of the mirror, keyed by name of the service the entities come
+  # from. Each entry holds name of the table, fields that identify an entity
+  # and other fields to index. The key field of types with a single one is
+  # the high-water mark.
+  __TABLES = {
+      'Company': ('company', ('id',), ('type', 'name')),
+      'Creative': ('creative', ('id',), ('advertiserId',)),
+      'Inventory': ('ad_unit', ('id',), ('parentId', 'status')),
+      'LineItem': ('line_item', ('id',), ('orderId', 'status')),
+      'LineItemCreativeAssociation': ('lica', ('lineItemId', 'creativeId'),
+                                      ('creativeId', 'status')),
+      'Order': ('orders', ('id',), ('advertiserId', 'status')),
+      'Placement': ('placement', ('id',), ('status',)),
+      'User': ('user', ('id',), ('email', 'roleId'))
+  }
+
+  def __init__(self, client, path=None, server='https://sandbox.google.com',
+               version=MIN_API_VERSION, http_proxy=None):
+    """Inits EntityMirror.
+
+    Args:
+      client: DfpClient Client to fetch entities with.
+      [optional]
+      path: str Absolute path to the database. Defaults to a file named after
+            client's network code in client's home directory.
+      server: str API server to access for this API call. Possible values
+              are: 'https://www.google.com' for live site and
+              'https://sandbox.google.com' for sandbox. The default behavior is
+              to access sandbox site.
+      version: str API version to use.
+      http_proxy: str HTTP proxy to use.
+    """
+    if sqlite3 is None:
+      msg = ('Entity mirror requires sqlite3 module, or pysqlite2 on Python '
+             '2.4. Please install it.')
+      raise MissingPackageError(msg)
+
+    if path is None:
+      network_code = client.GetAuthCredentials().get('networkCode')
+      if not network_code:
+        msg = 'Network code is required to name the entity mirror.'
+        raise ValidationError(msg)
+      path = os.path.join(client.GetConfigValues()['home'],
+                          MIRROR_NAME % network_code)
+    self.__client = client
+    self.__server = server
+    self.__version = version
+    self.__http_proxy = http_proxy
+    self.__evaluators = {}
+    self.__conn = sqlite3.connect(path)
+    self.__CreateTables()
+
+  def __CreateTables(self):
+    """Create tables and indexes of the mirror, if they don't exist yet."""
+    statements = ['CREATE TABLE IF NOT EXISTS sync_state (entity_type TEXT '
+                  'PRIMARY KEY, mark INTEGER, synced REAL)']
+    for service_name in self.__TABLES:
+      table, keys, indexes = self.__TABLES[service_name]
+      columns = []
+      for key in keys:
+        columns.append('"%s" INTEGER' % key)
+      for field in indexes:
+        if field not in keys:
+          columns.append('"%s" NUMERIC' % field)
+      statements.append(
+          'CREATE TABLE IF NOT EXISTS "%s" (%s, entity BLOB, synced REAL, '
+          'PRIMARY KEY (%s))' % (table, ', '.join(columns),
+                                 ', '.join(['"%s"' % key for key in keys])))
+      for field in indexes:
+        statements.append('CREATE INDEX IF NOT EXISTS "%s_%s" ON "%s" ("%s")'
+                          % (table, field, table, field))
+    for statement in statements:
+      self.__conn.execute(statement)
+    self.__conn.commit()
+
+  def __GetTable(self, service_name):
+    """Return definition of the table for a given service.
+
+    Args:
+      service_name: str Name of the service the entities come from.
+
+    Returns:
+      tuple Name of the table, key fields and indexed fields.
+    """
+    if service_name not in self.__TABLES:
+      msg = ('Entities of \'%s\' service can\'t be mirrored. Supported '
+             'services are %s.' % (service_name, sorted(self.__TABLES.keys())))
+      raise ValidationError(msg)
+    return self.__TABLES[service_name]
+
+  def __GetColumns(self, service_name):
+    """Return columns of the table for a given service, other than entity.
+
+    Args:
+      service_name: str Name of the service the entities come from.
+
+    Returns:
+      list Names of the columns, key fields first.
+    """
+    table, keys, indexes = self.__GetTable(service_name)
+    columns = list(keys)
+    for field in indexes:
+      if field not in columns:
+        columns.append(field)
+    return columns
+
+  def __Upsert(self, service_name, entities, mark, synced):
+    """Insert or replace given entities and move the high-water mark.
+
+    Entities and the mark are written in a single transaction.
+
+    Args:
+      service_name: str Name of the service the entities come from.
+      entities: list Entities to write.
+      mark: int Current high-water mark, None if there is none yet.
+      synced: float Time the sync started at.
+
+    Returns:
+      int New high-water mark.
+    """
+    table = self.__GetTable(service_name)[0]
+    columns = self.__GetColumns(service_name)
+    rows = []
+    for entity in entities:
+      row = []
+      for column in columns:
+        row.append(entity.get(column))
+      row.append(sqlite3.Binary(pickle.dumps(entity, pickle.HIGHEST_PROTOCOL)))
+      row.append(synced)
+      rows.append(row)
+      if entity.get(columns[0]) is not None:
+        value = long(entity[columns[0]])
+        if mark is None or value > mark: mark = value
+
+    try:
+      self.__conn.executemany(
+          'INSERT OR REPLACE INTO "%s" (%s, entity, synced) VALUES (%s)'
+          % (table, ', '.join(['"%s"' % column for column in columns]),
+             ', '.join(['?'] * (len(columns) + 2))), rows)
+      self.__conn.execute('INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?)',
+                          (service_name, mark, synced))
+      self.__conn.commit()
+    except Exception:
+      self.__conn.rollback()
+      raise
+    return mark
+
+  def Sync(self, service_name, full=False, page_size=500):
+    """Bring entities of a given type up to date with the API.
+
+    Args:
+      service_name: str Name of the service the entities come from, e.g.
+                    'LineItem'.
+      [optional]
+      full: bool Whether to fetch all entities, rather than only those at or
+            above the high-water mark. Entities that were not fetched are
+            dropped from the mirror. Types keyed by more than one field are
+            always synced in full.
+      page_size: int Size of the page to use.
+
+    Returns:
+      int Number of entities fetched.
+    """
+    table, keys = self.__GetTable(service_name)[:2]
+    if len(keys) > 1: full = True
+    mark = None
+    if not full:
+      state = self.GetSyncState(service_name)
+      if state is not None: mark = state['mark']
+    query = 'ORDER BY %s' % keys[0]
+    if mark is not None:
+      query = 'WHERE %s >= %s %s' % (keys[0], mark, query)
+
+    synced = time.time()
+    count = 0
+    self.__evaluators.pop(service_name, None)
+    for entities in DfpUtils.IterEntitiesByStatement(
+        self.__client, service_name, query, page_size, self.__server,
+        self.__version, self.__http_proxy, by_page=True, prefetch=True):
+      mark = self.__Upsert(service_name, entities, mark, synced)
+      count += len(entities)
+
+    if full:
+      try:
+        self.__conn.execute('DELETE FROM "%s" WHERE synced < ?' % table,
+                            (synced,))
+        self.__conn.execute('INSERT OR REPLACE INTO sync_state VALUES '
+                            '(?, ?, ?)', (service_name, mark, synced))
+        self.__conn.commit()
+      except Exception:
+        self.__conn.rollback()
+        raise
+    return count
+
+  def SyncAll(self, service_names=None, full=False, page_size=500):
+    """Bring entities of given types up to date with the API.
+
+    Args:
+      [optional]
+      service_names: list Names of the services the entities come from.
+                     Defaults to all supported services.
+      full: bool Whether to fetch all entities, see Sync().
+      page_size: int Size of the page to use.
+
+    Returns:
+      dict Number of entities fetched, keyed by name of the service.
+    """
+    if service_names is None:
+      service_names = sorted(self.__TABLES.keys())
+    counts = {}
+    for service_name in service_names:
+      counts[service_name] = self.Sync(service_name, full, page_size)
+    return counts
+
+  def GetSyncState(self, service_name):
+    """Return state of the last sync of a given type.
+
+    Args:
+      service_name: str Name of the service the entities come from.
+
+    Returns:
+      dict High-water mark ('mark') and the time the last sync started at
+           ('synced'). None, if entities were never synced.
+    """
+    self.__GetTable(service_name)
+    row = self.__conn.execute(
+        'SELECT mark, synced FROM sync_state WHERE entity_type = ?',
+        (service_name,)).fetchone()
+    if row is None: return None
+    return {'mark': row[0], 'synced': row[1]}
+
+  def GetEntity(self, service_name, key):
+    """Return a mirrored entity.
+
+    Args:
+      service_name: str Name of the service the entity comes from.
+      key: str/tuple ID of the entity, or a tuple of values of its key fields
+           (e.g., (lineItemId, creativeId) for line item creative
+           associations).
+
+    Returns:
+      dict Entity, None if it is not in the mirror.
+    """
+    table, keys = self.__GetTable(service_name)[:2]
+    if not isinstance(key, tuple): key = (key,)
+    if len(key) != len(keys):
+      msg = 'Key must have values of fields %s.' % (keys,)
+      raise ValidationError(msg)
+    row = self.__conn.execute(
+        'SELECT entity FROM "%s" WHERE %s' % (
+            table, ' AND '.join(['"%s" = ?' % field for field in keys])),
+        key).fetchone()
+    if row is None: return None
+    return pickle.loads(str(row[0]))
+
+  def GetEntities(self, service_name, filters=None):
+    """Return mirrored entities that match given filters.
+
+    Args:
+      service_name: str Name of the service the entities come from.
+      [optional]
+      filters: dict Values to match, keyed by field. Only key and indexed
+               fields can be filtered on, e.g. {'orderId': '12345'} for line
+               items.
+
+    Returns:
+      list Matching entities, ordered by key.
+    """
+    table, keys = self.__GetTable(service_name)[:2]
+    columns = self.__GetColumns(service_name)
+    if filters is None: filters = {}
+    conditions = []
+    values = []
+    for field in filters:
+      if field not in columns:
+        msg = ('Field \'%s\' can\'t be filtered on. Supported fields are %s.'
+               % (field, columns))
+        raise ValidationError(msg)
+      conditions.append('"%s" = ?' % field)
+      values.append(filters[field])
+    query = 'SELECT entity FROM "%s"' % table
+    if conditions:
+      query += ' WHERE %s' % ' AND '.join(conditions)
+    query += ' ORDER BY %s' % ', '.join(['"%s"' % key for key in keys])
+    entities = []
+    for row in self.__conn.execute(query, values):
+      entities.append(pickle.loads(str(row[0])))
+    return entities
+
+  def GetEntitiesByStatement(self, service_name, filter_statement):
+    """Return mirrored entities that match a given filter statement.
+
+    Statements are evaluated locally by a PqlEvaluator, which holds all
+    mirrored entities of the type in memory, indexed on key and indexed
+    fields, until the next sync of the type.
+
+    Args:
+      service_name: str Name of the service the entities come from.
+      filter_statement: dict Filter statement, as for Get*ByStatement()
+                        methods of services.
+
+    Returns:
+      tuple Page of matching entities, in the same form Get*ByStatement()
+            methods of services return it.
+    """
+    evaluator = self.__evaluators.get(service_name)
+    if evaluator is None:
+      evaluator = PqlEvaluator(self.GetEntities(service_name),
+                               self.__GetColumns(service_name))
+      self.__evaluators[service_name] = evaluator
+    return evaluator.GetEntitiesByStatement(filter_statement)
+
+  def Close(self):
+    """Close the database of the mirror."""
+    self.__conn.close()
@@ -112,17 +112,23 @@ class InventoryService(ApiService):
     """
     SanityCheck.ValidateTypes(((ad_unit_id, (str, unicode)),))
 
+    cache_key = self._GetEntityCacheKey('AdUnit', ad_unit_id)
+    (response, generation) = self._GetCachedEntity(cache_key)
+    if response is not None: return response
+
     method_name = 'getAdUnit'
     if self._config['soap_lib'] == SOAPPY:
       from adspygoogle.dfp.soappy import OBJ_KEY_ORDER_MAP
       ad_unit_id = self._message_handler.PackDictAsXml(
           ad_unit_id, 'adUnitId', OBJ_KEY_ORDER_MAP)
-      return self.__service.CallMethod(method_name, (ad_unit_id))
+      response = self.__service.CallMethod(method_name, (ad_unit_id))
     elif self._config['soap_lib'] == ZSI:
       request = eval('self._web_services.%sRequest()' % method_name)
-      return self.__service.CallMethod(method_name,
-                                       (({'adUnitId': ad_unit_id},)),
-                                       'Inventory', self._loc, request)
+      response = self.__service.CallMethod(method_name,
+                                           (({'adUnitId': ad_unit_id},)),
+                                           'Inventory', self._loc, request)
+    self._CacheEntity(cache_key, response, generation)
+    return response
 
   def GetAdUnitsByStatement(self, filter_statement):
     """Return the ad units that match the given statement.
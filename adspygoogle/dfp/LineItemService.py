@@ -114,17 +114,23 @@ class LineItemService(ApiService):
     """
     SanityCheck.ValidateTypes(((line_item_id, (str, unicode)),))
 
+    cache_key = self._GetEntityCacheKey('LineItem', line_item_id)
+    (response, generation) = self._GetCachedEntity(cache_key)
+    if response is not None: return response
+
     method_name = 'getLineItem'
     if self._config['soap_lib'] == SOAPPY:
       from adspygoogle.dfp.soappy import OBJ_KEY_ORDER_MAP
       line_item_id = self._message_handler.PackDictAsXml(
           line_item_id, 'lineItemId', OBJ_KEY_ORDER_MAP)
-      return self.__service.CallMethod(method_name, (line_item_id))
+      response = self.__service.CallMethod(method_name, (line_item_id))
     elif self._config['soap_lib'] == ZSI:
       request = eval('self._web_services.%sRequest()' % method_name)
-      return self.__service.CallMethod(method_name,
-                                       (({'lineItemId': line_item_id},)),
-                                       'LineItem', self._loc, request)
+      response = self.__service.CallMethod(method_name,
+                                           (({'lineItemId': line_item_id},)),
+                                           'LineItem', self._loc, request)
+    self._CacheEntity(cache_key, response, generation)
+    return response
 
   def GetLineItemsByStatement(self, filter_statement):
     """Return the line items that match the given statement.
@@ -111,16 +111,23 @@ class OrderService(ApiService):
     """
     SanityCheck.ValidateTypes(((order_id, (str, unicode)),))
 
+    cache_key = self._GetEntityCacheKey('Order', order_id)
+    (response, generation) = self._GetCachedEntity(cache_key)
+    if response is not None: return response
+
     method_name = 'getOrder'
     if self._config['soap_lib'] == SOAPPY:
       from adspygoogle.dfp.soappy import OBJ_KEY_ORDER_MAP
       order_id = self._message_handler.PackDictAsXml(order_id, 'orderId',
           OBJ_KEY_ORDER_MAP)
-      return self.__service.CallMethod(method_name, (order_id))
+      response = self.__service.CallMethod(method_name, (order_id))
     elif self._config['soap_lib'] == ZSI:
       request = eval('self._web_services.%sRequest()' % method_name)
-      return self.__service.CallMethod(method_name, (({'orderId': order_id},)),
-                                       'Order', self._loc, request)
+      response = self.__service.CallMethod(method_name,
+                                           (({'orderId': order_id},)),
+                                           'Order', self._loc, request)
+    self._CacheEntity(cache_key, response, generation)
+    return response
 
   def GetOrdersByStatement(self, filter_statement):
     """Return the orders that match the given statement.
@@ -0,0 +1,610 @@
+#!/usr/bin/python
+#
+# Copyright 2011 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Local evaluation of PQL statements over collections of entities."""
+
+__author__ = 'api.sgrinberg@gmail.com (Stan Grinberg)'
+
+import operator
+import re
+
+from adspygoogle.common.Errors import ValidationError
+
+
+class PqlEvaluator(object):
+
+  """Implements PqlEvaluator.
+
+  Runs filter statements, in the form Get*ByStatement() methods accept,
+  against a collection of entities held locally, e.g. fetched earlier or read
+  from an EntityMirror. Supported are WHERE conditions that combine
+  comparisons, IN, LIKE and IS NULL with AND, OR, NOT and parentheses, as well
+  as ORDER BY, LIMIT and OFFSET. Bind variables are taken from statement's
+  'params' or 'values'.
+
+  Equality and IN conditions on indexed fields are answered from hash indexes,
+  built on first use, rather than by scanning all entities. Parsed statements
+  are kept, so running the same query again with other bind variables skips
+  the parsing.
+  """
+
+  __TOKEN = re.compile(
+      r"\s*(?:(?P<string>'(?:[^'\\]|\\.|'')*')|"
+      r"(?P<number>-?\d+(?:\.\d+)?)|(?P<param>:\w+)|"
+      r"(?P<op><>|!=|<=|>=|=|<|>|\(|\)|,|\*)|(?P<word>[A-Za-z_][\w.]*))")
+  __NUMBER = re.compile(r'-?\d+(?:\.\d+)?$')
+  __OPERATORS = {
+      '=': operator.eq,
+      '!=': operator.ne,
+      '<>': operator.ne,
+      '<': operator.lt,
+      '<=': operator.le,
+      '>': operator.gt,
+      '>=': operator.ge
+  }
+  # Maximum number of parsed statements to keep.
+  __MAX_STATEMENTS = 100
+
+  def __init__(self, entities, indexed_fields=None):
+    """Inits PqlEvaluator.
+
+    Args:
+      entities: list Entities to run statements against. Entities are not
+                copied, results hold the same objects.
+      [optional]
+      indexed_fields: list Fields to build hash indexes on. Defaults to 'id'
+                      and fields that reference other entities, i.e. whose
+                      name ends with 'Id'.
+    """
+    self.__entities = list(entities)
+    self.__indexed_fields = indexed_fields
+    self.__indexes = {}
+    self.__statements = {}
+
+  def __Tokenize(self, query):
+    """Split a PQL statement into tokens.
+
+    Args:
+      query: str PQL statement.
+
+    Returns:
+      list Tokens, (kind, value), in reverse order.
+    """
+    tokens = []
+    query = query.rstrip()
+    pos = 0
+    while pos < len(query):
+      match = self.__TOKEN.match(query, pos)
+      if match is None:
+        msg = ('Unexpected character at position %s of PQL statement \'%s\'.'
+               % (pos, query))
+        raise ValidationError(msg)
+      kind = match.lastgroup
+      value = match.group(kind)
+      if kind == 'string':
+        value = re.sub(r"\\(.)|''", self.__Unescape, value[1:-1])
+      elif kind == 'number':
+        value = self.__ToNumber(value)
+      elif kind == 'param':
+        value = value[1:]
+      tokens.append((kind, value))
+      pos = match.end()
+    tokens.reverse()
+    return tokens
+
+  def __Unescape(self, match):
+    """Return the character an escape sequence in a string literal stands for.
+
+    Args:
+      match: MatchObject Escape sequence.
+
+    Returns:
+      str Escaped character.
+    """
+    return match.group(1) or '\''
+
+  def __ToNumber(self, value):
+    """Convert a given string into a number.
+
+    Args:
+      value: str Number.
+
+    Returns:
+      long/float Converted number.
+    """
+    try:
+      return long(value)
+    except ValueError:
+      return float(value)
+
+  def __IsKeyword(self, tokens, keyword):
+    """Return whether the next token is a given keyword.
+
+    Args:
+      tokens: list Remaining tokens, in reverse order.
+      keyword: str Keyword, in upper case.
+
+    Returns:
+      bool True if the next token is the keyword, False otherwise.
+    """
+    return (tokens and tokens[-1][0] == 'word' and
+            tokens[-1][1].upper() == keyword)
+
+  def __AcceptKeyword(self, tokens, keyword):
+    """Consume the next token if it is a given keyword.
+
+    Args:
+      tokens: list Remaining tokens, in reverse order.
+      keyword: str Keyword, in upper case.
+
+    Returns:
+      bool True if the keyword was consumed, False otherwise.
+    """
+    if not self.__IsKeyword(tokens, keyword): return False
+    tokens.pop()
+    return True
+
+  def __AcceptOp(self, tokens, op):
+    """Consume the next token if it is a given operator or punctuation.
+
+    Args:
+      tokens: list Remaining tokens, in reverse order.
+      op: str Operator or punctuation.
+
+    Returns:
+      bool True if the operator was consumed, False otherwise.
+    """
+    if not tokens or tokens[-1] != ('op', op): return False
+    tokens.pop()
+    return True
+
+  def __Expect(self, accepted, tokens, expected):
+    """Raise an error unless the expected token was consumed.
+
+    Args:
+      accepted: bool Whether the expected token was consumed.
+      tokens: list Remaining tokens, in reverse order.
+      expected: str Description of the expected token.
+    """
+    if accepted: return
+    found = 'end of statement'
+    if tokens: found = '\'%s\'' % tokens[-1][1]
+    msg = 'Expected %s in PQL statement, found %s.' % (expected, found)
+    raise ValidationError(msg)
+
+  def __ParseField(self, tokens):
+    """Consume the name of a field.
+
+    Args:
+      tokens: list Remaining tokens, in reverse order.
+
+    Returns:
+      str Name of the field.
+    """
+    self.__Expect(tokens and tokens[-1][0] == 'word', tokens, 'field name')
+    return tokens.pop()[1]
+
+  def __ParseValue(self, tokens):
+    """Consume a literal or a bind variable.
+
+    Args:
+      tokens: list Remaining tokens, in reverse order.
+
+    Returns:
+      function Function that accepts bind variables and returns the value.
+    """
+    self.__Expect(tokens and tokens[-1][0] in ('string', 'number', 'param',
+                                               'word'), tokens, 'value')
+    kind, value = tokens.pop()
+    if kind == 'param':
+      def Value(params):
+        if value not in params:
+          msg = 'Bind variable \':%s\' is not set.' % value
+          raise ValidationError(msg)
+        return params[value]
+      return Value
+    if kind == 'word':
+      literals = {'TRUE': True, 'FALSE': False, 'NULL': None}
+      self.__Expect(value.upper() in literals, [(kind, value)], 'value')
+      value = literals[value.upper()]
+    return lambda params: value
+
+  def __ParseOr(self, tokens):
+    """Consume a condition made of terms joined with OR.
+
+    Args:
+      tokens: list Remaining tokens, in reverse order.
+
+    Returns:
+      tuple Function that accepts an entity and bind variables and returns
+            whether the entity matches, and a list of equality terms, (field,
+            value functions), that all matching entities satisfy.
+    """
+    condition, terms = self.__ParseAnd(tokens)
+    conditions = [condition]
+    while self.__AcceptKeyword(tokens, 'OR'):
+      conditions.append(self.__ParseAnd(tokens)[0])
+    if len(conditions) == 1: return condition, terms
+
+    def Or(entity, params):
+      for condition in conditions:
+        if condition(entity, params): return True
+      return False
+    return Or, []
+
+  def __ParseAnd(self, tokens):
+    """Consume a condition made of terms joined with AND.
+
+    Args:
+      tokens: list Remaining tokens, in reverse order.
+
+    Returns:
+      tuple Condition function and equality terms, see __ParseOr().
+    """
+    condition, terms = self.__ParseNot(tokens)
+    conditions = [condition]
+    while self.__AcceptKeyword(tokens, 'AND'):
+      condition, more_terms = self.__ParseNot(tokens)
+      conditions.append(condition)
+      terms = terms + more_terms
+    if len(conditions) == 1: return condition, terms
+
+    def And(entity, params):
+      for condition in conditions:
+        if not condition(entity, params): return False
+      return True
+    return And, terms
+
+  def __ParseNot(self, tokens):
+    """Consume a condition, optionally negated with NOT.
+
+    Args:
+      tokens: list Remaining tokens, in reverse order.
+
+    Returns:
+      tuple Condition function and equality terms, see __ParseOr().
+    """
+    if not self.__AcceptKeyword(tokens, 'NOT'):
+      return self.__ParseTerm(tokens)
+    condition = self.__ParseNot(tokens)[0]
+    return lambda entity, params: not condition(entity, params), []
+
+  def __ParseTerm(self, tokens):
+    """Consume a single comparison, or a condition in parentheses.
+
+    Args:
+      tokens: list Remaining tokens, in reverse order.
+
+    Returns:
+      tuple Condition function and equality terms, see __ParseOr().
+    """
+    if self.__AcceptOp(tokens, '('):
+      result = self.__ParseOr(tokens)
+      self.__Expect(self.__AcceptOp(tokens, ')'), tokens, '\')\'')
+      return result
+
+    field = self.__ParseField(tokens)
+    if self.__AcceptKeyword(tokens, 'IS'):
+      negate = self.__AcceptKeyword(tokens, 'NOT')
+      self.__Expect(self.__AcceptKeyword(tokens, 'NULL'), tokens, 'NULL')
+      return (lambda entity, params:
+              (self.__GetField(entity, field) is None) != negate), []
+
+    negate = self.__AcceptKeyword(tokens, 'NOT')
+    if self.__AcceptKeyword(tokens, 'IN'):
+      self.__Expect(self.__AcceptOp(tokens, '('), tokens, '\'(\'')
+      values = [self.__ParseValue(tokens)]
+      while self.__AcceptOp(tokens, ','):
+        values.append(self.__ParseValue(tokens))
+      self.__Expect(self.__AcceptOp(tokens, ')'), tokens, '\')\'')
+
+      def In(entity, params):
+        found = self.__GetField(entity, field)
+        for value in values:
+          if self.__Matches(operator.eq, found, value(params)):
+            return not negate
+        return negate
+      if negate: return In, []
+      return In, [(field, values)]
+
+    if self.__AcceptKeyword(tokens, 'LIKE'):
+      value = self.__ParseValue(tokens)
+
+      def Like(entity, params):
+        found = self.__GetField(entity, field)
+        if not isinstance(found, basestring): return False
+        pattern = re.escape(str(value(params))).replace('\\%', '.*')
+        pattern = pattern.replace('\\_', '.')
+        return bool(re.match('%s$' % pattern, found, re.I | re.S)) != negate
+      return Like, []
+    self.__Expect(not negate, tokens, 'IN or LIKE')
+
+    op = None
+    if tokens and tokens[-1][0] == 'op': op = tokens[-1][1]
+    self.__Expect(op in self.__OPERATORS, tokens, 'comparison operator')
+    tokens.pop()
+    value = self.__ParseValue(tokens)
+    compare = self.__OPERATORS[op]
+
+    def Compare(entity, params):
+      return self.__Matches(compare, self.__GetField(entity, field),
+                            value(params))
+    if op == '=': return Compare, [(field, [value])]
+    return Compare, []
+
+  def __Parse(self, query):
+    """Parse a PQL statement.
+
+    Args:
+      query: str PQL statement.
+
+    Returns:
+      tuple Condition function (None, if there is no WHERE clause), equality
+            terms (see __ParseOr()), list of (field, descending) to order by,
+            and functions returning LIMIT and OFFSET (None, if not set).
+    """
+    tokens = self.__Tokenize(query)
+    if self.__AcceptKeyword(tokens, 'SELECT'):
+      self.__Expect(self.__AcceptOp(tokens, '*'), tokens, '\'*\'')
+      self.__Expect(self.__AcceptKeyword(tokens, 'FROM'), tokens, 'FROM')
+      self.__ParseField(tokens)
+
+    condition = None
+    terms = []
+    if self.__AcceptKeyword(tokens, 'WHERE'):
+      condition, terms = self.__ParseOr(tokens)
+
+    order = []
+    if self.__AcceptKeyword(tokens, 'ORDER'):
+      self.__Expect(self.__AcceptKeyword(tokens, 'BY'), tokens, 'BY')
+      while True:
+        field = self.__ParseField(tokens)
+        descending = self.__AcceptKeyword(tokens, 'DESC')
+        if not descending: self.__AcceptKeyword(tokens, 'ASC')
+        order.append((field, descending))
+        if not self.__AcceptOp(tokens, ','): break
+
+    limit = offset = None
+    if self.__AcceptKeyword(tokens, 'LIMIT'):
+      limit = self.__ParseValue(tokens)
+    if self.__AcceptKeyword(tokens, 'OFFSET'):
+      offset = self.__ParseValue(tokens)
+    self.__Expect(not tokens, tokens, 'end of statement')
+    return condition, terms, order, limit, offset
+
+  def __GetStatement(self, query):
+    """Return parsed PQL statement, parsing it on first use.
+
+    Args:
+      query: str PQL statement.
+
+    Returns:
+      tuple Parsed statement, see __Parse().
+    """
+    statement = self.__statements.get(query)
+    if statement is None:
+      statement = self.__Parse(query)
+      if len(self.__statements) >= self.__MAX_STATEMENTS:
+        self.__statements.clear()
+      self.__statements[query] = statement
+    return statement
+
+  def __GetParams(self, filter_statement):
+    """Return bind variables of a given statement.
+
+    Args:
+      filter_statement: dict Statement with 'params' or 'values'.
+
+    Returns:
+      dict Values of the bind variables, keyed by name.
+    """
+    params = {}
+    for param in filter_statement.get('params') or []:
+      params[param['key']] = self.__ConvertParam(param.get('type', ''),
+                                                 param.get('value'))
+    for value in filter_statement.get('values') or []:
+      typed_value = value.get('value') or {}
+      params[value['key']] = self.__ConvertParam(
+          typed_value.get('xsi_type', ''), typed_value.get('value'))
+    return params
+
+  def __ConvertParam(self, param_type, value):
+    """Convert value of a bind variable according to its type.
+
+    Args:
+      param_type: str Type of the value, e.g. 'LongParam' or 'NumberValue'.
+      value: str Value to convert.
+
+    Returns:
+      obj Converted value.
+    """
+    if value is None or value == 'None': return None
+    if param_type.startswith('Boolean'):
+      return str(value).lower() in ('true', '1')
+    if param_type.startswith('Long') or param_type.startswith('Number'):
+      return self.__ToNumber(str(value))
+    return value
+
+  def __GetField(self, entity, field):
+    """Return value of a field of an entity.
+
+    Args:
+      entity: dict Entity.
+      field: str Name of the field. Dots separate names of nested fields.
+
+    Returns:
+      obj Value of the field, None if it is not set.
+    """
+    for name in field.split('.'):
+      if not isinstance(entity, dict): return None
+      entity = entity.get(name)
+    return entity
+
+  def __Matches(self, compare, found, value):
+    """Return whether value of a field compares to a given value as required.
+
+    Entities returned by the API hold all values as strings, so values are
+    compared as numbers or booleans if the given value is one.
+
+    Args:
+      compare: function Comparison, e.g. operator.eq.
+      found: obj Value of the field.
+      value: obj Value to compare with.
+
+    Returns:
+      bool True if the values compare as required, False otherwise or if they
+           can't be compared.
+    """
+    if found is None or value is None: return False
+    if isinstance(value, bool):
+      return compare(str(found).lower(), str(value).lower())
+    if isinstance(value, (int, long, float)):
+      try:
+        return compare(float(found), float(value))
+      except (TypeError, ValueError):
+        return False
+    if not isinstance(found, basestring): return False
+    return compare(found, value)
+
+  def __GetIndexKey(self, value):
+    """Return key under which a given value is indexed.
+
+    Args:
+      value: obj Value of a field, or value it is compared with.
+
+    Returns:
+      str Key of the value, None if it can't be indexed.
+    """
+    if isinstance(value, bool): return str(value).lower()
+    if isinstance(value, (int, long)): return str(value)
+    if isinstance(value, float):
+      if value == long(value): return str(long(value))
+      return repr(value)
+    if isinstance(value, basestring): return value
+    return None
+
+  def __IsIndexed(self, field):
+    """Return whether a given field is indexed.
+
+    Args:
+      field: str Name of the field.
+
+    Returns:
+      bool True if the field is indexed, False otherwise.
+    """
+    if self.__indexed_fields is None:
+      return field == 'id' or field.endswith('Id')
+    return field in self.__indexed_fields
+
+  def __GetIndex(self, field):
+    """Return hash index of a given field, building it on first use.
+
+    Args:
+      field: str Name of the field.
+
+    Returns:
+      dict Positions of entities, keyed by index key of the field's value.
+    """
+    index = self.__indexes.get(field)
+    if index is None:
+      index = {}
+      for position in xrange(len(self.__entities)):
+        key = self.__GetIndexKey(self.__GetField(self.__entities[position],
+                                                 field))
+        if key is not None: index.setdefault(key, []).append(position)
+      self.__indexes[field] = index
+    return index
+
+  def __GetCandidates(self, terms, params):
+    """Return entities that may match a condition, using an index if possible.
+
+    Args:
+      terms: list Equality terms all matching entities satisfy.
+      params: dict Values of the bind variables.
+
+    Returns:
+      list Candidate entities, in their original order.
+    """
+    for field, values in terms:
+      if not self.__IsIndexed(field): continue
+      index = self.__GetIndex(field)
+      positions = []
+      for value in values:
+        positions.extend(index.get(self.__GetIndexKey(value(params)), []))
+      if len(values) > 1: positions = sorted(set(positions))
+      return [self.__entities[position] for position in positions]
+    return self.__entities
+
+  def __GetSortKey(self, value):
+    """Return key to sort a given value by.
+
+    Missing values go first, then numbers and then strings.
+
+    Args:
+      value: obj Value of a field.
+
+    Returns:
+      tuple Sort key.
+    """
+    if value is None: return (0,)
+    if isinstance(value, (int, long, float)): return (1, value)
+    if isinstance(value, basestring) and self.__NUMBER.match(value):
+      return (1, float(value))
+    return (2, value)
+
+  def GetEntitiesByStatement(self, filter_statement):
+    """Return entities that match a given filter statement.
+
+    Args:
+      filter_statement: dict Filter statement, with 'query' and optional
+                        'params' or 'values', as for Get*ByStatement()
+                        methods of services.
+
+    Returns:
+      tuple Page of matching entities, in the same form Get*ByStatement()
+            methods of services return it.
+    """
+    condition, terms, order, limit, offset = self.__GetStatement(
+        filter_statement.get('query') or '')
+    params = self.__GetParams(filter_statement)
+
+    results = self.__GetCandidates(terms, params)
+    if condition is None:
+      results = list(results)
+    else:
+      matches = []
+      for entity in results:
+        if condition(entity, params): matches.append(entity)
+      results = matches
+
+    order = list(order)
+    order.reverse()
+    for field, descending in order:
+      results.sort(key=lambda entity: self.__GetSortKey(
+          self.__GetField(entity, field)), reverse=descending)
+
+    total = len(results)
+    start = 0
+    if offset is not None: start = int(offset(params))
+    if limit is None:
+      results = results[start:]
+    else:
+      results = results[start:start + int(limit(params))]
+    return ({
+        'results': results,
+        'totalResultSetSize': str(total),
+        'startIndex': str(start)
+    },)
@@ -19,15 +19,18 @@
 __author__ = 'api.sgrinberg@gmail.com (Stan Grinberg)'
 
 import StringIO
-import urllib
-import gzip
 import time
+import urllib
+import zlib
 
 from adspygoogle.common import SOAPPY
 from adspygoogle.common import ZSI
 from adspygoogle.common import SanityCheck
 from adspygoogle.common import Utils
 from adspygoogle.common.ApiService import ApiService
+from adspygoogle.dfp import REPORT_CHUNK_SIZE
+from adspygoogle.dfp import REPORT_POLL_INITIAL_DELAY
+from adspygoogle.dfp import REPORT_POLL_MAX_DELAY
 from adspygoogle.dfp.DfpWebService import DfpWebService
 
 
@@ -134,38 +137,184 @@ class ReportService(ApiService):
                                        (({'reportJob': report_job},)),
                                       'Report', self._loc, request)
 
-  def DownloadReport(self, report_job_id, export_format):
-    """Download and return report data.
+  def WaitForReportJob(self, report_job_id, timeout=None,
+                       initial_delay=REPORT_POLL_INITIAL_DELAY,
+                       max_delay=REPORT_POLL_MAX_DELAY):
+    """Wait for report job to finish.
 
     Args:
       report_job_id: str ID of the report job.
-      export_format: str Export format for the report file.
+      [optional]
+      timeout: float Maximum number of seconds to wait. The default is to wait
+               until the report job finishes.
+      initial_delay: float Number of seconds to wait before the second poll.
+      max_delay: float Maximum number of seconds to wait between polls.
 
     Returns:
-      str Report data or empty string if report failed.
+      str Status of the report job, e.g. 'COMPLETED' or 'FAILED'. If timeout
+          was reached first, the last known status.
     """
-    SanityCheck.ValidateTypes(((report_job_id, (str, unicode)),))
+    return self.WaitForReportJobs([report_job_id], timeout=timeout,
+                                  initial_delay=initial_delay,
+                                  max_delay=max_delay)[report_job_id]
 
-    # Wait for report to complete.
-    status = self.GetReportJob(report_job_id)[0]['reportJobStatus']
-    while status != 'COMPLETED' and status != 'FAILED':
-      if Utils.BoolTypeConvert(self._config['debug']):
-        print 'Report job status: %s' % status
-      time.sleep(30)
-      status = self.GetReportJob(report_job_id)[0]['reportJobStatus']
+  def WaitForReportJobs(self, report_job_ids, callback=None, timeout=None,
+                        initial_delay=REPORT_POLL_INITIAL_DELAY,
+                        max_delay=REPORT_POLL_MAX_DELAY):
+    """Wait for a number of report jobs to finish.
+
+    Each report job is polled on its own schedule, with the delay between polls
+    growing exponentially. Thus, small reports are picked up quickly, while
+    large ones don't waste API calls.
+
+    Args:
+      report_job_ids: list IDs of the report jobs.
+      [optional]
+      callback: function Function to call with the report job ID and its status
+                as soon as a report job finishes.
+      timeout: float Maximum number of seconds to wait. The default is to wait
+               until all report jobs finish.
+      initial_delay: float Number of seconds to wait before the second poll.
+      max_delay: float Maximum number of seconds to wait between polls.
+
+    Returns:
+      dict Status of each report job, e.g. 'COMPLETED' or 'FAILED'. If timeout
+           was reached first, the last known status of unfinished jobs.
+    """
+    SanityCheck.ValidateTypes(((report_job_ids, list),))
+    for report_job_id in report_job_ids:
+      SanityCheck.ValidateTypes(((report_job_id, (str, unicode)),))
+
+    deadline = None
+    if timeout is not None:
+      deadline = time.time() + timeout
+
+    # Map of report job ID to number of polls made so far and time of next poll.
+    pending = {}
+    for report_job_id in report_job_ids:
+      pending[report_job_id] = (0, 0)
+    statuses = {}
+    while pending:
+      for report_job_id in pending.keys():
+        attempt, next_poll = pending[report_job_id]
+        if next_poll > time.time(): continue
+
+        status = self.GetReportJob(report_job_id)[0]['reportJobStatus']
+        statuses[report_job_id] = status
+        if status == 'COMPLETED' or status == 'FAILED':
+          del pending[report_job_id]
+          if callback is not None:
+            callback(report_job_id, status)
+          continue
+
+        if Utils.BoolTypeConvert(self._config['debug']):
+          print 'Report job status: %s' % status
+        pending[report_job_id] = (
+            attempt + 1,
+            time.time() + Utils.GetBackoffDelay(attempt, initial_delay,
+                                                max_delay))
+      if not pending: break
+
+      wake_up = min([next_poll for attempt, next_poll in pending.values()])
+      if deadline is not None:
+        if time.time() >= deadline: break
+        wake_up = min(wake_up, deadline)
+      time.sleep(max(0, wake_up - time.time()))
+    return statuses
+
+  def __WaitForReport(self, report_job_id):
+    """Wait for report job to finish.
+
+    Args:
+      report_job_id: str ID of the report job.
+
+    Returns:
+      bool True if report has completed successfully, False otherwise.
+    """
+    status = self.WaitForReportJob(report_job_id)
 
     if status == 'FAILED':
       if Utils.BoolTypeConvert(self._config['debug']):
         print 'Report process failed'
-      return ''
+      return False
     else:
       if Utils.BoolTypeConvert(self._config['debug']):
         print 'Report has completed successfully'
+      return True
+
+  def DownloadReport(self, report_job_id, export_format):
+    """Download and return report data.
+
+    Args:
+      report_job_id: str ID of the report job.
+      export_format: str Export format for the report file.
+
+    Returns:
+      str Report data or empty string if report failed.
+    """
+    fh = StringIO.StringIO()
+    if not self.DownloadReportToFile(report_job_id, export_format, fh):
+      return ''
+    return fh.getvalue()
+
+  def DownloadReportToFile(self, report_job_id, export_format, fh,
+                           chunk_size=REPORT_CHUNK_SIZE,
+                           progress_callback=None):
+    """Download report data into a given file.
+
+    The report is streamed through gzip decompression one chunk at a time, so
+    memory use stays the same no matter how large the report is.
+
+    Args:
+      report_job_id: str ID of the report job.
+      export_format: str Export format for the report file.
+      fh: file File, or any object with a write() method, to write report data
+          to.
+      [optional]
+      chunk_size: int Number of compressed bytes to read at a time.
+      progress_callback: function Function to call after each chunk, with the
+                         number of compressed bytes read so far, the total
+                         number of compressed bytes (None, if unknown), and the
+                         number of report bytes written so far.
+
+    Returns:
+      bool True if report was downloaded, False if report failed.
+    """
+    SanityCheck.ValidateTypes(((report_job_id, (str, unicode)),
+                               (chunk_size, int)))
+
+    if not self.__WaitForReport(report_job_id):
+      return False
 
     # Get report download URL.
     report_url = self.GetReportDownloadURL(report_job_id, export_format)[0]
 
     # Download report.
-    data = urllib.urlopen(report_url).read()
-    data = gzip.GzipFile(fileobj=StringIO.StringIO(data)).read()
-    return data
+    response = urllib.urlopen(report_url)
+    try:
+      total = response.info().getheader('Content-Length')
+      if total is not None:
+        total = int(total)
+      # Offset of 16 tells zlib to expect a gzip header and trailer.
+      decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+      read = 0
+      written = 0
+      while True:
+        chunk = response.read(chunk_size)
+        if not chunk: break
+        read += len(chunk)
+        data = decompressor.decompress(chunk)
+        if data:
+          fh.write(data)
+          written += len(data)
+        if progress_callback is not None:
+          progress_callback(read, total, written)
+      data = decompressor.flush()
+      if data:
+        fh.write(data)
+        written += len(data)
+        if progress_callback is not None:
+          progress_callback(read, total, written)
+    finally:
+      response.close()
+    return True
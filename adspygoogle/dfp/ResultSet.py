@@ -0,0 +1,201 @@
+#!/usr/bin/python
+#
+# Copyright 2011 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Column oriented view of result sets returned by PQL select statements."""
+
+__author__ = 'api.sgrinberg@gmail.com (Stan Grinberg)'
+
+import csv
+import itertools
+
+from adspygoogle.common.Errors import ValidationError
+
+
+class ResultSet(object):
+
+  """Implements ResultSet.
+
+  Holds a result set returned by PublisherQueryLanguageService.Select() as one
+  list of values per column, instead of rows of typed value dicts. Cells are
+  decoded once, into numbers and booleans where they are typed as such, and
+  into None where they are null.
+
+  Rows can be iterated over as tuples, columns looked up by their label, and
+  the whole result set written out as CSV a row at a time.
+  """
+
+  def __init__(self, result_set=None):
+    """Inits ResultSet.
+
+    Args:
+      [optional]
+      result_set: dict Result set, as returned by Select(). Defaults to an
+                  empty result set.
+    """
+    self.__names = []
+    self.__columns = []
+    self.__positions = {}
+    if result_set: self.Extend(result_set)
+
+  def __GetType(self, cell):
+    """Return type of a given cell.
+
+    Args:
+      cell: dict Cell, e.g. {'Value_Type': 'NumberValue', 'value': '1'}.
+
+    Returns:
+      str Type of the cell, empty string if it is not typed.
+    """
+    for key in cell:
+      if (key == 'xsi_type' or key == 'type' or key.find('_Type') > -1 or
+          key.find('.Type') > -1):
+        return cell[key]
+    return ''
+
+  def __Decode(self, cell):
+    """Return value of a given cell.
+
+    Args:
+      cell: dict Cell of a row.
+
+    Returns:
+      obj Value of the cell, long/float for numbers, bool for booleans and
+          None for nulls.
+    """
+    if not isinstance(cell, dict): return cell
+    value = cell.get('value')
+    if value is None or value == 'None': return None
+    cell_type = self.__GetType(cell)
+    if cell_type == 'NumberValue':
+      try:
+        return long(value)
+      except ValueError:
+        try:
+          return float(value)
+        except ValueError:
+          return value
+    elif cell_type == 'BooleanValue':
+      return str(value).lower() == 'true'
+    return value
+
+  def Extend(self, result_set):
+    """Append rows of a given result set.
+
+    Args:
+      result_set: dict/ResultSet Result set, as returned by Select(), or
+                  another ResultSet. Its columns must match those already
+                  held, if any.
+    """
+    if isinstance(result_set, ResultSet):
+      names = result_set.GetColumnNames()
+    else:
+      names = []
+      for column_type in result_set.get('columnTypes') or []:
+        names.append(column_type.get('labelName'))
+    if not self.__names:
+      self.__names = names
+      self.__columns = [[] for name in names]
+      for position in xrange(len(names)):
+        self.__positions[names[position]] = position
+    elif names and names != self.__names:
+      msg = ('Columns %s don\'t match columns of the result set %s.'
+             % (names, self.__names))
+      raise ValidationError(msg)
+
+    columns = self.__columns
+    if isinstance(result_set, ResultSet):
+      for position in xrange(len(names)):
+        columns[position].extend(result_set.GetColumn(names[position]))
+      return
+    for row in result_set.get('rows') or []:
+      cells = row.get('values') or []
+      for position in xrange(len(columns)):
+        columns[position].append(self.__Decode(cells[position]))
+
+  def GetColumnNames(self):
+    """Return labels of the columns.
+
+    Returns:
+      list Labels of the columns, in order.
+    """
+    return list(self.__names)
+
+  def GetColumn(self, name):
+    """Return values of a given column.
+
+    Args:
+      name: str Label of the column, e.g. 'Id'.
+
+    Returns:
+      list Values of the column, one per row. The list is shared with the
+           result set and must not be modified.
+    """
+    if name not in self.__positions:
+      msg = ('Column \'%s\' is not in the result set. Columns are %s.'
+             % (name, self.__names))
+      raise ValidationError(msg)
+    return self.__columns[self.__positions[name]]
+
+  def __getitem__(self, name):
+    """Return values of a given column, see GetColumn()."""
+    return self.GetColumn(name)
+
+  def __len__(self):
+    """Return number of rows."""
+    if not self.__columns: return 0
+    return len(self.__columns[0])
+
+  def __iter__(self):
+    """Iterate over rows, as tuples of values in column order."""
+    if not self.__columns: return iter([])
+    return itertools.izip(*self.__columns)
+
+  def WriteCsv(self, fh, header=True):
+    """Write the result set as CSV, one row at a time.
+
+    Strings are encoded as UTF-8, booleans written as 'true' and 'false', and
+    nulls as empty fields.
+
+    Args:
+      fh: file Open file to write to.
+      [optional]
+      header: bool Whether to write labels of the columns first.
+
+    Returns:
+      int Number of rows written, not counting the header.
+    """
+    writer = csv.writer(fh)
+    if header:
+      writer.writerow([self.__Encode(name) for name in self.__names])
+    count = 0
+    for row in self:
+      writer.writerow([self.__Encode(value) for value in row])
+      count += 1
+    return count
+
+  def __Encode(self, value):
+    """Return form of a given value to write into CSV.
+
+    Args:
+      value: obj Value of a cell.
+
+    Returns:
+      str Encoded value.
+    """
+    if value is None: return ''
+    if isinstance(value, bool): return str(value).lower()
+    if isinstance(value, unicode): return value.encode('utf-8')
+    return value
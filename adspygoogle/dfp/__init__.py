@@ -55,6 +55,25 @@ REQUIRED_SOAP_HEADERS = (('email', 'password', 'applicationName'),
 
 AUTH_TOKEN_SERVICE = 'gam'
 AUTH_TOKEN_EXPIRE = 60 * 60 * 23
+# Name of the pickle, in client's home directory, with authentication tokens
+# shared by all processes on the host.
+AUTH_TOKEN_CACHE_NAME = 'dfp_api_auth_tokens.pkl'
+
+# Initial and maximum number of seconds to wait between polls of a report job.
+REPORT_POLL_INITIAL_DELAY = 2
+REPORT_POLL_MAX_DELAY = 30
+
+# Number of compressed bytes to read at a time when downloading a report.
+REPORT_CHUNK_SIZE = 64 * 1024
+
+# Maximum number of entities, and of their estimated bytes of SOAP XML, to send
+# in a single request when creating or updating entities in batches.
+BATCH_MAX_ENTITIES = 200
+BATCH_MAX_BYTES = 512 * 1024
+
+# Name of the SQLite database, in client's home directory, that mirrors
+# entities of a network. Formatted with the network code.
+MIRROR_NAME = 'dfp_mirror_%s.db'
 
 ERROR_TYPES = []
 for item in Utils.GetDataFromCsvFile(os.path.join(LIB_HOME, 'data',
@@ -23,13 +23,16 @@ from adspygoogle.common import Utils
 from adspygoogle.common.Errors import ValidationError
 
 
+__COMPANY = SanityCheck.CompileObjectValidator()
+
+
 def ValidateCompany(company):
   """Validate Company object.
 
   Args:
     company: dict Company object.
   """
-  SanityCheck.ValidateOneLevelObject(company)
+  __COMPANY(company)
 
 
 def ValidateString_ParamMapEntry(param):
@@ -96,13 +99,16 @@ def ValidateStatement(statement):
   return statement
 
 
+__SIZE = SanityCheck.CompileObjectValidator()
+
+
 def ValidateSize(size):
   """Validate Size object.
 
   Args:
     size: dict Size object.
   """
-  SanityCheck.ValidateOneLevelObject(size)
+  __SIZE(size)
 
 
 def ValidateCreative(creative):
@@ -131,19 +137,20 @@ def ValidateCreative(creative):
   return creative
 
 
+__SIZE_STRING_MAP_ENTRY = SanityCheck.CompileObjectValidator({'key': __SIZE})
+
+
 def ValidateSize_StringMapEntry(map_entry):
   """Validate Size_StringMapEntry object.
 
   Args:
     map_entry: dict Size_StringMapEntry object.
   """
-  SanityCheck.ValidateTypes(((map_entry, dict),))
-  for key in map_entry:
-    if map_entry[key] == 'None': continue
-    if key in ('key',):
-      ValidateSize(map_entry[key])
-    else:
-      SanityCheck.ValidateTypes(((map_entry[key], (str, unicode)),))
+  __SIZE_STRING_MAP_ENTRY(map_entry)
+
+
+__AD_SENSE_SETTINGS = SanityCheck.CompileObjectValidator({
+    'afcFormats': SanityCheck.CompileListValidator(__SIZE_STRING_MAP_ENTRY)})
 
 
 def ValidateAdSenseSettings(settings):
@@ -152,15 +159,10 @@ def ValidateAdSenseSettings(settings):
   Args:
     settings: dict AdSenseSettings object.
   """
-  SanityCheck.ValidateTypes(((settings, dict),))
-  for key in settings:
-    if settings[key] == 'None': continue
-    if key in ('afcFormats',):
-      SanityCheck.ValidateTypes(((settings[key], list),))
-      for item in settings[key]:
-        ValidateSize_StringMapEntry(item)
-    else:
-      SanityCheck.ValidateTypes(((settings[key], (str, unicode)),))
+  __AD_SENSE_SETTINGS(settings)
+
+
+__INHERITED_PROPERTY_SOURCE = SanityCheck.CompileObjectValidator()
 
 
 def ValidateInheritedPropertySource(property_source):
@@ -169,7 +171,13 @@ def ValidateInheritedPropertySource(property_source):
   Args:
     property_source: dict InheritedPropertySource object.
   """
-  SanityCheck.ValidateOneLevelObject(property_source)
+  __INHERITED_PROPERTY_SOURCE(property_source)
+
+
+__AD_SENSE_SETTINGS_INHERITED_PROPERTY = SanityCheck.CompileObjectValidator({
+    'value': __AD_SENSE_SETTINGS,
+    'valueSource': __INHERITED_PROPERTY_SOURCE
+}, check_others=False)
 
 
 def ValidateAdSenseSettingsInheritedProperty(property):
@@ -178,13 +186,13 @@ def ValidateAdSenseSettingsInheritedProperty(property):
   Args:
     property: dict AdSenseSettingsInheritedProperty object.
   """
-  SanityCheck.ValidateTypes(((property, dict),))
-  for key in property:
-    if property[key] == 'None': continue
-    if key in ('value',):
-      ValidateAdSenseSettings(property[key])
-    elif key in ('valueSource',):
-      ValidateInheritedPropertySource(property[key])
+  __AD_SENSE_SETTINGS_INHERITED_PROPERTY(property)
+
+
+__AD_UNIT = SanityCheck.CompileObjectValidator({
+    'inheritedAdSenseSettings': __AD_SENSE_SETTINGS_INHERITED_PROPERTY,
+    'sizes': SanityCheck.CompileListValidator(__SIZE)
+})
 
 
 def ValidateAdUnit(ad_unit):
@@ -193,17 +201,10 @@ def ValidateAdUnit(ad_unit):
   Args:
     ad_unit: dict AdUnit object.
   """
-  SanityCheck.ValidateTypes(((ad_unit, dict),))
-  for key in ad_unit:
-    if ad_unit[key] == 'None': continue
-    if key in ('inheritedAdSenseSettings',):
-      ValidateAdSenseSettingsInheritedProperty(ad_unit[key])
-    elif key in ('sizes',):
-      SanityCheck.ValidateTypes(((ad_unit[key], list),))
-      for item in ad_unit[key]:
-        ValidateSize(item)
-    else:
-      SanityCheck.ValidateTypes(((ad_unit[key], (str, unicode)),))
+  __AD_UNIT(ad_unit)
+
+
+__DATE = SanityCheck.CompileObjectValidator()
 
 
 def ValidateDate(date):
@@ -212,7 +213,10 @@ def ValidateDate(date):
   Args:
     date: dict Date object.
   """
-  SanityCheck.ValidateOneLevelObject(date)
+  __DATE(date)
+
+
+__DATE_TIME = SanityCheck.CompileObjectValidator({'date': __DATE})
 
 
 def ValidateDateTime(date_time):
@@ -221,13 +225,10 @@ def ValidateDateTime(date_time):
   Args:
     date_time: dict DateTime object.
   """
-  SanityCheck.ValidateTypes(((date_time, dict),))
-  for key in date_time:
-    if date_time[key] == 'None': continue
-    if key in ('date',):
-      ValidateDate(date_time[key])
-    else:
-      SanityCheck.ValidateTypes(((date_time[key], (str, unicode)),))
+  __DATE_TIME(date_time)
+
+
+__MONEY = SanityCheck.CompileObjectValidator()
 
 
 def ValidateMoney(money):
@@ -236,7 +237,14 @@ def ValidateMoney(money):
   Args:
     money: dict Money object.
   """
-  SanityCheck.ValidateOneLevelObject(money)
+  __MONEY(money)
+
+
+__ORDER = SanityCheck.CompileObjectValidator({
+    'startDateTime': __DATE_TIME,
+    'endDateTime': __DATE_TIME,
+    'totalBudget': __MONEY
+})
 
 
 def ValidateOrder(order):
@@ -245,15 +253,10 @@ def ValidateOrder(order):
   Args:
     order: dict Order object.
   """
-  SanityCheck.ValidateTypes(((order, dict),))
-  for key in order:
-    if order[key] == 'None': continue
-    if key in ('startDateTime', 'endDateTime'):
-      ValidateDateTime(order[key])
-    elif key in ('totalBudget',):
-      ValidateMoney(order[key])
-    else:
-      SanityCheck.ValidateTypes(((order[key], (str, unicode)),))
+  __ORDER(order)
+
+
+__USER = SanityCheck.CompileObjectValidator()
 
 
 def ValidateUser(user):
@@ -262,7 +265,10 @@ def ValidateUser(user):
   Args:
     user: dict User object.
   """
-  SanityCheck.ValidateOneLevelObject(user)
+  __USER(user)
+
+
+__FREQUENCY_CAP = SanityCheck.CompileObjectValidator()
 
 
 def ValidateFrequencyCap(cap):
@@ -271,7 +277,7 @@ def ValidateFrequencyCap(cap):
   Args:
     cap: dict FrequencyCap object.
   """
-  SanityCheck.ValidateOneLevelObject(cap)
+  __FREQUENCY_CAP(cap)
 
 
 def ValidateCustomCriteria(criteria):
@@ -326,18 +332,19 @@ def ValidateCustomCriteriaSet(criteria_set):
       SanityCheck.ValidateTypes(((criteria_set[key], (str, unicode)),))
 
 
+__DAY_PART = SanityCheck.CompileObjectValidator({
+    'startTime': __DATE,
+    'endTime': __DATE
+}, skip_none=False)
+
+
 def ValidateDayPart(part):
   """Validate DayPart object.
 
   Args:
     part: dict DayPart object.
   """
-  SanityCheck.ValidateTypes(((part, dict),))
-  for key in part:
-    if key in ('startTime', 'endTime'):
-      ValidateDate(part[key])
-    else:
-      SanityCheck.ValidateTypes(((part[key], (str, unicode)),))
+  __DAY_PART(part)
 
 
 def ValidateTargeting(targeting):
@@ -382,31 +389,32 @@ def ValidateTargeting(targeting):
           SanityCheck.ValidateTypes(((target[sub_key], (str, unicode)),))
 
 
+__LINE_ITEM = SanityCheck.CompileObjectValidator({
+    'creativeSizes': SanityCheck.CompileListValidator(__SIZE),
+    'startDateTime': __DATE_TIME,
+    'endDateTime': __DATE_TIME,
+    'costPerUnit': __MONEY,
+    'valueCostPerUnit': __MONEY,
+    'budget': __MONEY,
+    'frequencyCaps': SanityCheck.CompileListValidator(__FREQUENCY_CAP),
+    'targeting': ValidateTargeting
+})
+
+
 def ValidateLineItem(line_item):
   """Validate LineItem object.
 
   Args:
     line_item: dict LineItem object.
   """
-  SanityCheck.ValidateTypes(((line_item, dict),))
-  for key in line_item:
-    if line_item[key] == 'None': continue
-    if key in ('creativeSizes',):
-      SanityCheck.ValidateTypes(((line_item[key], list),))
-      for item in line_item[key]:
-        ValidateSize(item)
-    elif key in ('startDateTime', 'endDateTime'):
-      ValidateDateTime(line_item[key])
-    elif key in ('costPerUnit', 'valueCostPerUnit', 'budget'):
-      ValidateMoney(line_item[key])
-    elif key in ('frequencyCaps',):
-      SanityCheck.ValidateTypes(((line_item[key], list),))
-      for item in line_item[key]:
-        ValidateFrequencyCap(item)
-    elif key in ('targeting',):
-      ValidateTargeting(line_item[key])
-    else:
-      SanityCheck.ValidateTypes(((line_item[key], (str, unicode)),))
+  __LINE_ITEM(line_item)
+
+
+__LICA = SanityCheck.CompileObjectValidator({
+    'startTime': __DATE_TIME,
+    'endTime': __DATE_TIME,
+    'sizes': SanityCheck.CompileListValidator(__SIZE)
+})
 
 
 def ValidateLica(lica):
@@ -415,17 +423,11 @@ def ValidateLica(lica):
   Args:
     lica: dict LineItemCreativeAssociation object.
   """
-  SanityCheck.ValidateTypes(((lica, dict),))
-  for key in lica:
-    if lica[key] == 'None': continue
-    if key in ('startTime', 'endTime'):
-      ValidateDateTime(lica[key])
-    elif key in ('sizes',):
-      SanityCheck.ValidateTypes(((lica[key], list),))
-      for item in lica[key]:
-        ValidateSize(item)
-    else:
-      SanityCheck.ValidateTypes(((lica[key], (str, unicode)),))
+  __LICA(lica)
+
+
+__PLACEMENT = SanityCheck.CompileObjectValidator({
+    'targetedAdUnitIds': SanityCheck.CompileListValidator()})
 
 
 def ValidatePlacement(placement):
@@ -434,15 +436,7 @@ def ValidatePlacement(placement):
   Args:
     placement: dict Placement object.
   """
-  SanityCheck.ValidateTypes(((placement, dict),))
-  for key in placement:
-    if placement[key] == 'None': continue
-    if key in ('targetedAdUnitIds',):
-      SanityCheck.ValidateTypes(((placement[key], list),))
-      for item in placement[key]:
-        SanityCheck.ValidateTypes(((item, (str, unicode)),))
-    else:
-      SanityCheck.ValidateTypes(((placement[key], (str, unicode)),))
+  __PLACEMENT(placement)
 
 
 def ValidateAction(action):
@@ -459,23 +453,28 @@ def ValidateAction(action):
     SanityCheck.ValidateTypes(((action[key], (str, unicode)),))
 
 
+__REPORT_QUERY = SanityCheck.CompileObjectValidator({
+    'dimensions': SanityCheck.CompileListValidator(),
+    'columns': SanityCheck.CompileListValidator(),
+    'dimensionFilters': SanityCheck.CompileListValidator(),
+    'startDateTime': __DATE_TIME,
+    'startDate': __DATE_TIME,
+    'endDateTime': __DATE_TIME,
+    'endDate': __DATE_TIME
+})
+
+
 def ValidateReportQuery(report_query):
   """Validate ReportQuery object.
 
   Args:
     report_query: dict ReportQuery object.
   """
-  SanityCheck.ValidateTypes(((report_query, dict),))
-  for key in report_query:
-    if report_query[key] == 'None': continue
-    if key in ('dimensions', 'columns', 'dimensionFilters'):
-      SanityCheck.ValidateTypes(((report_query[key], list),))
-      for item in report_query[key]:
-        SanityCheck.ValidateTypes(((item, (str, unicode)),))
-    elif key in ('startDateTime', 'startDate', 'endDateTime', 'endDate'):
-      ValidateDateTime(report_query[key])
-    else:
-      SanityCheck.ValidateTypes(((report_query[key], (str, unicode)),))
+  __REPORT_QUERY(report_query)
+
+
+__REPORT_JOB = SanityCheck.CompileObjectValidator({
+    'reportQuery': __REPORT_QUERY})
 
 
 def ValidateReportJob(report_job):
@@ -484,13 +483,10 @@ def ValidateReportJob(report_job):
   Args:
     report_job: dict ReportJob object.
   """
-  SanityCheck.ValidateTypes(((report_job, dict),))
-  for key in report_job:
-    if report_job[key] == 'None': continue
-    if key in ('reportQuery',):
-      ValidateReportQuery(report_job[key])
-    else:
-      SanityCheck.ValidateTypes(((report_job[key], (str, unicode)),))
+  __REPORT_JOB(report_job)
+
+
+__NETWORK = SanityCheck.CompileObjectValidator()
 
 
 def ValidateNetwork(network):
@@ -499,7 +495,10 @@ def ValidateNetwork(network):
   Args:
     network: dict Network object.
   """
-  SanityCheck.ValidateOneLevelObject(network)
+  __NETWORK(network)
+
+
+__CUSTOM_TARGETING_KEY = SanityCheck.CompileObjectValidator()
 
 
 def ValidateCustomTargetingKey(key):
@@ -508,7 +507,10 @@ def ValidateCustomTargetingKey(key):
   Args:
     key: dict CustomTargetingKey object.
   """
-  SanityCheck.ValidateOneLevelObject(key)
+  __CUSTOM_TARGETING_KEY(key)
+
+
+__CUSTOM_TARGETING_VALUE = SanityCheck.CompileObjectValidator()
 
 
 def ValidateCustomTargetingValue(value):
@@ -517,4 +519,4 @@ def ValidateCustomTargetingValue(value):
   Args:
     value: dict CustomTargetingValue object.
   """
-  SanityCheck.ValidateOneLevelObject(value)
+  __CUSTOM_TARGETING_VALUE(value)
@@ -24,7 +24,6 @@ __author__ = 'api.sgrinberg@gmail.com (Stan Grinberg)'
 import os
 import sys
 sys.path.append(os.path.join('..', '..', '..', '..'))
-import time
 
 # Import appropriate classes from the client library.
 from adspygoogle.dfp.DfpClient import DfpClient
@@ -52,11 +51,7 @@ report_job = {
 report_job = report_service.RunReportJob(report_job)[0]
 
 # Wait for report to complete.
-status = report_job['reportJobStatus']
-while status != 'COMPLETED' and status != 'FAILED':
-  print 'Report job with \'%s\' id is still running.' % report_job['id']
-  time.sleep(30)
-  status = report_service.GetReportJob(report_job['id'])[0]['reportJobStatus']
+status = report_service.WaitForReportJob(report_job['id'])
 
 if status == 'FAILED':
   print ('Report job with id \'%s\' failed to complete successfully.'
@@ -26,6 +26,7 @@ sys.path.append(os.path.join('..', '..', '..', '..'))
 
 # Import appropriate classes from the client library.
 from adspygoogle.dfp.DfpClient import DfpClient
+from adspygoogle.dfp.ResultSet import ResultSet
 
 
 # Initialize client object.
@@ -39,14 +40,12 @@ pql_service = client.GetPublisherQueryLanguageService(
 select_statement = {'query': 'SELECT * FROM Metro WHERE targetable = true'}
 
 # Get metros by statement.
-result_set = pql_service.Select(select_statement)[0]
+result_set = ResultSet(pql_service.Select(select_statement)[0])
 
 # Display results.
 if result_set:
-  column_labels = [label.values()[0] for label in result_set['columnTypes']]
-  print 'Columns are: %s' % ', '.join(column_labels)
-  for row in result_set['rows']:
-    values = [value.values()[1] for value in row['values']]
-    print 'Values are: %s' % ', '.join(values)
+  print 'Columns are: %s' % ', '.join(result_set.GetColumnNames())
+  for row in result_set:
+    print 'Values are: %s' % ', '.join([unicode(value) for value in row])
 else:
   print 'No results found.'
@@ -0,0 +1,123 @@
+#!/usr/bin/python
+#
+# Copyright 2011 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests to cover authentication token cache."""
+
+__author__ = 'api.sgrinberg@gmail.com (Stan Grinberg)'
+
+import os
+import pickle
+import shutil
+import sys
+sys.path.append(os.path.join('..', '..', '..'))
+import tempfile
+import time
+import unittest
+
+from adspygoogle.common.AuthTokenCache import AuthTokenCache
+
+
+class FakeAuthToken(object):
+
+  """Stands in for AuthToken, counting logins instead of doing them."""
+
+  logins = 0
+
+  def __init__(self, email, password, service, lib_sig, proxy):
+    FakeAuthToken.logins += 1
+    self.__auth = 'token%s' % FakeAuthToken.logins
+
+  def GetAuthToken(self):
+    return self.__auth
+
+
+class AuthTokenCacheTest(unittest.TestCase):
+
+  """Unittest suite for AuthTokenCache."""
+
+  EXPIRE = 100
+
+  def setUp(self):
+    """Prepare unittest."""
+    print self.id()
+    self.home = tempfile.mkdtemp()
+    self.path = os.path.join(self.home, 'tokens.pkl')
+    self.module = sys.modules[AuthTokenCache.__module__]
+    self.auth_token = self.module.AuthToken
+    self.module.AuthToken = FakeAuthToken
+    FakeAuthToken.logins = 0
+
+  def tearDown(self):
+    """Clean up after unittest."""
+    self.module.AuthToken = self.auth_token
+    shutil.rmtree(self.home)
+
+  def __GetAuthToken(self, cache):
+    return cache.GetAuthToken('johndoe@example.com', 'secret', 'gam', 'lib',
+                              None)
+
+  def __WriteToken(self, token, epoch):
+    fh = open(self.path, 'wb')
+    try:
+      pickle.dump({('johndoe@example.com', 'gam'): (token, epoch)}, fh)
+    finally:
+      fh.close()
+
+  def testTokenSharedByCaches(self):
+    """Test whether token fetched via one cache is picked up by another."""
+    token = self.__GetAuthToken(AuthTokenCache(self.path, self.EXPIRE))
+    self.assertEqual(token[0], 'token1')
+    other = AuthTokenCache(self.path, self.EXPIRE)
+    self.assertEqual(self.__GetAuthToken(other), token)
+    self.assertEqual(FakeAuthToken.logins, 1)
+
+  def testExpiredTokenFetched(self):
+    """Test whether expired token in the pickle is replaced."""
+    self.__WriteToken('old', time.time() - self.EXPIRE)
+    cache = AuthTokenCache(self.path, self.EXPIRE)
+    self.assertEqual(self.__GetAuthToken(cache)[0], 'token1')
+    self.assertEqual(self.__GetAuthToken(cache)[0], 'token1')
+    self.assertEqual(FakeAuthToken.logins, 1)
+
+  def testTokenRefreshedInBackground(self):
+    """Test whether token due for refresh is handed out while refreshed."""
+    epoch = time.time() - self.EXPIRE + 5
+    self.__WriteToken('old', epoch)
+    cache = AuthTokenCache(self.path, self.EXPIRE)
+    self.assertEqual(self.__GetAuthToken(cache), ('old', epoch))
+    self.__GetAuthToken(cache)
+    for i in xrange(100):
+      if self.__GetAuthToken(cache)[0] != 'old': break
+      time.sleep(0.05)
+    self.assertEqual(self.__GetAuthToken(cache)[0], 'token1')
+    self.assertEqual(FakeAuthToken.logins, 1)
+
+
+def makeTestSuite():
+  """Set up test suite.
+
+  Returns:
+    TestSuite test suite.
+  """
+  suite = unittest.TestSuite()
+  suite.addTests(unittest.makeSuite(AuthTokenCacheTest))
+  return suite
+
+
+if __name__ == '__main__':
+  suite = makeTestSuite()
+  alltests = unittest.TestSuite([suite])
+  unittest.main(defaultTest='alltests')
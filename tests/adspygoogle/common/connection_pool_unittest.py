@@ -0,0 +1,126 @@
+#!/usr/bin/python
+#
+# Copyright 2011 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests to cover connection pool."""
+
+__author__ = 'api.sgrinberg@gmail.com (Stan Grinberg)'
+
+import os
+import socket
+import sys
+sys.path.append(os.path.join('..', '..', '..'))
+import time
+import unittest
+
+from adspygoogle.common.ConnectionPool import ConnectionPool
+
+
+class ConnectionPoolTest(unittest.TestCase):
+
+  """Unittest suite for ConnectionPool."""
+
+  KEY = ('https', 'www.example.com', 443)
+
+  def setUp(self):
+    """Prepare unittest."""
+    print self.id()
+    self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    self.server.bind(('127.0.0.1', 0))
+    self.server.listen(5)
+    self.peers = []
+
+  def tearDown(self):
+    """Clean up after unittest."""
+    for peer in self.peers:
+      peer.close()
+    self.server.close()
+
+  def __Connect(self):
+    """Open a new client socket to the local server.
+
+    Returns:
+      socket Connected client socket.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.connect(self.server.getsockname())
+    self.peers.append(self.server.accept()[0])
+    return sock
+
+  def testAcquireFromEmptyPool(self):
+    """Test whether an empty pool asks for a new connection."""
+    pool = ConnectionPool()
+    self.assertEqual(pool.Acquire(self.__class__.KEY), None)
+
+  def testReleaseAndAcquire(self):
+    """Test whether a released socket is handed out again."""
+    pool = ConnectionPool()
+    sock = self.__Connect()
+    pool.Release(self.__class__.KEY, sock)
+    self.assertEqual(pool.GetIdleCount(self.__class__.KEY), 1)
+    self.assert_(pool.Acquire(self.__class__.KEY) is sock)
+    self.assertEqual(pool.GetIdleCount(self.__class__.KEY), 0)
+    sock.close()
+
+  def testMaxSize(self):
+    """Test whether pool never keeps more than max_size idle sockets."""
+    pool = ConnectionPool(max_size=2)
+    for index in xrange(3):
+      pool.Release(self.__class__.KEY, self.__Connect())
+    self.assertEqual(pool.GetIdleCount(self.__class__.KEY), 2)
+    pool.Clear()
+    self.assertEqual(pool.GetIdleCount(), 0)
+
+  def testIdleEviction(self):
+    """Test whether expired sockets are not handed out."""
+    pool = ConnectionPool(idle_timeout=0)
+    pool.Release(self.__class__.KEY, self.__Connect())
+    time.sleep(0.01)
+    self.assertEqual(pool.Acquire(self.__class__.KEY), None)
+
+  def testSetLimits(self):
+    """Test whether changed limits apply to sockets released afterwards."""
+    pool = ConnectionPool()
+    pool.SetLimits(1, 0)
+    pool.Release(self.__class__.KEY, self.__Connect())
+    pool.Release(self.__class__.KEY, self.__Connect())
+    self.assertEqual(pool.GetIdleCount(self.__class__.KEY), 1)
+    time.sleep(0.01)
+    self.assertEqual(pool.Acquire(self.__class__.KEY), None)
+
+  def testStaleSocket(self):
+    """Test whether sockets closed by the server are not handed out."""
+    pool = ConnectionPool()
+    pool.Release(self.__class__.KEY, self.__Connect())
+    self.peers[-1].close()
+    time.sleep(0.01)
+    self.assertEqual(pool.Acquire(self.__class__.KEY), None)
+
+
+def makeTestSuite():
+  """Set up test suite.
+
+  Returns:
+    TestSuite test suite.
+  """
+  suite = unittest.TestSuite()
+  suite.addTests(unittest.makeSuite(ConnectionPoolTest))
+  return suite
+
+
+if __name__ == '__main__':
+  suite = makeTestSuite()
+  alltests = unittest.TestSuite([suite])
+  unittest.main(defaultTest='alltests')
@@ -0,0 +1,116 @@
+#!/usr/bin/python
+#
+# Copyright 2011 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests to cover entity cache."""
+
+__author__ = 'api.sgrinberg@gmail.com (Stan Grinberg)'
+
+import os
+import sys
+sys.path.append(os.path.join('..', '..', '..'))
+import time
+import unittest
+
+from adspygoogle.common.EntityCache import EntityCache
+
+
+class EntityCacheTest(unittest.TestCase):
+
+  """Unittest suite for EntityCache."""
+
+  def setUp(self):
+    """Prepare unittest."""
+    print self.id()
+
+  def testGetSet(self):
+    """Test whether cached value is returned as a copy."""
+    cache = EntityCache(10, 60)
+    key = ('ca-01234567', 'v201103', 'Order', '1')
+    self.assertEqual(cache.Get(key), None)
+    cache.Set(key, ({'id': '1', 'name': 'Order #1'},))
+    value = cache.Get(key)
+    self.assertEqual(value, ({'id': '1', 'name': 'Order #1'},))
+
+    value[0]['name'] = 'Changed'
+    self.assertEqual(cache.Get(key)[0]['name'], 'Order #1')
+
+    stats = cache.GetStats()
+    self.assertEqual(stats['hits'], 2)
+    self.assertEqual(stats['misses'], 1)
+    self.assertEqual(stats['size'], 1)
+
+  def testExpiration(self):
+    """Test whether entry expires after its time to live."""
+    cache = EntityCache(10, 0.1)
+    cache.Set('key', 'value')
+    self.assertEqual(cache.Get('key'), 'value')
+    time.sleep(0.15)
+    self.assertEqual(cache.Get('key'), None)
+    self.assertEqual(cache.GetStats()['size'], 0)
+
+  def testEviction(self):
+    """Test whether least recently used entry is evicted when full."""
+    cache = EntityCache(2, 60)
+    cache.Set('a', 1)
+    cache.Set('b', 2)
+    cache.Get('a')
+    cache.Set('c', 3)
+    self.assertEqual(cache.Get('b'), None)
+    self.assertEqual(cache.Get('a'), 1)
+    self.assertEqual(cache.Get('c'), 3)
+    self.assertEqual(cache.GetStats()['evictions'], 1)
+
+  def testInvalidate(self):
+    """Test whether entries are dropped on invalidation."""
+    cache = EntityCache(10, 60)
+    cache.Set(('n', 'v201103', 'Order', '1'), 1)
+    cache.Set(('n', 'v201103', 'Order', '2'), 2)
+    cache.Set(('n', 'v201103', 'LineItem', '1'), 3)
+    cache.Invalidate(('n', 'v201103', 'Order', '1'))
+    self.assertEqual(cache.Get(('n', 'v201103', 'Order', '1')), None)
+
+    cache.InvalidateMatching(lambda key: key[2] == 'Order')
+    self.assertEqual(cache.Get(('n', 'v201103', 'Order', '2')), None)
+    self.assertEqual(cache.Get(('n', 'v201103', 'LineItem', '1')), 3)
+
+  def testStaleFill(self):
+    """Test whether value fetched before an invalidation is not cached."""
+    cache = EntityCache(10, 60)
+    generation = cache.GetGeneration()
+    cache.InvalidateMatching(lambda key: key[2] == 'Order')
+    cache.Set(('n', 'v201103', 'Order', '1'), 'stale', generation)
+    self.assertEqual(cache.Get(('n', 'v201103', 'Order', '1')), None)
+
+    generation = cache.GetGeneration()
+    cache.Set(('n', 'v201103', 'Order', '1'), 'fresh', generation)
+    self.assertEqual(cache.Get(('n', 'v201103', 'Order', '1')), 'fresh')
+
+
+def makeTestSuite():
+  """Set up test suite.
+
+  Returns:
+    TestSuite test suite.
+  """
+  suite = unittest.TestSuite()
+  suite.addTests(unittest.makeSuite(EntityCacheTest))
+  return suite
+
+
+if __name__ == '__main__':
+  suite = makeTestSuite()
+  alltests = unittest.TestSuite([suite])
+  unittest.main(defaultTest='alltests')
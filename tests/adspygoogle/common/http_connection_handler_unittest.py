@@ -0,0 +1,127 @@
+#!/usr/bin/python
+#
+# Copyright 2011 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests to cover HTTP connection handler."""
+
+__author__ = 'api.sgrinberg@gmail.com (Stan Grinberg)'
+
+import BaseHTTPServer
+import os
+import sys
+sys.path.append(os.path.join('..', '..', '..'))
+import threading
+import unittest
+
+from adspygoogle.common.ConnectionPool import ConnectionPool
+from adspygoogle.common.zsi.HttpConnectionHandler import HttpConnectionHandler
+
+
+class KeepAliveHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+  """Answers every POST with a short body, keeping the connection open."""
+
+  protocol_version = 'HTTP/1.1'
+
+  def do_POST(self):
+    """Handle POST request."""
+    self.rfile.read(int(self.headers.getheader('Content-Length') or 0))
+    body = '<ok/>'
+    self.send_response(200)
+    self.send_header('Content-Type', 'text/xml')
+    self.send_header('Content-Length', str(len(body)))
+    self.end_headers()
+    self.wfile.write(body)
+
+  def log_message(self, *args):
+    """Keep test output quiet."""
+    pass
+
+
+class CountingServer(BaseHTTPServer.HTTPServer):
+
+  """HTTP server that counts accepted connections."""
+
+  connections = 0
+
+  def get_request(self):
+    """Accept a connection, counting it."""
+    CountingServer.connections += 1
+    return BaseHTTPServer.HTTPServer.get_request(self)
+
+
+class HttpConnectionHandlerTest(unittest.TestCase):
+
+  """Unittest suite for HttpConnectionHandler."""
+
+  def setUp(self):
+    """Prepare unittest."""
+    print self.id()
+    CountingServer.connections = 0
+    self.server = CountingServer(('127.0.0.1', 0), KeepAliveHandler)
+    self.thread = threading.Thread(target=self.server.serve_forever)
+    self.thread.setDaemon(True)
+    self.thread.start()
+    self.keep_alive = HttpConnectionHandler.keep_alive
+    self.pool = HttpConnectionHandler.pool
+    HttpConnectionHandler.keep_alive = True
+    HttpConnectionHandler.pool = ConnectionPool()
+
+  def tearDown(self):
+    """Clean up after unittest."""
+    HttpConnectionHandler.keep_alive = self.keep_alive
+    HttpConnectionHandler.pool = self.pool
+    self.server.shutdown()
+    self.server.server_close()
+
+  def __Post(self):
+    """Send a request through a new handler, the way ZSI does, and drop it.
+
+    Returns:
+      str Body of the response.
+    """
+    host, port = self.server.server_address
+    conn = HttpConnectionHandler('%s:%s' % (host, port))
+    conn.putrequest('POST', '/')
+    conn.putheader('Content-Type', 'text/xml')
+    conn.putheader('Content-Length', '6')
+    conn.endheaders()
+    conn.send('<req/>')
+    return conn.getresponse().read()
+
+  def testSocketIsReused(self):
+    """Test whether two requests to the same host share one socket."""
+    self.assertEqual(self.__Post(), '<ok/>')
+    self.assertEqual(HttpConnectionHandler.pool.GetIdleCount(
+        ('http', '127.0.0.1', self.server.server_address[1])), 1)
+    self.assertEqual(self.__Post(), '<ok/>')
+    self.assertEqual(CountingServer.connections, 1)
+
+
+def makeTestSuite():
+  """Set up test suite.
+
+  Returns:
+    TestSuite test suite.
+  """
+  suite = unittest.TestSuite()
+  suite.addTests(unittest.makeSuite(HttpConnectionHandlerTest))
+  return suite
+
+
+if __name__ == '__main__':
+  suite = makeTestSuite()
+  alltests = unittest.TestSuite([suite])
+  unittest.main(defaultTest='alltests')
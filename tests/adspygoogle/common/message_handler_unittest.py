@@ -52,6 +52,40 @@ class MessageHandlerTest(unittest.TestCase):
     self.assert_('languages' in obj)
     self.assertEqual(len(obj['languages']), 2)
 
+  def testPackDictAsXmlOrder(self):
+    """Test whether fields are packed in the order given by key map."""
+    from adspygoogle.common.soappy import MessageHandler
+    key_map = {
+        'size': [
+            {
+                'type': 'Size',
+                'order': ('width', 'height', 'isAspectRatio')
+            }
+        ]
+    }
+    obj = {'isAspectRatio': 'false', 'height': '250', 'width': '300'}
+    self.assertEqual(MessageHandler.PackDictAsXml(obj, 'size', key_map),
+                     '<size xsi3:type="Size"><width>300</width>'
+                     '<height>250</height><isAspectRatio>false</isAspectRatio>'
+                     '</size>')
+
+  def testPackDictAsXmlNestedOrder(self):
+    """Test whether nested fields of the same name are packed in order."""
+    from adspygoogle.common.soappy import MessageHandler
+    key_map = {
+        'params': [
+            {
+                'type': 'String_ValueMapEntry',
+                'order': ('key', 'value')
+            }
+        ]
+    }
+    obj = {'value': {'xsi_type': 'NumberValue', 'value': '1'}, 'key': 'id'}
+    self.assertEqual(MessageHandler.PackDictAsXml(obj, 'params', key_map),
+                     '<params xsi3:type="String_ValueMapEntry"><key>id</key>'
+                     '<value xsi3:type="NumberValue"><value>1</value></value>'
+                     '</params>')
+
 
 def makeTestSuite():
   """Set up test suite.
@@ -0,0 +1,88 @@
+#!/usr/bin/python
+#
+# Copyright 2011 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests to cover rate limiter."""
+
+__author__ = 'api.sgrinberg@gmail.com (Stan Grinberg)'
+
+import os
+import sys
+sys.path.append(os.path.join('..', '..', '..'))
+import threading
+import time
+import unittest
+
+from adspygoogle.common.RateLimiter import RateLimiter
+
+
+class RateLimiterTest(unittest.TestCase):
+
+  """Unittest suite for RateLimiter."""
+
+  def setUp(self):
+    """Prepare unittest."""
+    print self.id()
+
+  def testBurst(self):
+    """Test whether a burst of calls goes through without waiting."""
+    limiter = RateLimiter(10, 3)
+    for i in xrange(3):
+      self.assertEqual(limiter.Acquire(), 0.0)
+    self.assertEqual(limiter.GetStats()['delayed_calls'], 0)
+
+  def testRate(self):
+    """Test whether calls beyond the burst are spread out at the rate."""
+    limiter = RateLimiter(20, 1)
+    start_time = time.time()
+    for i in xrange(5):
+      limiter.Acquire()
+    self.assert_(time.time() - start_time >= 0.19)
+
+    stats = limiter.GetStats()
+    self.assertEqual(stats['calls'], 5)
+    self.assertEqual(stats['delayed_calls'], 4)
+    self.assert_(stats['wait_time'] >= 0.19)
+
+  def testMultiThreads(self):
+    """Test whether limiter shared by threads keeps to the rate."""
+    limiter = RateLimiter(50, 1)
+    threads = []
+    start_time = time.time()
+    for i in xrange(10):
+      thread = threading.Thread(target=limiter.Acquire)
+      threads.append(thread)
+      thread.start()
+    for thread in threads:
+      thread.join()
+    self.assert_(time.time() - start_time >= 0.17)
+    self.assertEqual(limiter.GetStats()['calls'], 10)
+
+
+def makeTestSuite():
+  """Set up test suite.
+
+  Returns:
+    TestSuite test suite.
+  """
+  suite = unittest.TestSuite()
+  suite.addTests(unittest.makeSuite(RateLimiterTest))
+  return suite
+
+
+if __name__ == '__main__':
+  suite = makeTestSuite()
+  alltests = unittest.TestSuite([suite])
+  unittest.main(defaultTest='alltests')
@@ -0,0 +1,123 @@
+#!/usr/bin/python
+#
+# Copyright 2011 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests to cover response decoder."""
+
+__author__ = 'api.sgrinberg@gmail.com (Stan Grinberg)'
+
+import os
+import sys
+sys.path.append(os.path.join('..', '..', '..'))
+import unittest
+
+from ZSI import ParsedSoap
+
+from adspygoogle.common.Errors import Error
+from adspygoogle.common.zsi import MessageHandler
+from adspygoogle.common.zsi.ResponseDecoder import ResponseDecoder
+from adspygoogle.dfp.zsi.v201103 import CreativeService_services
+from adspygoogle.dfp.zsi.v201103 import UserService_services
+
+
+class ResponseDecoderTest(unittest.TestCase):
+
+  """Unittest suite for ResponseDecoder."""
+
+  ENVELOPE = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+              '<soap:Envelope xmlns:soap='
+              '"http://schemas.xmlsoap.org/soap/envelope/"><soap:Header>'
+              '<ResponseHeader xmlns='
+              '"https://www.google.com/apis/ads/publisher/v201103">'
+              '<requestId>abc</requestId></ResponseHeader></soap:Header>'
+              '<soap:Body>%s</soap:Body></soap:Envelope>')
+  USERS = ('<getUsersByStatementResponse xmlns='
+           '"https://www.google.com/apis/ads/publisher/v201103"><rval>'
+           '<totalResultSetSize>2</totalResultSetSize>'
+           '<startIndex>0</startIndex><results><id>1</id>'
+           '<name>J\xc3\xb6rg</name><email>jorg@example.com</email>'
+           '<isActive>true</isActive>'
+           '<UserRecord.Type>User</UserRecord.Type></results><results>'
+           '<id>2</id></results></rval></getUsersByStatementResponse>')
+  CREATIVES = ('<getCreativesByStatementResponse xmlns='
+               '"https://www.google.com/apis/ads/publisher/v201103" '
+               'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"><rval>'
+               '<totalResultSetSize>1</totalResultSetSize><results '
+               'xsi:type="ImageCreative"><id>1</id><size><width>300</width>'
+               '<height>250</height></size>'
+               '<Creative.Type>ImageCreative</Creative.Type>'
+               '<imageName>image.png</imageName></results></rval>'
+               '</getCreativesByStatementResponse>')
+  FAULT = ('<soap:Fault><faultcode>soap:Server</faultcode>'
+           '<faultstring>[AuthenticationError.NO_NETWORKS_TO_ACCESS @ ]'
+           '</faultstring></soap:Fault>')
+
+  def setUp(self):
+    """Prepare unittest."""
+    print self.id()
+
+  def __Unpack(self, data, typecode):
+    """Unpack response the way it is done without the decoder."""
+    holder = ParsedSoap(data).Parse(typecode)
+    return MessageHandler.UnpackResponseAsTuple(holder)
+
+  def testDecodeUsers(self):
+    """Test whether decoded response matches the unpacked ZSI holder."""
+    data = self.__class__.ENVELOPE % self.__class__.USERS
+    typecode = UserService_services.getUsersByStatementResponse.typecode
+    response = ResponseDecoder(typecode).Decode(data)
+    self.assertEqual(response, self.__Unpack(data, typecode))
+    self.assertEqual(response[0]['results'][1]['name'], '')
+
+  def testDecodeSubstituteType(self):
+    """Test whether elements with xsi:type are decoded into derived type."""
+    data = self.__class__.ENVELOPE % self.__class__.CREATIVES
+    typecode = CreativeService_services.getCreativesByStatementResponse.typecode
+    response = ResponseDecoder(typecode).Decode(data)
+    self.assertEqual(response, self.__Unpack(data, typecode))
+    self.assertEqual(response[0]['results'][0]['imageName'], 'image.png')
+
+  def testDecodeFault(self):
+    """Test whether SOAP fault is raised as an error."""
+    data = self.__class__.ENVELOPE % self.__class__.FAULT
+    typecode = UserService_services.getUsersByStatementResponse.typecode
+    self.assertRaises(Error, ResponseDecoder(typecode).Decode, data)
+
+  def testDecodeEmptyFault(self):
+    """Test whether SOAP fault with no elements is raised as an error."""
+    data = self.__class__.ENVELOPE % '<soap:Fault></soap:Fault>'
+    typecode = UserService_services.getUsersByStatementResponse.typecode
+    try:
+      ResponseDecoder(typecode).Decode(data)
+      self.fail('Expected Error.')
+    except Error, e:
+      self.assertEqual(str(e), 'Unknown SOAP fault.')
+
+
+def makeTestSuite():
+  """Set up test suite.
+
+  Returns:
+    TestSuite test suite.
+  """
+  suite = unittest.TestSuite()
+  suite.addTests(unittest.makeSuite(ResponseDecoderTest))
+  return suite
+
+
+if __name__ == '__main__':
+  suite = makeTestSuite()
+  alltests = unittest.TestSuite([suite])
+  unittest.main(defaultTest='alltests')
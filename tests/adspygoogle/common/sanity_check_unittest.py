@@ -0,0 +1,93 @@
+#!/usr/bin/python
+#
+# Copyright 2011 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests to cover compiled validators."""
+
+__author__ = 'api.sgrinberg@gmail.com (Stan Grinberg)'
+
+import os
+import sys
+sys.path.append(os.path.join('..', '..', '..'))
+import unittest
+
+from adspygoogle.common import SanityCheck
+from adspygoogle.common.Errors import ValidationError
+
+
+class SanityCheckTest(unittest.TestCase):
+
+  """Unittest suite for SanityCheck."""
+
+  def setUp(self):
+    """Prepare unittest."""
+    print self.id()
+    size = SanityCheck.CompileObjectValidator()
+    self.validator = SanityCheck.CompileObjectValidator({
+        'sizes': SanityCheck.CompileListValidator(size),
+        'targetedAdUnitIds': SanityCheck.CompileListValidator()
+    })
+
+  def __GetError(self, validator, obj):
+    """Return message of the error raised by a given validator."""
+    try:
+      validator(obj)
+    except ValidationError, e:
+      return str(e)
+    return None
+
+  def testValidObject(self):
+    """Test whether valid object passes the compiled validator."""
+    self.validator({'name': 'Size', 'description': u'Med',
+                    'sizes': [{'width': '300', 'height': '250'}],
+                    'targetedAdUnitIds': ['1', '2'], 'status': 'None'})
+
+  def testSameErrors(self):
+    """Test whether compiled validator raises the same errors as before."""
+    for obj in ([], {'name': 1}, {'sizes': 'x'}, {'sizes': [{'width': 300}]},
+                {'targetedAdUnitIds': ['1', 2]}):
+      self.assertEqual(self.__GetError(self.validator, obj),
+                       self.__GetError(self.__Validate, obj))
+
+  def __Validate(self, obj):
+    """Validate object the way it was done without compiled validators."""
+    SanityCheck.ValidateTypes(((obj, dict),))
+    for key in obj:
+      if obj[key] == 'None': continue
+      if key in ('sizes',):
+        SanityCheck.ValidateTypes(((obj[key], list),))
+        for item in obj[key]:
+          SanityCheck.ValidateOneLevelObject(item)
+      elif key in ('targetedAdUnitIds',):
+        SanityCheck.ValidateOneLevelList(obj[key])
+      else:
+        SanityCheck.ValidateTypes(((obj[key], (str, unicode)),))
+
+
+def makeTestSuite():
+  """Set up test suite.
+
+  Returns:
+    TestSuite test suite.
+  """
+  suite = unittest.TestSuite()
+  suite.addTests(unittest.makeSuite(SanityCheckTest))
+  return suite
+
+
+if __name__ == '__main__':
+  suite = makeTestSuite()
+  alltests = unittest.TestSuite([suite])
+  unittest.main(defaultTest='alltests')
@@ -0,0 +1,101 @@
+#!/usr/bin/python
+#
+# Copyright 2011 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests to cover SOAP buffer."""
+
+__author__ = 'api.sgrinberg@gmail.com (Stan Grinberg)'
+
+import os
+import sys
+sys.path.append(os.path.join('..', '..', '..'))
+import unittest
+
+from adspygoogle.common import ETREE
+from adspygoogle.common.CallRecord import CallRecord
+from adspygoogle.common.SoapBuffer import SoapBuffer
+
+
+class SoapBufferTest(unittest.TestCase):
+
+  """Unittest suite for SoapBuffer."""
+
+  XML_OUT = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+             '<SOAP-ENV:Envelope xmlns:SOAP-ENV='
+             '"http://schemas.xmlsoap.org/soap/envelope/"><SOAP-ENV:Body>'
+             '<getUser><userId>1</userId></getUser></SOAP-ENV:Body>'
+             '</SOAP-ENV:Envelope>')
+  XML_IN = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<soap:Envelope xmlns:soap='
+            '"http://schemas.xmlsoap.org/soap/envelope/"><soap:Header>'
+            '<ResponseHeader><requestId>abc</requestId></ResponseHeader>'
+            '</soap:Header><soap:Body><getUserResponse><rval><id>1</id></rval>'
+            '</getUserResponse></soap:Body></soap:Envelope>')
+
+  def setUp(self):
+    """Prepare unittest."""
+    print self.id()
+    self.buf = SoapBuffer(xml_parser=ETREE)
+    self.buf.write('%s Outgoing SOAP %s\n%s\n%s\n'
+                   % ('*' * 3, '*' * 54, self.__class__.XML_OUT, '*' * 72))
+    self.buf.write('%s Incoming SOAP %s\n%s\n%s\n'
+                   % ('*' * 3, '*' * 54, self.__class__.XML_IN, '*' * 72))
+
+  def testGetCallName(self):
+    """Test whether we can get name of the API method from the buffer."""
+    self.assert_(self.buf.IsSoap())
+    self.assertEqual(self.buf.GetCallName(), 'getUser')
+
+  def testParseOnce(self):
+    """Test whether parsed XML is reused until buffer is written to."""
+    xml_in = self.buf._GetXmlIn()
+    self.assert_(self.buf._GetXmlIn() is xml_in)
+    self.assert_(self.buf._GetXmlOut() is self.buf._GetXmlOut())
+    self.buf.write('\n')
+    self.assert_(self.buf._GetXmlIn() is not xml_in)
+
+  def testSetCallRecord(self):
+    """Test whether buffer can be loaded from a call record."""
+    record = CallRecord()
+    record.StartRequest('POST', '/apis/ads/publisher/v201103/UserService')
+    record.AddHeaderOut('SOAPAction', '""')
+    record.AddBodyOut(self.__class__.XML_OUT)
+    record.StartResponse(200, 'OK', ['Content-Type: text/xml\r\n'])
+    record.AddBodyIn(self.__class__.XML_IN)
+
+    buf = SoapBuffer(xml_parser=ETREE)
+    buf.SetCallRecord(record)
+    self.assert_(buf.IsHandshakeComplete())
+    self.assertEqual(buf.GetCallName(), 'getUser')
+    self.assert_(buf.GetHeadersOut().find('SOAPAction: ""') > -1)
+    self.assert_(buf.GetHeadersIn().find('Content-Type: text/xml') > -1)
+    self.assertEqual(record.bytes_in, len(self.__class__.XML_IN))
+
+
+def makeTestSuite():
+  """Set up test suite.
+
+  Returns:
+    TestSuite test suite.
+  """
+  suite = unittest.TestSuite()
+  suite.addTests(unittest.makeSuite(SoapBufferTest))
+  return suite
+
+
+if __name__ == '__main__':
+  suite = makeTestSuite()
+  alltests = unittest.TestSuite([suite])
+  unittest.main(defaultTest='alltests')
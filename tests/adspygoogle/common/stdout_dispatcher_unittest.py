@@ -0,0 +1,108 @@
+#!/usr/bin/python
+#
+# Copyright 2011 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests to cover per thread capture of sys.stdout."""
+
+__author__ = 'api.sgrinberg@gmail.com (Stan Grinberg)'
+
+import os
+import sys
+sys.path.append(os.path.join('..', '..', '..'))
+import threading
+import unittest
+
+from adspygoogle.common import Utils
+from adspygoogle.common.Buffer import Buffer
+
+
+class StdoutDispatcherTest(unittest.TestCase):
+
+  """Unittest suite for StdoutDispatcher."""
+
+  MAX_THREADS = 5
+  bufs = {}
+
+  def setUp(self):
+    """Prepare unittest."""
+    print self.id()
+
+  def testCaptureStdout(self):
+    """Test whether data written by current thread ends up in its buffer."""
+    buf = Buffer()
+    dispatcher = Utils.CaptureStdout(buf)
+    print 'captured'
+    Utils.ReleaseStdout(dispatcher)
+    print 'not captured'
+    self.assertEqual(buf.GetBufferAsStr(), 'captured\n')
+
+  def testMultiThreads(self):
+    """Test whether concurrent threads capture only their own data."""
+    all_threads = []
+    for i in xrange(self.__class__.MAX_THREADS):
+      t = TestThread(i)
+      all_threads.append(t)
+      t.start()
+
+    for t in all_threads:
+      t.join()
+
+    self.assertEqual(len(self.bufs), self.__class__.MAX_THREADS)
+    for index in self.bufs:
+      self.assertEqual(set(self.bufs[index].GetBufferAsStr().split()),
+                       set(['thread%s' % index]))
+
+
+class TestThread(threading.Thread):
+
+  """Creates TestThread.
+
+  Responsible for defining an action for a single thread.
+  """
+
+  def __init__(self, index):
+    """Inits TestThread.
+
+    Args:
+      index: int Index of the thread.
+    """
+    threading.Thread.__init__(self)
+    self.index = index
+
+  def run(self):
+    """Represent thread's activity."""
+    buf = Buffer()
+    dispatcher = Utils.CaptureStdout(buf)
+    for i in xrange(100):
+      print 'thread%s' % self.index
+    Utils.ReleaseStdout(dispatcher)
+    StdoutDispatcherTest.bufs[self.index] = buf
+
+
+def makeTestSuite():
+  """Set up test suite.
+
+  Returns:
+    TestSuite test suite.
+  """
+  suite = unittest.TestSuite()
+  suite.addTests(unittest.makeSuite(StdoutDispatcherTest))
+  return suite
+
+
+if __name__ == '__main__':
+  suite = makeTestSuite()
+  alltests = unittest.TestSuite([suite])
+  unittest.main(defaultTest='alltests')
@@ -21,6 +21,7 @@ __author__ = 'api.sgrinberg@gmail.com (Stan Grinberg)'
 import os
 import sys
 sys.path.append(os.path.join('..', '..', '..'))
+import StringIO
 import unittest
 
 from adspygoogle.common import Utils
@@ -290,6 +291,67 @@ class DfpUtilsTestV201103(unittest.TestCase):
         server=self.__class__.SERVER, version=self.__class__.VERSION,
         http_proxy=HTTP_PROXY)
 
+  def testGetAllEntitiesByStatementConcurrently(self):
+    """Test whether GetAllEntitiesByStatement() returns the same entities when
+    pages are fetched concurrently."""
+    users = DfpUtils.GetAllEntitiesByStatement(
+        client, 'User', 'ORDER BY id', page_size=1,
+        server=self.__class__.SERVER, version=self.__class__.VERSION,
+        http_proxy=HTTP_PROXY)
+    users_concurrently = DfpUtils.GetAllEntitiesByStatement(
+        client, 'User', 'ORDER BY id', page_size=1,
+        server=self.__class__.SERVER, version=self.__class__.VERSION,
+        http_proxy=HTTP_PROXY, max_workers=3)
+    self.assertEqual([user['id'] for user in users_concurrently],
+                     [user['id'] for user in users])
+
+  def testIterEntitiesByStatement(self):
+    """Test whether IterEntitiesByStatement() yields the same entities as
+    GetAllEntitiesByStatement()."""
+    users = DfpUtils.GetAllEntitiesByStatement(
+        client, 'User', 'ORDER BY id', page_size=1,
+        server=self.__class__.SERVER, version=self.__class__.VERSION,
+        http_proxy=HTTP_PROXY)
+    pages = list(DfpUtils.IterEntitiesByStatement(
+        client, 'User', 'ORDER BY id', page_size=1,
+        server=self.__class__.SERVER, version=self.__class__.VERSION,
+        http_proxy=HTTP_PROXY, by_page=True, prefetch=True))
+    self.assertEqual([user['id'] for page in pages for user in page],
+                     [user['id'] for user in users])
+
+  def testMutateEntitiesInBatches(self):
+    """Test whether MutateEntitiesInBatches() returns results in the order of
+    entities it was given."""
+    users = DfpUtils.GetAllEntitiesByStatement(
+        client, 'User', 'ORDER BY id',
+        server=self.__class__.SERVER, version=self.__class__.VERSION,
+        http_proxy=HTTP_PROXY)[:3]
+    updated_users = DfpUtils.MutateEntitiesInBatches(
+        client, 'User', 'UpdateUsers', users, max_entities=1,
+        server=self.__class__.SERVER, version=self.__class__.VERSION,
+        http_proxy=HTTP_PROXY, max_workers=3)
+    self.assertEqual([user['id'] for user in updated_users],
+                     [user['id'] for user in users])
+
+  def testSelectAllByStatement(self):
+    """Test whether SelectAllByStatement() selects the same rows when pages
+    are fetched concurrently, and streams them as CSV."""
+    query = 'SELECT * FROM Country WHERE targetable = true ORDER BY Id'
+    countries = DfpUtils.SelectAllByStatement(
+        client, query, page_size=50, server=self.__class__.SERVER,
+        version=self.__class__.VERSION, http_proxy=HTTP_PROXY)
+    countries_concurrently = DfpUtils.SelectAllByStatement(
+        client, query, page_size=50, server=self.__class__.SERVER,
+        version=self.__class__.VERSION, http_proxy=HTTP_PROXY, max_workers=3)
+    self.assertEqual(list(countries_concurrently), list(countries))
+
+    buf = StringIO.StringIO()
+    count = DfpUtils.SelectAllByStatement(
+        client, query, buf, page_size=50, server=self.__class__.SERVER,
+        version=self.__class__.VERSION, http_proxy=HTTP_PROXY)
+    self.assertEqual(count, len(countries))
+    self.assertEqual(len(buf.getvalue().splitlines()), len(countries) + 1)
+
 
 def makeTestSuiteV201004():
   """Set up test suite using v201004.
@@ -23,11 +23,13 @@ import sys
 sys.path.append(os.path.join('..', '..', '..'))
 import thread
 import threading
+import time
 import unittest
 
 from adspygoogle.common import SOAPPY
 from adspygoogle.common import ZSI
 from adspygoogle.common import Utils
+from adspygoogle.common.Errors import TransportError
 from adspygoogle.dfp.DfpErrors import DfpApiError
 from adspygoogle.dfp.DfpWebService import DfpWebService
 from tests.adspygoogle.dfp import HTTP_PROXY
@@ -382,6 +384,51 @@ class DfpWebServiceTestV201103(unittest.TestCase):
 
     self.assertEqual(len(self.res), self.__class__.MAX_THREADS)
 
+  def testExecuteBatch(self):
+    """Test whether we can execute a batch of API calls concurrently."""
+    statement = {'query': 'ORDER BY name LIMIT 500'}
+    work_items = [('User', 'GetUsersByStatement', (statement,)),
+                  ('User', 'GetAllRoles', ()),
+                  ('User', 'GetUser', ('0',))]
+    res = client.ExecuteBatch(work_items, self.__class__.SERVER,
+                              self.__class__.VERSION, HTTP_PROXY)
+    self.assertEqual(len(res), len(work_items))
+    self.assert_(isinstance(res[0], tuple))
+    self.assert_(isinstance(res[1], tuple))
+    self.assert_(isinstance(res[2], DfpApiError))
+
+  def testCallMethodRetry(self):
+    """Test whether transport errors are retried before being returned."""
+    headers = client.GetAuthCredentials()
+    config = client.GetConfigValues().copy()
+    config['max_retries'] = 2
+    config['retry_initial_delay'] = 0.2
+    config['retry_max_delay'] = 0.2
+    # Nothing listens on port 1, so connection is refused on every attempt.
+    url = 'https://localhost:1/apis/ads/publisher/v201103/UserService'
+    op_config = {
+        'server': 'https://localhost:1',
+        'version': self.__class__.VERSION,
+        'http_proxy': None
+    }
+
+    lock = thread.allocate_lock()
+    service = DfpWebService(headers, config, op_config, url, lock)
+    method_name = 'getAllRoles'
+    start_time = time.time()
+    if config['soap_lib'] == SOAPPY:
+      response = service.CallMethod(method_name, (), 'UserService')
+    elif config['soap_lib'] == ZSI:
+      web_services = __import__(
+          'adspygoogle.dfp.zsi.v201103.UserService_services',
+          globals(), locals(), [''])
+      loc = web_services.UserServiceLocator()
+      request = eval('web_services.%sRequest()' % method_name)
+      response = service.CallMethod(method_name, (), 'User', loc, request)
+    self.assert_(isinstance(response, TransportError))
+    # Each of the two retries waits at least half of the delay.
+    self.assert_(time.time() - start_time >= 0.2)
+
 
 class TestThreadV201103(threading.Thread):
 
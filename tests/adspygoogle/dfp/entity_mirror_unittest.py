@@ -0,0 +1,208 @@
+#!/usr/bin/python
+#
+# Copyright 2011 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests to cover EntityMirror."""
+
+__author__ = 'api.sgrinberg@gmail.com (Stan Grinberg)'
+
+import os
+import sys
+sys.path.append(os.path.join('..', '..', '..'))
+import tempfile
+import unittest
+
+from adspygoogle.common.Errors import ValidationError
+from adspygoogle.dfp import DfpUtils
+from adspygoogle.dfp.EntityMirror import EntityMirror
+from adspygoogle.dfp.PqlEvaluator import PqlEvaluator
+from tests.adspygoogle.dfp import HTTP_PROXY
+from tests.adspygoogle.dfp import SERVER_V201103
+from tests.adspygoogle.dfp import VERSION_V201103
+from tests.adspygoogle.dfp import client
+
+
+class StubService(object):
+
+  """Serves Get*ByStatement() calls from a list of entities."""
+
+  def __init__(self, entities):
+    """Inits StubService.
+
+    Args:
+      entities: list Entities to serve.
+    """
+    self.entities = entities
+    self.queries = []
+
+  def GetEntitiesByStatement(self, filter_statement):
+    """Return a page of entities that match a given filter statement."""
+    self.queries.append(filter_statement['query'])
+    return PqlEvaluator(self.entities).GetEntitiesByStatement(filter_statement)
+
+  GetOrdersByStatement = GetEntitiesByStatement
+  GetLineItemCreativeAssociationsByStatement = GetEntitiesByStatement
+
+
+class StubClient(object):
+
+  """Hands out stub services in place of DfpClient."""
+
+  def __init__(self, services):
+    """Inits StubClient.
+
+    Args:
+      services: dict Stub services, keyed by name.
+    """
+    self.services = services
+
+  def GetOrderService(self, *args):
+    """Return stub order service."""
+    return self.services['Order']
+
+  def GetLineItemCreativeAssociationService(self, *args):
+    """Return stub line item creative association service."""
+    return self.services['LineItemCreativeAssociation']
+
+
+class EntityMirrorTest(unittest.TestCase):
+
+  """Unittest suite for EntityMirror, served by stub services."""
+
+  def setUp(self):
+    """Prepare unittest."""
+    print self.id()
+    fd, self.__path = tempfile.mkstemp('.db')
+    os.close(fd)
+    self.__orders = StubService(
+        [{'id': str(i), 'name': 'Order #%s' % i} for i in xrange(1, 4)])
+    self.__licas = StubService([
+        {'lineItemId': '5', 'creativeId': '1', 'status': 'ACTIVE'},
+        {'lineItemId': '7', 'creativeId': '1', 'status': 'ACTIVE'}
+    ])
+    client = StubClient({'Order': self.__orders,
+                         'LineItemCreativeAssociation': self.__licas})
+    self.__mirror = EntityMirror(client, self.__path)
+
+  def tearDown(self):
+    """Clean up after unittest."""
+    self.__mirror.Close()
+    os.remove(self.__path)
+
+  def testSyncIncremental(self):
+    """Test whether sync after the first one only fetches newer orders."""
+    self.assertEqual(self.__mirror.Sync('Order', page_size=2), 3)
+    self.assertEqual(self.__mirror.GetSyncState('Order')['mark'], 3)
+
+    self.__orders.entities[0]['name'] = 'Renamed'
+    self.__orders.entities.append({'id': '4', 'name': 'Order #4'})
+    self.assertEqual(self.__mirror.Sync('Order', page_size=2), 2)
+    self.assert_(self.__orders.queries[-1].startswith('WHERE id >= 3 '))
+    self.assertEqual(self.__mirror.GetSyncState('Order')['mark'], 4)
+    self.assertEqual(self.__mirror.GetEntity('Order', '1')['name'],
+                     'Order #1')
+    self.assertEqual(self.__mirror.GetEntity('Order', '4')['name'],
+                     'Order #4')
+
+    del self.__orders.entities[1]
+    self.assertEqual(self.__mirror.Sync('Order', full=True), 3)
+    self.assertEqual(self.__mirror.GetEntity('Order', '1')['name'], 'Renamed')
+    self.assertEqual(self.__mirror.GetEntity('Order', '2'), None)
+
+  def testSyncCompositeKey(self):
+    """Test whether associations added to older line items are picked up."""
+    self.assertEqual(self.__mirror.Sync('LineItemCreativeAssociation'), 2)
+    self.__licas.entities.append(
+        {'lineItemId': '5', 'creativeId': '2', 'status': 'ACTIVE'})
+    self.assertEqual(self.__mirror.Sync('LineItemCreativeAssociation'), 3)
+    for query in self.__licas.queries:
+      self.assertEqual(query.find('WHERE'), -1)
+    self.assert_(self.__mirror.GetEntity('LineItemCreativeAssociation',
+                                         (5, 2)) is not None)
+
+
+class EntityMirrorTestV201103(unittest.TestCase):
+
+  """Unittest suite for EntityMirror using v201103."""
+
+  SERVER = SERVER_V201103
+  VERSION = VERSION_V201103
+  client.debug = False
+
+  def setUp(self):
+    """Prepare unittest."""
+    print self.id()
+    fd, self.__path = tempfile.mkstemp('.db')
+    os.close(fd)
+    self.__mirror = EntityMirror(client, self.__path, self.__class__.SERVER,
+                                 self.__class__.VERSION, HTTP_PROXY)
+
+  def tearDown(self):
+    """Clean up after unittest."""
+    self.__mirror.Close()
+    os.remove(self.__path)
+
+  def testSync(self):
+    """Test whether we can mirror all orders."""
+    orders = DfpUtils.GetAllEntitiesByStatement(
+        client, 'Order', server=self.__class__.SERVER,
+        version=self.__class__.VERSION, http_proxy=HTTP_PROXY)
+    self.assertEqual(self.__mirror.Sync('Order'), len(orders))
+    self.assertEqual(len(self.__mirror.GetEntities('Order')), len(orders))
+    if orders:
+      self.assertEqual(self.__mirror.GetEntity('Order', orders[0]['id']),
+                       orders[0])
+
+  def testSyncIncremental(self):
+    """Test whether sync after the first one only fetches newer orders."""
+    self.__mirror.Sync('Order')
+    state = self.__mirror.GetSyncState('Order')
+    self.assert_(state is not None)
+    if state['mark'] is not None:
+      self.assert_(self.__mirror.Sync('Order') >= 1)
+
+  def testGetEntitiesWithBadFilter(self):
+    """Test whether filters on fields that aren't indexed are rejected."""
+    self.assertRaises(ValidationError, self.__mirror.GetEntities, 'Order',
+                      {'notes': 'foo'})
+
+
+def makeTestSuite():
+  """Set up test suite.
+
+  Returns:
+    TestSuite test suite.
+  """
+  suite = unittest.TestSuite()
+  suite.addTests(unittest.makeSuite(EntityMirrorTest))
+  return suite
+
+
+def makeTestSuiteV201103():
+  """Set up test suite using v201103.
+
+  Returns:
+    TestSuite test suite using v201103.
+  """
+  suite = unittest.TestSuite()
+  suite.addTests(unittest.makeSuite(EntityMirrorTestV201103))
+  return suite
+
+
+if __name__ == '__main__':
+  suite = makeTestSuite()
+  suite_v201103 = makeTestSuiteV201103()
+  alltests = unittest.TestSuite([suite, suite_v201103])
+  unittest.main(defaultTest='alltests')
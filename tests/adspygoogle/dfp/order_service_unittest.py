@@ -25,6 +25,7 @@ sys.path.append(os.path.join('..', '..', '..'))
 import unittest
 
 from adspygoogle.common import Utils
+from adspygoogle.dfp.DfpClient import DfpClient
 from tests.adspygoogle.dfp import HTTP_PROXY
 from tests.adspygoogle.dfp import SERVER_V201004
 from tests.adspygoogle.dfp import SERVER_V201010
@@ -513,6 +514,27 @@ class OrderServiceTestV201103(unittest.TestCase):
         self.__class__.service.PerformOrderAction(action, filter_statement),
         tuple))
 
+  def testPerformOrderActionDropsCachedLineItems(self):
+    """Test whether order action drops cached line items of the order."""
+    config = client.GetConfigValues().copy()
+    config['entity_cache_size'] = 10
+    cache_client = DfpClient(client.GetAuthCredentials().copy(), config,
+                             os.path.join('..', '..', '..'))
+    line_item_service = cache_client.GetLineItemService(
+        self.__class__.SERVER, self.__class__.VERSION, HTTP_PROXY)
+    page = line_item_service.GetLineItemsByStatement({'query': 'LIMIT 1'})[0]
+    if not page.get('results'): return
+    line_item = page['results'][0]
+    line_item_service.GetLineItem(line_item['id'])
+    self.assertEqual(cache_client.GetEntityCacheStats()['size'], 1)
+
+    action = {'type': 'ResumeOrders'}
+    filter_statement = {'query': 'WHERE id = \'%s\'' % line_item['orderId']}
+    cache_client.GetOrderService(
+        self.__class__.SERVER, self.__class__.VERSION,
+        HTTP_PROXY).PerformOrderAction(action, filter_statement)
+    self.assertEqual(cache_client.GetEntityCacheStats()['size'], 0)
+
   def testUpdateOrder(self):
     """Test whether we can update an order."""
     if not self.__class__.order1:
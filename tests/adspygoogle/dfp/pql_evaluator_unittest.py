@@ -0,0 +1,126 @@
+#!/usr/bin/python
+#
+# Copyright 2011 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests to cover PqlEvaluator."""
+
+__author__ = 'api.sgrinberg@gmail.com (Stan Grinberg)'
+
+import os
+import sys
+sys.path.append(os.path.join('..', '..', '..'))
+import unittest
+
+from adspygoogle.common.Errors import ValidationError
+from adspygoogle.dfp.PqlEvaluator import PqlEvaluator
+
+
+class PqlEvaluatorTest(unittest.TestCase):
+
+  """Unittest suite for PqlEvaluator."""
+
+  def setUp(self):
+    """Prepare unittest."""
+    print self.id()
+    line_items = []
+    for i in xrange(1, 11):
+      line_items.append({
+          'id': str(i),
+          'orderId': str(i % 3),
+          'name': 'Line item #%s' % i,
+          'status': ('PAUSED', 'READY')[i % 2]
+      })
+    self.__evaluator = PqlEvaluator(line_items)
+
+  def __GetIds(self, filter_statement):
+    """Return IDs of entities that match a given statement.
+
+    Args:
+      filter_statement: dict Filter statement.
+
+    Returns:
+      list IDs of the matching entities.
+    """
+    page = self.__evaluator.GetEntitiesByStatement(filter_statement)[0]
+    return [entity['id'] for entity in page['results']]
+
+  def testWhere(self):
+    """Test whether conditions are evaluated."""
+    self.assertEqual(self.__GetIds({'query': 'WHERE id > 8'}), ['9', '10'])
+    self.assertEqual(
+        self.__GetIds({'query': 'WHERE id IN (1, 2) OR name LIKE \'%#10\''}),
+        ['1', '2', '10'])
+    self.assertEqual(
+        self.__GetIds({'query': 'WHERE NOT (status = \'READY\') AND '
+                                'orderId != 0'}),
+        ['2', '4', '8', '10'])
+    self.assertEqual(self.__GetIds({'query': 'WHERE orderId IS NULL'}), [])
+
+  def testParams(self):
+    """Test whether bind variables are taken from params and values."""
+    params = [{
+        'type': 'LongParam',
+        'key': 'orderId',
+        'value': '1'
+    }]
+    self.assertEqual(
+        self.__GetIds({'query': 'WHERE orderId = :orderId',
+                       'params': params}),
+        ['1', '4', '7', '10'])
+    values = [{
+        'key': 'status',
+        'value': {
+            'xsi_type': 'TextValue',
+            'value': 'PAUSED'
+        }
+    }]
+    self.assertEqual(
+        self.__GetIds({'query': 'WHERE orderId = 1 AND status = :status',
+                       'values': values}),
+        ['4', '10'])
+
+  def testOrderLimitOffset(self):
+    """Test whether results are ordered and paged."""
+    page = self.__evaluator.GetEntitiesByStatement(
+        {'query': 'ORDER BY orderId DESC, id LIMIT 3 OFFSET 1'})[0]
+    self.assertEqual([entity['id'] for entity in page['results']],
+                     ['5', '8', '1'])
+    self.assertEqual(page['totalResultSetSize'], '10')
+    self.assertEqual(page['startIndex'], '1')
+
+  def testInvalidStatement(self):
+    """Test whether invalid statements are rejected."""
+    for query in ('WHERE id = ', 'WHERE (id = 1', 'WHERE id ~ 1',
+                  'WHERE id = :id', 'SELECT id FROM LineItem'):
+      self.assertRaises(ValidationError,
+                        self.__evaluator.GetEntitiesByStatement,
+                        {'query': query})
+
+
+def makeTestSuite():
+  """Set up test suite.
+
+  Returns:
+    TestSuite test suite.
+  """
+  suite = unittest.TestSuite()
+  suite.addTests(unittest.makeSuite(PqlEvaluatorTest))
+  return suite
+
+
+if __name__ == '__main__':
+  suite = makeTestSuite()
+  alltests = unittest.TestSuite([suite])
+  unittest.main(defaultTest='alltests')
@@ -20,6 +20,7 @@
 __author__ = 'api.sgrinberg@gmail.com (Stan Grinberg)'
 
 import os
+import StringIO
 import sys
 sys.path.append(os.path.join('..', '..', '..'))
 import unittest
@@ -387,6 +388,31 @@ class ReportServiceTestV201103(unittest.TestCase):
     self.assert_(isinstance(self.__class__.service.DownloadReport(
         self.__class__.report_job_id, 'TSV'), str))
 
+  def testDownloadReportToFile(self):
+    """Test whether we can stream a report into a file."""
+    if self.__class__.report_job_id == '0':
+      self.testRunDeliveryReport()
+    fh = StringIO.StringIO()
+    progress = []
+    self.assert_(self.__class__.service.DownloadReportToFile(
+        self.__class__.report_job_id, 'CSV', fh, chunk_size=1024,
+        progress_callback=lambda *args: progress.append(args)))
+    self.assert_(progress)
+    self.assertEqual(progress[-1][2], len(fh.getvalue()))
+    self.assertEqual(fh.getvalue(), self.__class__.service.DownloadReport(
+        self.__class__.report_job_id, 'CSV'))
+
+  def testWaitForReportJobs(self):
+    """Test whether we can wait for several report jobs at once."""
+    if self.__class__.report_job_id == '0':
+      self.testRunDeliveryReport()
+    finished = []
+    statuses = self.__class__.service.WaitForReportJobs(
+        [self.__class__.report_job_id],
+        lambda report_job_id, status: finished.append(report_job_id))
+    self.assertEqual(statuses[self.__class__.report_job_id], 'COMPLETED')
+    self.assertEqual(finished, [self.__class__.report_job_id])
+
 
 def makeTestSuiteV201004():
   """Set up test suite using v201004.
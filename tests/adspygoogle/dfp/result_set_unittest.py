@@ -0,0 +1,94 @@
+#!/usr/bin/python
+#
+# Copyright 2011 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests to cover ResultSet."""
+
+__author__ = 'api.sgrinberg@gmail.com (Stan Grinberg)'
+
+import os
+import sys
+sys.path.append(os.path.join('..', '..', '..'))
+import StringIO
+import unittest
+
+from adspygoogle.common.Errors import ValidationError
+from adspygoogle.dfp.ResultSet import ResultSet
+
+
+class ResultSetTest(unittest.TestCase):
+
+  """Unittest suite for ResultSet."""
+
+  RESULT_SET = {
+      'columnTypes': [{'labelName': 'Id'}, {'labelName': 'CityName'},
+                      {'labelName': 'Targetable'}],
+      'rows': [
+          {'values': [{'Value_Type': 'NumberValue', 'value': '1001'},
+                      {'Value_Type': 'TextValue', 'value': u'Z\xfcrich'},
+                      {'Value_Type': 'BooleanValue', 'value': 'true'}]},
+          {'values': [{'Value_Type': 'NumberValue', 'value': '1002'},
+                      {'Value_Type': 'TextValue', 'value': 'Bern'},
+                      {'Value_Type': 'BooleanValue', 'value': 'None'}]}
+      ]
+  }
+
+  def setUp(self):
+    """Prepare unittest."""
+    print self.id()
+
+  def testColumns(self):
+    """Test whether cells are decoded into typed columns."""
+    result_set = ResultSet(self.__class__.RESULT_SET)
+    self.assertEqual(len(result_set), 2)
+    self.assertEqual(result_set.GetColumnNames(),
+                     ['Id', 'CityName', 'Targetable'])
+    self.assertEqual(result_set['Id'], [1001, 1002])
+    self.assertEqual(result_set.GetColumn('Targetable'), [True, None])
+    self.assertRaises(ValidationError, result_set.GetColumn, 'Foo')
+
+  def testRows(self):
+    """Test whether rows are iterated over in order."""
+    result_set = ResultSet(self.__class__.RESULT_SET)
+    result_set.Extend(self.__class__.RESULT_SET)
+    rows = list(result_set)
+    self.assertEqual(len(rows), 4)
+    self.assertEqual(rows[1], (1002, 'Bern', None))
+    self.assertEqual(list(ResultSet()), [])
+
+  def testWriteCsv(self):
+    """Test whether result set is written as CSV."""
+    fh = StringIO.StringIO()
+    self.assertEqual(ResultSet(self.__class__.RESULT_SET).WriteCsv(fh), 2)
+    self.assertEqual(fh.getvalue().splitlines(),
+                     ['Id,CityName,Targetable', '1001,Z\xc3\xbcrich,true',
+                      '1002,Bern,'])
+
+
+def makeTestSuite():
+  """Set up test suite.
+
+  Returns:
+    TestSuite test suite.
+  """
+  suite = unittest.TestSuite()
+  suite.addTests(unittest.makeSuite(ResultSetTest))
+  return suite
+
+
+if __name__ == '__main__':
+  suite = makeTestSuite()
+  alltests = unittest.TestSuite([suite])
+  unittest.main(defaultTest='alltests')
@@ -366,6 +366,24 @@ class UserServiceTestV201103(unittest.TestCase):
     for user in users:
       self.assertEqual(user['preferredLocale'], locale)
 
+  def testServicesShareResolvedModules(self):
+    """Test whether instances of a service share resolved modules."""
+    # Different HTTP proxy yields a separate instance of the service.
+    service = client.GetUserService(self.__class__.SERVER,
+                                    self.__class__.VERSION, 'localhost:3128')
+    self.assert_(service is not self.__class__.service)
+    self.assert_(service._sanity_check is
+                 self.__class__.service._sanity_check)
+    self.assert_(service._web_services is
+                 self.__class__.service._web_services)
+    self.assert_(service._loc is self.__class__.service._loc)
+
+  def testGetServiceShared(self):
+    """Test whether client hands out the same instance of a service."""
+    self.assert_(client.GetUserService(self.__class__.SERVER,
+                                       self.__class__.VERSION, HTTP_PROXY) is
+                 self.__class__.service)
+
 
 def makeTestSuiteV201004():
   """Set up test suite using v201004.